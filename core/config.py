@@ -12,12 +12,54 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
     # Nombre maximum de worker de l'application
-    MAX_WORKER: int = int(os.environ.get("MAX_WORKER", 1))
+    MAX_WORKER: int = int(os.environ.get("MAX_WORKER", 2)) # workers traitant les jobs (un worker réservé aux requêtes compris)
+    # Exécution des jobs : "inline" dans le processus API, "external" par les processus `python -m worker`
+    JOB_EXECUTION_MODE: str = os.environ.get("JOB_EXECUTION_MODE", "inline")
+    JOB_POLL_SECONDS: float = 1.0 # intervalle d'interrogation de la table jobs par les workers externes
+    JOB_EVENT_POLL_SECONDS: float = 0.5 # intervalle de relais des messages des workers externes vers les websockets
+    JOB_EVENT_RETENTION_SECONDS: float = 300.0 # durée de conservation des messages des workers externes
+    QUERY_RESERVED_WORKERS: int = int(os.environ.get("QUERY_RESERVED_WORKERS", 1)) # workers réservés aux requêtes
+    QUERY_STREAM_CONCURRENCY: int = int(os.environ.get("QUERY_STREAM_CONCURRENCY", 4)) # requêtes en streaming (POST /query/stream) traitées simultanément par processus
+    TOKEN_STREAM_INTERVAL: float = float(os.environ.get("TOKEN_STREAM_INTERVAL", 0.1)) # intervalle minimal (s) entre deux envois des tokens générés à l'utilisateur
+    JOB_AGING_SECONDS: float = 120.0 # délai d'attente au-delà duquel une insertion passe devant les requêtes
+    JOB_DRAIN_TIMEOUT: float = 30.0 # durée maximale d'attente des jobs en cours à l'arrêt (secondes)
+    JOB_LEASE_SECONDS: float = 60.0 # durée du bail d'un worker sur un job avant reprise par un autre worker
+    JOB_HEARTBEAT_SECONDS: float = 15.0 # intervalle de renouvellement du bail d'un job en cours
+    JOB_CHECKPOINT_DIR: Path = Path("data/jobs") # points de reprise des jobs d'insertion (un répertoire par job)
+    INSERTION_TIMEOUT_MIN: float = 300.0 # délai minimal d'une tentative d'insertion (secondes)
+    INSERTION_TIMEOUT_MAX: float = 4 * 3600.0 # délai maximal d'une tentative d'insertion (secondes)
+    INSERTION_TIMEOUT_FACTOR: float = 3.0 # marge appliquée à la durée estimée d'une insertion
+    INSERTION_DEFAULT_PAGES_PER_SECOND: float = 0.5 # débit d'insertion retenu sans historique
+    INSERTION_THROUGHPUT_HISTORY: int = 20 # insertions terminées utilisées pour estimer le débit
 
     # Static files
     STATIC_URL: str= "/data"
     STATIC_DIR: Path = Path("data/files")
     IMAGE_RESOLUTION_SCALE: float = 2.0
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024 # taille des blocs lus lors de l'enregistrement d'un fichier uploadé
+    UPLOAD_DIR: Path = Path("data/uploads") # stockage des uploads en plusieurs morceaux en cours
+    UPLOAD_MAX_CHUNK_SIZE: int = 64 * 1024 * 1024 # taille maximale d'un morceau d'upload
+    UPLOAD_MAX_SIZE: int = 2 * 1024 * 1024 * 1024 # taille maximale d'un fichier uploadé en plusieurs morceaux (fichier préalloué)
+    UPLOAD_SESSION_HOURS: int = 24 # durée de validité d'une session d'upload sans activité
+    BATCH_MAX_FILES: int = 2000 # nombre maximum de fichiers d'une insertion par lot
+    BATCH_MAX_ARCHIVE_SIZE: int = 10 * 1024 * 1024 * 1024 # taille décompressée maximale d'une archive ZIP
+
+    # Conversion Docling
+    CONVERSION_WORKERS: int = int(os.environ.get("CONVERSION_WORKERS", 1)) # processus de conversion (0 = thread du processus courant)
+    CONVERSION_START_METHOD: str = "spawn" # méthode de démarrage des processus de conversion (spawn ou forkserver)
+    CONVERTER_CACHE_SIZE: int = 2 # nombre de convertisseurs Docling (jeux d'options différents) gardés en mémoire par processus
+    CONVERSION_SHARD_PAGES: int = 25 # nombre de pages par plage pour la conversion parallèle des PDF volumineux
+    CONVERSION_SHARD_MIN_PAGES: int = 50 # nombre de pages à partir duquel un PDF est converti par plages
+    CONVERSION_MEMORY_BUDGET_MB: int = int(os.environ.get("CONVERSION_MEMORY_BUDGET_MB", 2048)) # mémoire allouée à un document en cours de conversion (0 = pas de mode streaming)
+    CONVERSION_PAGE_MEMORY_MB: int = 20 # estimation de la mémoire occupée par une page convertie (images comprises)
+    INGESTION_SEGMENT_PAGES: int = 10 # nombre de pages par segment du pipeline conversion -> chunking -> embeddings (PDF dépassant le budget mémoire)
+    INGESTION_QUEUE_SIZE: int = 2 # nombre de segments en attente entre deux étages du pipeline
+
+    # Chunking
+    CHUNK_TOKENIZER_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2" # tokenizer utilisé pour la taille des chunks
+    CHUNK_MAX_TOKENS: int = 512 # taille maximale d'un chunk en tokens
+    HF_CACHE_DIR: str = "./data/hf_cache" # répertoire du cache local des tokenizers HuggingFace
+    HF_OFFLINE: bool = os.environ.get("HF_OFFLINE", "false").lower() == "true" # interdit le téléchargement des tokenizers
 
     # Sqlite Database
     SQLITE_DB: str = "./data/rag_db.sqlite" # chemin de la base
@@ -32,6 +74,14 @@ class Settings(BaseSettings):
     OLLAMA_URL: str = os.environ.get("OLLAMA_BASE_URL", "http://localhost:11434")
     LLM_MODEL: str = "gemma3:4b" # nom du modèle llm utilisé par défaut
     LLM_EMBEDDINGS_MODEL: str = "mxbai-embed-large:latest" # nom du modèle d'embeddings utilisé par défaut
+    EMBEDDING_BATCH_SIZE: int = int(os.environ.get("EMBEDDING_BATCH_SIZE", 32)) # nombre de chunks par requête d'embeddings
+    EMBEDDING_CONCURRENCY: int = int(os.environ.get("EMBEDDING_CONCURRENCY", 2)) # nombre de requêtes d'embeddings simultanées vers Ollama
+    EMBEDDING_CACHE_DB: str = "./data/embedding_cache.sqlite" # base du cache disque des embeddings
+    EMBEDDING_CACHE_MAX_ENTRIES: int = int(os.environ.get("EMBEDDING_CACHE_MAX_ENTRIES", 200000)) # nombre maximum d'embeddings en cache (0 = cache désactivé)
+    ANSWER_CACHE_MAX_ENTRIES: int = int(os.environ.get("ANSWER_CACHE_MAX_ENTRIES", 500)) # nombre maximum de réponses en cache par collection (0 = cache désactivé)
+    ANSWER_CACHE_THRESHOLD: float = float(os.environ.get("ANSWER_CACHE_THRESHOLD", 0.95)) # similarité cosinus minimale entre deux questions pour réutiliser une réponse
+    OLLAMA_MAX_CONNECTIONS: int = int(os.environ.get("OLLAMA_MAX_CONNECTIONS", 16)) # connexions HTTP simultanées vers Ollama par processus
+    OLLAMA_KEEPALIVE_EXPIRY: float = float(os.environ.get("OLLAMA_KEEPALIVE_EXPIRY", 120)) # durée de conservation (s) d'une connexion inactive vers Ollama
 
     # API
     api_title: str = "Ollama Docling RAG API" # nom de l'application
@@ -1,9 +1,20 @@
+import httpx
+from ollama import ResponseError
+
 class RAGException(Exception):
     """Exception de base pour l'application"""
     def __init__(self, message: str, detail: str | None = None):
+        super().__init__(message, detail)
         self.message = message
         self.detail = detail
 
+    def __reduce__(self):
+        # Nécessaire pour transmettre l'exception depuis un processus worker
+        return (self.__class__, (self.message, self.detail))
+
+    def __str__(self) -> str:
+        return f"{self.message}: {self.detail}" if self.detail else self.message
+
 class OllamaTimeoutError(RAGException):
     """Levée quand Ollama ne répond pas assez vite"""
     pass
@@ -14,4 +25,31 @@ class OllamaError(RAGException):
 
 class DocumentParsingError(RAGException):
     """Levée quand Docling échoue sur un PDF"""
-    pass
\ No newline at end of file
+    pass
+
+def is_retryable(error: BaseException) -> bool:
+    """Erreur transitoire justifiant une nouvelle tentative d'un job
+
+    Les erreurs de connexion ou de délai (Ollama, réseau) sont transitoires ; les erreurs
+    déterministes (fichier corrompu, DocumentParsingError, erreur de code) échouent immédiatement.
+    Les exceptions enchaînées (raise ... from e) sont examinées jusqu'à leur cause.
+
+    Args:
+        error (BaseException): erreur levée par le job
+
+    Returns:
+        bool: nouvelle tentative justifiée
+    """
+    seen: set[int] = set()
+    current: BaseException | None = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if isinstance(current, DocumentParsingError):
+            return False
+        if isinstance(current, (OllamaError, OllamaTimeoutError, ConnectionError, TimeoutError, httpx.TransportError)):
+            return True
+        if isinstance(current, ResponseError):
+            # Erreur du serveur Ollama (surcharge, redémarrage) : transitoire ; modèle absent : définitive
+            return current.status_code >= 500
+        current = current.__cause__ or current.__context__
+    return False
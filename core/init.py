@@ -1,6 +1,8 @@
 import logging
 from pathlib import Path
 
+from sqlalchemy import Connection, inspect, text
+
 from db.database import sync_engine
 from db.models import Base
 from core.config import settings
@@ -8,6 +10,29 @@ from core.config import settings
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def upgrade_schema(conn: Connection):
+    """Ajout des colonnes et index manquants sur les tables existantes
+
+    create_all ne modifie pas les tables déjà présentes : les nouvelles colonnes (toutes nullables)
+    sont ajoutées par ALTER TABLE et les index créés s'ils n'existent pas.
+
+    Args:
+        conn (Connection): connexion à la base de données
+    """
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            logger.info(f"colonne {table.name}.{column.name} ajoutée")
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
 def init_app():
     """Bootstrap de l'application"""
     # Création des répertoires de stockage si nécéssaire
@@ -17,6 +42,5 @@ def init_app():
     # Initialisation de la base de données sqlite
     with sync_engine.begin() as conn:
         Base.metadata.create_all(conn)
+        upgrade_schema(conn)
         logger.info("initialisation base de données sqlite réalisé")
-
-    
\ No newline at end of file
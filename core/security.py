@@ -1,11 +1,10 @@
 from datetime import datetime, timedelta
 import hashlib
-from io import BytesIO
 from pathlib import Path
 from typing import Any, Union
 import uuid
 import bcrypt
-from fastapi import HTTPException, UploadFile, status
+from fastapi import HTTPException, status
 import filetype
 from jose import jwt
 from pypdf import PdfReader
@@ -104,40 +103,52 @@ def verify_md5(file_path: Path, expected_hash: str, chunk_size: int=4096):
     return calculated_hash.lower() == expected_hash.lower()
 
 
-async def validate_file_type(file: UploadFile):
-    """Validation stricte du fichier uploadé pour éviter les risques de sécurité liés 
-    à des fichiers malveillants.
+ALLOWED_MIME_TYPES = [
+    "application/pdf",
+    "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+]
+
+def validate_filename(filename: str | None) -> str:
+    """Validation du nom et de l'extension d'un fichier uploadé
 
     Args:
-        file (UploadFile): Le fichier uploadé à valider.
+        filename (str | None): nom du fichier uploadé
 
     Raises:
         HTTPException: Aucun fichier sélectionné.
         HTTPException: Seuls les fichiers PDF et DOCX sont acceptés.
-        HTTPException: Impossible de déterminer le type de fichier.
-        HTTPException: Fichier invalide.
-        HTTPException: PDF protégé par mot de passe.
-        HTTPException: PDF corrompu ou illisible.
+
+    Returns:
+        str: nom du fichier
     """
     # 1. Vérification que le fichier n'est pas vide
-    if file.filename is None or file.filename.strip() == "":
+    if filename is None or filename.strip() == "":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Aucun fichier sélectionné."
         )
 
     # 2. Vérification par extension (premier rempart)
-    if not file.filename.lower().endswith((".pdf", ".docx")):
+    if not filename.lower().endswith((".pdf", ".docx")):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Seuls les fichiers PDF et DOCX sont acceptés."
         )
+    return filename
 
-    # 3. Vérification du contenu réel (Magic Numbers)
-    # On lit le début du fichier
-    head = await file.read(2048)
-    await file.seek(0) # On remet TOUJOURS le curseur au début
-    
+def validate_file_head(head: bytes) -> str:
+    """Validation du type réel d'un fichier à partir de ses premiers octets (Magic Numbers)
+
+    Args:
+        head (bytes): premiers octets du fichier (2048 suffisent)
+
+    Raises:
+        HTTPException: Impossible de déterminer le type de fichier.
+        HTTPException: Fichier invalide.
+
+    Returns:
+        str: type MIME du fichier
+    """
     kind = filetype.guess(head)
     
     if kind is None:
@@ -146,28 +157,35 @@ async def validate_file_type(file: UploadFile):
             detail="Impossible de déterminer le type de fichier."
         )
     
-    if kind.mime not in ["application/pdf", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"]:
+    if kind.mime not in ALLOWED_MIME_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Fichier invalide, seuls les formats PDF et DOCX sont acceptés. Type détecté : {kind.mime}"
         )
+    return kind.mime
 
-    # 4. Vérification du Mot de Passe (Chiffrement)
-    # On lit le fichier en mémoire pour pypdf (seulement les métadonnées)
-    if kind.mime == "application/pdf":
-        content = await file.read()
-        await file.seek(0) # Toujours remettre au début !
-        
-        try:
-            reader = PdfReader(BytesIO(content))
-            if reader.is_encrypted:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Ce PDF est protégé par un mot de passe et ne peut pas être traité."
-                )
-        except Exception:
-            # Si pypdf n'arrive même pas à lire la structure, le PDF est corrompu
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Le fichier PDF semble corrompu ou illisible."
-            )
\ No newline at end of file
+def validate_pdf(file_path: Path):
+    """Vérification de la structure et du chiffrement d'un PDF enregistré sur disque
+
+    pypdf lit le fichier à la demande : seuls la table des objets et le trailer sont chargés.
+
+    Args:
+        file_path (Path): chemin du fichier PDF
+
+    Raises:
+        HTTPException: PDF protégé par mot de passe.
+        HTTPException: PDF corrompu ou illisible.
+    """
+    try:
+        is_encrypted = PdfReader(file_path).is_encrypted
+    except Exception:
+        # Si pypdf n'arrive même pas à lire la structure, le PDF est corrompu
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Le fichier PDF semble corrompu ou illisible."
+        )
+    if is_encrypted:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Ce PDF est protégé par un mot de passe et ne peut pas être traité."
+        )
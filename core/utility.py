@@ -1,10 +1,13 @@
 import asyncio
+import shutil
 from pathlib import Path
 
 
+from core.config import settings
 from core.logging import logger
 from dependencies.sqlite_session import SessionLocalSync
-from repositories.job_repository import cleanup_old_jobs
+from repositories.job_repository import ACTIVE_STATUSES, cleanup_old_jobs, get_job
+from repositories.upload_repository import cleanup_expired_uploads
 from repositories.user_repository import cleanup_blacklisted_tokens
 
 
@@ -27,6 +30,36 @@ def delete_file(file_path: Path) -> bool:
     except Exception as e:
         raise ValueError(e)
     
+def remove_expired_uploads() -> int:
+    """Suppression des sessions d'upload expirées et de leurs fichiers partiels
+
+    Returns:
+        int: nombre de sessions supprimées
+    """
+    with SessionLocalSync() as session:
+        upload_ids = cleanup_expired_uploads(session)
+    for upload_id in upload_ids:
+        (Path(settings.UPLOAD_DIR) / f"{upload_id}.part").unlink(missing_ok=True)
+    return len(upload_ids)
+
+def remove_stale_checkpoints() -> int:
+    """Suppression des points de reprise des jobs terminés ou supprimés
+
+    Returns:
+        int: nombre de points de reprise supprimés
+    """
+    root = Path(settings.JOB_CHECKPOINT_DIR)
+    if not root.exists():
+        return 0
+    count = 0
+    with SessionLocalSync() as session:
+        for path in root.iterdir():
+            job = get_job(session=session, job_id=path.name)
+            if job is None or job.status not in ACTIVE_STATUSES:
+                shutil.rmtree(path, ignore_errors=True)
+                count += 1
+    return count
+
 async def schedule_periodic_cleanup(interval_seconds: int, days_to_keep: int):
     """Nettoyage périodique des jobs
 
@@ -42,6 +75,10 @@ async def schedule_periodic_cleanup(interval_seconds: int, days_to_keep: int):
             with SessionLocalSync() as session:
                 count = cleanup_old_jobs(session, days=days_to_keep)
                 logger.info(f"Nettoyage automatique : {count} jobs supprimés.")
+            count = remove_expired_uploads()
+            logger.info(f"Nettoyage automatique : {count} sessions d'upload expirées supprimées.")
+            count = remove_stale_checkpoints()
+            logger.info(f"Nettoyage automatique : {count} points de reprise de jobs supprimés.")
         except Exception as e:
             logger.error(f"Erreur lors du nettoyage automatique : {e}")
             # En cas d'erreur, on attend un peu avant de réessayer pour éviter de boucler sur un crash
@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import CheckConstraint, Integer, String, Text, ForeignKey, DateTime, Boolean, JSON
+from sqlalchemy import CheckConstraint, Index, Integer, LargeBinary, String, Text, ForeignKey, DateTime, Boolean, JSON
 from sqlalchemy.orm import Mapped, DeclarativeBase, mapped_column, relationship
 
 from core.config import settings
@@ -30,6 +30,10 @@ class CollectionMetadata(Base):
     created_by: Mapped[str] = mapped_column(Text, ForeignKey("users.id"), nullable=False)
     creator: Mapped[User] = relationship("User", lazy="joined")
     date_creation: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    # Collection Chroma courante, remplacée à chaque réindexation (nom de la collection par défaut)
+    vector_collection: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, default=None)
+    # Version du contenu indexé, incrémentée à chaque modification des documents (invalidation du cache des réponses)
+    version: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, default=0)
 
     __table_args__ = (
             CheckConstraint(
@@ -54,9 +58,17 @@ class DocumentMetadata(Base):
     inserted_by: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
     creator: Mapped[User] = relationship("User", lazy="joined")
     md5: Mapped[str] = mapped_column(Text)
+    sha256: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, default=None)
+    size: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, default=None)
     date_insertion: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     is_indexed: Mapped[bool] = mapped_column(Boolean, default=False)
 
+    __table_args__ = (
+        # Recherche des doublons d'une collection avant upload
+        Index("ix_documents_collection_md5", "collection_id", "md5"),
+        Index("ix_documents_collection_sha256", "collection_id", "sha256"),
+    )
+
 class Job(Base):
     """Modèle pour le stockage des jobs d'indexation des documents"""
     __tablename__ = "jobs"
@@ -74,9 +86,51 @@ class Job(Base):
     logs: Mapped[list] = mapped_column(JSON, default=list)
     error_message: Mapped[str] = mapped_column(String(255), default=None, nullable=True)
 
+    # Job parent d'un lot d'insertions
+    parent_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True, default=None, index=True)
+
+    # Arguments du job et bail de traitement pour la reprise après redémarrage
+    payload: Mapped[Optional[dict]] = mapped_column(JSON, nullable=True, default=None)
+    lease_owner: Mapped[Optional[str]] = mapped_column(String(128), nullable=True, default=None)
+    lease_expires_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, default=None)
+    heartbeat_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, default=None)
+
+    # Taille du document et début de la dernière tentative (estimation des délais d'insertion)
+    page_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True, default=None)
+    started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, default=None)
+
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
     finished_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, default=None)
 
+class JobEvent(Base):
+    """Modèle pour la transmission des messages des workers externes vers les websockets de l'API"""
+    __tablename__ = "job_events"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    user_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    data: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now, index=True)
+
+class UploadSession(Base):
+    """Modèle pour le suivi des uploads de fichiers en plusieurs morceaux (reprise possible)"""
+    __tablename__ = "upload_sessions"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True, index=True)
+    user_id: Mapped[str] = mapped_column(String(36), ForeignKey("users.id"), nullable=False)
+    collection_id: Mapped[str] = mapped_column(String(36), ForeignKey("collections_metadata.id"), nullable=False)
+    filename: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    status: Mapped[str] = mapped_column(String(25), default="open")
+
+    # Plages d'octets reçues [début, fin] fusionnées et morceaux reçus avec leur checksum SHA-256
+    ranges: Mapped[list] = mapped_column(JSON, default=list)
+    chunks: Mapped[list] = mapped_column(JSON, default=list)
+    job_id: Mapped[Optional[str]] = mapped_column(String(36), nullable=True, default=None)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+
 class TokenBlacklist(Base):
     """Modèle pour le stockage des tokens d'authentification invalidés (blacklist)"""
     __tablename__ = "token_blacklist"
@@ -103,3 +157,25 @@ class Query(Base):
     model: Mapped[str] = mapped_column(String(125), default=settings.LLM_MODEL)
 
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+class AnswerCacheEntry(Base):
+    """Modèle pour le cache sémantique des réponses aux requêtes d'une collection"""
+    __tablename__ = "answer_cache"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    collection_id: Mapped[str] = mapped_column(String(36), ForeignKey("collections_metadata.id"), nullable=False)
+    # Version de la collection lors de la génération : l'entrée est obsolète dès que la version change
+    collection_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    model: Mapped[str] = mapped_column(String(125), nullable=False)
+    question: Mapped[str] = mapped_column(Text, nullable=False)
+    # Embedding normalisé de la question (float32)
+    embedding: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    response: Mapped[dict] = mapped_column(JSON, nullable=False)
+    hits: Mapped[int] = mapped_column(Integer, default=0)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+    last_hit_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.now)
+
+    __table_args__ = (
+        Index("ix_answer_cache_lookup", "collection_id", "collection_version", "model"),
+    )
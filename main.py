@@ -1,5 +1,6 @@
 import asyncio
 import os
+from datetime import datetime
 
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
@@ -11,7 +12,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from core.exceptions import RAGException
 from core.init import init_app
 from core.logging import logger
-from core.utility import schedule_periodic_cleanup
+from core.utility import remove_expired_uploads, schedule_periodic_cleanup
 from db.database import sync_engine
 from dependencies.sqlite_session import SessionLocalSync
 from routers import (
@@ -21,11 +22,22 @@ from routers import (
     router_system, 
     router_job, 
     router_auth,
-    router_user
+    router_user,
+    router_upload
 )
 from core.config import settings
 from repositories.job_repository import cleanup_old_jobs
-from services import UserService, DbVectorielleService, JobRunner, UserWebSocketManager
+from services import (
+    ChunkingService,
+    ConversionPool,
+    UserService,
+    DbVectorielleService,
+    JobRunner,
+    JobEventRelay,
+    RagService,
+    UserWebSocketManager
+)
+from worker.handlers import register_job_handlers
 
 load_dotenv()
 
@@ -33,29 +45,45 @@ load_dotenv()
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Code d'initialisation de l'application
+    started_at = datetime.now()
     init_app()
-    # Initialisation du service de base de données vectorielle
-    app.state.vector_db_service = DbVectorielleService(
-        chroma_db=settings.CHROMA_DB,
-        embedding_model=settings.LLM_EMBEDDINGS_MODEL,
-        ollama_url=settings.OLLAMA_URL
-    )
-    # Initialisation du service de gestion des jobs
-    app.state.job_runner = JobRunner()
-    asyncio.create_task(app.state.job_runner.start())
+    # Service de base de données vectorielle partagé avec les jobs exécutés dans le processus
+    app.state.vector_db_service = DbVectorielleService.shared()
     # Initialisation du gestionnaire websocket
     app.state.user_ws_manager = UserWebSocketManager()
+    # Initialisation du service de gestion des jobs et reprise des jobs interrompus
+    # En mode externe les jobs sont traités par les processus worker dont les messages sont relayés
+    external_workers = settings.JOB_EXECUTION_MODE == "external"
+    app.state.job_runner = JobRunner(
+        user_ws_manager=app.state.user_ws_manager,
+        execute=not external_workers
+    )
+    register_job_handlers(app.state.job_runner)
+    await app.state.job_runner.start()
+    app.state.job_event_relay = JobEventRelay(user_ws_manager=app.state.user_ws_manager)
+    if external_workers:
+        await app.state.job_event_relay.start()
+    else:
+        # Démarrage des processus de conversion Docling et chargement du tokenizer de chunking
+        ConversionPool.shared().start()
+        ChunkingService.warmup()
     # Création de l'administrateur au premier démarrage de l'application
     # Nettoyage des anciens jobs à chaque démarrage de l'application
     with SessionLocalSync() as session:
         UserService().create_first_admin(session=session)
         cleanup_old_jobs(session=session, days=7)
+    remove_expired_uploads()
+    # Requêtes en streaming interrompues par l'arrêt précédent de l'API (jobs non repris)
+    RagService.fail_interrupted_streams(started_before=started_at)
     # Lancement de la tâche de nettoyage périodique de la base de données
     cleanup_task = asyncio.create_task(
         schedule_periodic_cleanup(interval_seconds=86400, days_to_keep=7)
     )
     yield
     # Code de nettoyage à l'arrêt de l'application
+    await app.state.job_runner.stop()
+    await app.state.job_event_relay.stop()
+    ConversionPool.shared().shutdown()
     cleanup_task.cancel()
     try:
         await cleanup_task
@@ -96,6 +124,7 @@ app.include_router(router=router_user)
 app.include_router(router=router_query)
 app.include_router(router=router_collection)
 app.include_router(router=router_insert)
+app.include_router(router=router_upload)
 app.include_router(router=router_job)
 app.include_router(router=router_system)
 
@@ -0,0 +1,137 @@
+from datetime import datetime
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from db.models import AnswerCacheEntry, CollectionMetadata
+
+def get_collection_version(session: Session, collection_id: str) -> int | None:
+    """Version courante d'une collection
+
+    Args:
+        session (Session): session d'accès à la base de données
+        collection_id (str): identifiant de la collection
+
+    Returns:
+        int | None: version de la collection, None si la collection n'existe plus
+    """
+    stmt = select(CollectionMetadata.version).where(CollectionMetadata.id == collection_id)
+    row = session.execute(stmt).first()
+    return None if row is None else (row[0] or 0)
+
+def list_entries(
+    session: Session,
+    collection_id: str,
+    collection_version: int,
+    model: str,
+    limit: int
+) -> list[AnswerCacheEntry]:
+    """Entrées du cache valides pour une collection et un modèle
+
+    Args:
+        session (Session): session d'accès à la base de données
+        collection_id (str): identifiant de la collection
+        collection_version (int): version courante de la collection
+        model (str): modèle de génération
+        limit (int): nombre maximum d'entrées retournées (les plus récemment utilisées)
+
+    Returns:
+        list[AnswerCacheEntry]: entrées du cache
+    """
+    stmt = (
+        select(AnswerCacheEntry)
+        .where(
+            (AnswerCacheEntry.collection_id == collection_id) &
+            (AnswerCacheEntry.collection_version == collection_version) &
+            (AnswerCacheEntry.model == model)
+        )
+        .order_by(AnswerCacheEntry.last_hit_at.desc())
+        .limit(limit)
+    )
+    return list(session.execute(stmt).scalars().all())
+
+def record_hit(session: Session, entry: AnswerCacheEntry) -> None:
+    """Mise à jour des statistiques d'une entrée retournée par le cache
+
+    Args:
+        session (Session): session d'accès à la base de données
+        entry (AnswerCacheEntry): entrée utilisée
+    """
+    entry.hits = (entry.hits or 0) + 1
+    entry.last_hit_at = datetime.now()
+    session.commit()
+
+def add_entry(session: Session, entry: AnswerCacheEntry) -> None:
+    """Ajout d'une entrée dans le cache
+
+    Args:
+        session (Session): session d'accès à la base de données
+        entry (AnswerCacheEntry): entrée à ajouter
+    """
+    session.add(entry)
+    session.commit()
+
+def delete_stale_entries(
+    session: Session,
+    collection_id: str,
+    collection_version: int
+) -> int:
+    """Suppression des entrées générées pour une version antérieure de la collection
+
+    Args:
+        session (Session): session d'accès à la base de données
+        collection_id (str): identifiant de la collection
+        collection_version (int): version courante de la collection
+
+    Returns:
+        int: nombre d'entrées supprimées
+    """
+    result = session.execute(
+        delete(AnswerCacheEntry).where(
+            (AnswerCacheEntry.collection_id == collection_id) &
+            (AnswerCacheEntry.collection_version < collection_version)
+        )
+    )
+    session.commit()
+    return result.rowcount or 0
+
+def trim_entries(
+    session: Session,
+    collection_id: str,
+    keep: int
+) -> int:
+    """Suppression des entrées les moins récemment utilisées au-delà de `keep` entrées
+
+    Args:
+        session (Session): session d'accès à la base de données
+        collection_id (str): identifiant de la collection
+        keep (int): nombre d'entrées conservées
+
+    Returns:
+        int: nombre d'entrées supprimées
+    """
+    kept = (
+        select(AnswerCacheEntry.id)
+        .where(AnswerCacheEntry.collection_id == collection_id)
+        .order_by(AnswerCacheEntry.last_hit_at.desc())
+        .limit(keep)
+    )
+    result = session.execute(
+        delete(AnswerCacheEntry).where(
+            (AnswerCacheEntry.collection_id == collection_id) &
+            AnswerCacheEntry.id.not_in(kept)
+        )
+    )
+    session.commit()
+    return result.rowcount or 0
+
+def delete_collection_entries(session: Session, collection_id: str) -> None:
+    """Suppression des entrées du cache d'une collection (sans commit)
+
+    Args:
+        session (Session): session d'accès à la base de données
+        collection_id (str): identifiant de la collection
+    """
+    session.execute(
+        delete(AnswerCacheEntry).where(AnswerCacheEntry.collection_id == collection_id)
+    )
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import delete, func, select, text, true
+from sqlalchemy import delete, func, or_, select, text, true, update
 
 from db.models import CollectionMetadata, DocumentMetadata, User
 from schemas import (
@@ -112,6 +112,41 @@ class CollectionRepository:
         result = session.execute(stmt)
         return result.scalar_one_or_none()
     
+    @staticmethod
+    def find_documents_by_hashes(
+        session: Session,
+        collection_id: str,
+        md5s: list[str],
+        sha256s: list[str]
+    ) -> list[DocumentMetadata]:
+        """Recherche des documents d'une collection par hash MD5 ou SHA-256
+        (index sur collection_id et md5 / sha256)
+
+        Args:
+            session (Session): session d'accès à la base de données
+            collection_id (str): identifiant de la collection
+            md5s (list[str]): hash MD5 recherchés
+            sha256s (list[str]): hash SHA-256 recherchés
+
+        Returns:
+            list[DocumentMetadata]: documents trouvés
+        """
+        conditions = []
+        if md5s:
+            conditions.append(DocumentMetadata.md5.in_(md5s))
+        if sha256s:
+            conditions.append(DocumentMetadata.sha256.in_(sha256s))
+        if not conditions:
+            return []
+        stmt = (
+            select(DocumentMetadata)
+            .where(
+                (DocumentMetadata.collection_id == collection_id) &
+                or_(*conditions)
+            )
+        )
+        return list(session.execute(stmt).scalars().unique().all())
+
     @staticmethod
     def get_document_collection_by_id(
         session: Session,
@@ -191,6 +226,74 @@ class CollectionRepository:
             count=result_count
         )
 
+    @staticmethod
+    def get_indexed_documents(
+        session: Session,
+        collection_id: str
+    ) -> list[DocumentMetadata]:
+        """Liste complète des documents indexés d'une collection
+
+        Args:
+            session (Session): session d'accès à la base de données
+            collection_id (str): identifiant de la collection
+
+        Returns:
+            list[DocumentMetadata]: documents indexés
+        """
+        stmt = (
+            select(DocumentMetadata)
+            .where(
+                (DocumentMetadata.collection_id == collection_id) &
+                (DocumentMetadata.is_indexed == true())
+            )
+            .order_by(DocumentMetadata.date_insertion)
+        )
+        return list(session.execute(stmt).scalars().unique().all())
+
+    @staticmethod
+    def set_vector_collection(
+        session: Session,
+        collection_id: str,
+        vector_collection: str
+    ) -> CollectionMetadata | None:
+        """Bascule d'une collection sur une nouvelle collection Chroma
+
+        Args:
+            session (Session): session d'accès à la base de données
+            collection_id (str): identifiant de la collection
+            vector_collection (str): nom de la nouvelle collection Chroma
+
+        Returns:
+            CollectionMetadata | None: collection mise à jour
+        """
+        collection = session.get(CollectionMetadata, collection_id)
+        if collection is None:
+            return None
+        collection.vector_collection = vector_collection
+        collection.version = (collection.version or 0) + 1
+        session.commit()
+        session.refresh(collection)
+        return collection
+
+    @staticmethod
+    def bump_version(
+        session: Session,
+        collection_id: str
+    ) -> None:
+        """Incrément de la version d'une collection après modification de ses documents (sans commit)
+
+        Les réponses mises en cache pour les versions précédentes ne sont plus utilisées.
+
+        Args:
+            session (Session): session d'accès à la base de données
+            collection_id (str): identifiant de la collection
+        """
+        session.execute(
+            update(CollectionMetadata)
+            .where(CollectionMetadata.id == collection_id)
+            .values(version=func.coalesce(CollectionMetadata.version, 0) + 1)
+        )
+
     @staticmethod
     def delete_documents(
         session: Session,
@@ -207,6 +310,22 @@ class CollectionRepository:
         )
         session.execute(stmt)
 
+    @staticmethod
+    def delete_document(
+        session: Session,
+        document_id: str
+    ) -> None:
+        """Suppression d'un document (sans commit)
+
+        Args:
+            session (Session): session sqlite
+            document_id (str): id du document
+        """
+        stmt = delete(DocumentMetadata).where(
+            DocumentMetadata.id == document_id
+        )
+        session.execute(stmt)
+
     @staticmethod
     def delete_collection(
         session: Session,
@@ -233,6 +352,24 @@ class CollectionRepository:
         session.refresh(document)
         return document
     
+    @staticmethod
+    def add_documents(
+        session: Session,
+        documents: list[DocumentMetadata]
+    ) -> list[DocumentMetadata]:
+        """Ajout de documents en une seule transaction (insertion par lot)
+
+        Args:
+            session (Session): session sqlite
+            documents (list[DocumentMetadata]): documents à ajouter
+
+        Returns:
+            list[DocumentMetadata]: documents ajoutés
+        """
+        session.add_all(documents)
+        session.commit()
+        return documents
+
     @staticmethod
     def update_document(
         session: Session,
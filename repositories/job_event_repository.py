@@ -0,0 +1,70 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from db.models import JobEvent
+
+def add_event(
+    session: Session,
+    user_id: str,
+    data: dict
+) -> None:
+    """Ajout d'un message à destination d'un utilisateur
+
+    Args:
+        session (Session): session d'accès à la base de données
+        user_id (str): identifiant de l'utilisateur destinataire
+        data (dict): message sérialisé en JSON
+    """
+    session.add(JobEvent(user_id=user_id, data=data))
+    session.commit()
+
+def get_last_event_id(session: Session) -> int:
+    """Identifiant du dernier message enregistré
+
+    Args:
+        session (Session): session d'accès à la base de données
+
+    Returns:
+        int: identifiant du dernier message, 0 si la table est vide
+    """
+    return session.execute(select(func.max(JobEvent.id))).scalar_one_or_none() or 0
+
+def list_events_after(
+    session: Session,
+    last_id: int,
+    limit: int = 500
+) -> list[JobEvent]:
+    """Liste des messages enregistrés après un identifiant donné
+
+    Args:
+        session (Session): session d'accès à la base de données
+        last_id (int): identifiant du dernier message déjà transmis
+        limit (int, optional): nombre maximal de messages. Defaults to 500.
+
+    Returns:
+        list[JobEvent]: messages par ordre d'enregistrement
+    """
+    stmt = (
+        select(JobEvent)
+        .where(JobEvent.id > last_id)
+        .order_by(JobEvent.id)
+        .limit(limit)
+    )
+    return list(session.execute(stmt).scalars().all())
+
+def cleanup_events(session: Session, seconds: float) -> int:
+    """Suppression des messages anciens
+
+    Args:
+        session (Session): session d'accès à la base de données
+        seconds (float): âge au-delà duquel les messages sont supprimés
+
+    Returns:
+        int: nombre de messages supprimés
+    """
+    threshold_date = datetime.now() - timedelta(seconds=seconds)
+    result = session.execute(delete(JobEvent).where(JobEvent.created_at < threshold_date))
+    session.commit()
+    return result.rowcount
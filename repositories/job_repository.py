@@ -1,15 +1,19 @@
 from datetime import datetime, timedelta
 
-from sqlalchemy import select
+from sqlalchemy import func, or_, select, update
 from sqlalchemy.orm  import Session
 
 from db.models import Job
 
+# Statuts des jobs restant à traiter
+ACTIVE_STATUSES = ("pending", "processing", "retrying")
+
 def create_job(
     session: Session,
     job_id: str,
     user_id: str,
-    type: str
+    type: str,
+    payload: dict | None = None
 ) -> Job:
     """Création d'un nouveau job pour les workers
 
@@ -18,16 +22,101 @@ def create_job(
         job_id (str): identifiant du job
         user_id (str): identifiant du créateur du job
         type (str): type de job "insert" ou "query"
+        payload (dict | None, optional): arguments (sérialisables JSON) du job. Defaults to None.
 
     Returns:
         Job: le job nouvellement créé
     """
-    new_job=Job(id=job_id, user_id=user_id, type=type)
+    new_job=Job(id=job_id, user_id=user_id, type=type, payload=payload)
     session.add(new_job)
     session.commit()
     session.refresh(new_job)
     return new_job
 
+def create_jobs(session: Session, jobs: list[Job]) -> list[Job]:
+    """Création groupée de jobs (une seule transaction)
+
+    Args:
+        session (Session): session d'accès à la base de données
+        jobs (list[Job]): jobs à créer
+
+    Returns:
+        list[Job]: les jobs créés
+    """
+    session.add_all(jobs)
+    session.commit()
+    return jobs
+
+def refresh_parent_job(session: Session, job_id: str) -> Job | None:
+    """Mise à jour de l'avancement du job parent d'un job terminé
+
+    Le job parent est terminé lorsque tous ses jobs enfants le sont ; il est en échec
+    si tous ses enfants ont échoué.
+
+    Args:
+        session (Session): session d'accès à la base de données
+        job_id (str): identifiant du job enfant
+
+    Returns:
+        Job | None: job parent mis à jour, None si le job n'a pas de parent
+    """
+    job = get_job(session=session, job_id=job_id)
+    if job is None or job.parent_id is None:
+        return None
+    parent = get_job(session=session, job_id=job.parent_id)
+    if parent is None:
+        return None
+
+    stmt = (
+        select(Job.status, func.count())
+        .where(Job.parent_id == parent.id)
+        .group_by(Job.status)
+    )
+    counts = {status: count for status, count in session.execute(stmt).all()}
+    total = sum(counts.values())
+    completed = counts.get("completed", 0)
+    failed = counts.get("failed", 0)
+
+    parent.progress = f"{completed + failed}/{total}"
+    if completed + failed == total:
+        parent.status = "failed" if completed == 0 else "completed"
+        parent.error_message = f"{failed} documents en échec sur {total}" if failed else None
+        parent.finished_at = datetime.now()
+    session.commit()
+    return parent
+
+def insertion_throughput(session: Session, limit: int = 20) -> float | None:
+    """Débit d'insertion observé (pages par seconde) sur les derniers jobs réussis du premier coup
+
+    Args:
+        session (Session): session d'accès à la base de données
+        limit (int, optional): nombre de jobs pris en compte. Defaults to 20.
+
+    Returns:
+        float | None: pages insérées par seconde, None sans historique
+    """
+    stmt = (
+        select(Job.page_count, Job.started_at, Job.finished_at)
+        .where(
+            Job.type == "insertion",
+            Job.status == "completed",
+            Job.attemps == 1,
+            Job.page_count.is_not(None),
+            Job.started_at.is_not(None),
+            Job.finished_at.is_not(None)
+        )
+        .order_by(Job.finished_at.desc())
+        .limit(limit)
+    )
+    pages = 0
+    seconds = 0.0
+    for page_count, started_at, finished_at in session.execute(stmt).all():
+        pages += page_count
+        seconds += max((finished_at - started_at).total_seconds(), 0.0)
+    if pages == 0 or seconds <= 0:
+        return None
+    return pages / seconds
+
 def get_job(
     session: Session,
     job_id: str
@@ -73,4 +162,206 @@ def cleanup_old_jobs(session: Session, days: int = 7) -> int:
     session.query(Job).filter(Job.id.in_(job_ids)).delete(synchronize_session=False)
     session.commit()
 
-    return len(job_ids) # Retourne le nombre de lignes supprimées
\ No newline at end of file
+    return len(job_ids) # Retourne le nombre de lignes supprimées
+
+def claim_job(
+    session: Session,
+    job_id: str,
+    owner: str,
+    lease_seconds: float
+) -> bool:
+    """Prise en charge atomique d'un job par un worker (pose d'un bail)
+
+    Args:
+        session (Session): session d'accès à la base de données
+        job_id (str): identifiant du job
+        owner (str): identifiant du worker
+        lease_seconds (float): durée du bail en secondes
+
+    Returns:
+        bool: True si le bail a été obtenu
+    """
+    now = datetime.now()
+    stmt = (
+        update(Job)
+        .where(
+            Job.id == job_id,
+            Job.status.in_(ACTIVE_STATUSES),
+            or_(
+                Job.lease_owner.is_(None),
+                Job.lease_owner == owner,
+                Job.lease_expires_at < now
+            )
+        )
+        .values(
+            lease_owner=owner,
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            heartbeat_at=now
+        )
+    )
+    result = session.execute(stmt)
+    session.commit()
+    return result.rowcount == 1
+
+def renew_lease(
+    session: Session,
+    job_id: str,
+    owner: str,
+    lease_seconds: float
+) -> bool:
+    """Renouvellement du bail d'un job en cours de traitement
+
+    Args:
+        session (Session): session d'accès à la base de données
+        job_id (str): identifiant du job
+        owner (str): identifiant du worker
+        lease_seconds (float): durée du bail en secondes
+
+    Returns:
+        bool: True si le bail est toujours détenu par le worker
+    """
+    now = datetime.now()
+    stmt = (
+        update(Job)
+        .where(Job.id == job_id, Job.lease_owner == owner)
+        .values(
+            lease_expires_at=now + timedelta(seconds=lease_seconds),
+            heartbeat_at=now
+        )
+    )
+    result = session.execute(stmt)
+    session.commit()
+    return result.rowcount == 1
+
+def release_job(
+    session: Session,
+    job_id: str,
+    owner: str,
+    error: str | None = None,
+    interrupted: bool = False
+) -> None:
+    """Libération du bail d'un job à la fin de son traitement
+
+    Un job terminé sans statut final est marqué en échec. Un job interrompu (arrêt du worker)
+    conserve son statut pour être repris au prochain démarrage.
+
+    Args:
+        session (Session): session d'accès à la base de données
+        job_id (str): identifiant du job
+        owner (str): identifiant du worker
+        error (str | None, optional): erreur levée par le job. Defaults to None.
+        interrupted (bool, optional): traitement interrompu. Defaults to False.
+    """
+    job = get_job(session=session, job_id=job_id)
+    if job is None or job.lease_owner != owner:
+        return
+    job.lease_owner = None
+    job.lease_expires_at = None
+    if not interrupted and job.status in ACTIVE_STATUSES:
+        job.status = "failed"
+        job.progress = "done"
+        job.error_message = (error or "Job terminé sans statut final")[:255]
+        job.finished_at = datetime.now()
+    session.commit()
+
+def list_active_jobs(session: Session, types: list[str]) -> list[Job]:
+    """Liste des jobs non terminés d'un ou plusieurs types
+
+    Args:
+        session (Session): session d'accès à la base de données
+        types (list[str]): types de jobs recherchés
+
+    Returns:
+        list[Job]: jobs en attente ou en cours
+    """
+    stmt = select(Job).where(Job.type.in_(types), Job.status.in_(ACTIVE_STATUSES))
+    return list(session.execute(stmt).scalars().all())
+
+def list_recoverable_jobs(
+    session: Session,
+    types: list[str],
+    limit: int | None = None
+) -> list[Job]:
+    """Liste des jobs à (re)mettre en file : non terminés et sans bail valide
+
+    Args:
+        session (Session): session d'accès à la base de données
+        types (list[str]): types de jobs pris en charge
+        limit (int | None, optional): nombre maximal de jobs. Defaults to None.
+
+    Returns:
+        list[Job]: jobs à reprendre, du plus ancien au plus récent
+    """
+    stmt = (
+        select(Job)
+        .where(
+            Job.type.in_(types),
+            Job.status.in_(ACTIVE_STATUSES),
+            or_(
+                Job.lease_owner.is_(None),
+                Job.lease_expires_at < datetime.now()
+            )
+        )
+        .order_by(Job.created_at)
+        .limit(limit)
+    )
+    result = session.execute(stmt)
+    return list(result.scalars().all())
+
+def fail_job(
+    session: Session,
+    job_id: str,
+    message: str
+) -> None:
+    """Passage d'un job en échec
+
+    Args:
+        session (Session): session d'accès à la base de données
+        job_id (str): identifiant du job
+        message (str): description de l'erreur
+    """
+    job = get_job(session=session, job_id=job_id)
+    if job is None:
+        return
+    job.status = "failed"
+    job.progress = "done"
+    job.error_message = message[:255]
+    job.finished_at = datetime.now()
+    job.lease_owner = None
+    job.lease_expires_at = None
+    session.commit()
+
+def fail_interrupted_jobs(
+    session: Session,
+    job_type: str,
+    started_before: datetime,
+    message: str
+) -> int:
+    """Passage en échec des jobs d'un type restés en cours après l'arrêt de leur processus
+
+    Args:
+        session (Session): session d'accès à la base de données
+        job_type (str): type de job
+        started_before (datetime): date de démarrage du processus courant
+        message (str): description de l'erreur
+
+    Returns:
+        int: nombre de jobs passés en échec
+    """
+    result = session.execute(
+        update(Job)
+        .where(
+            (Job.type == job_type) &
+            (Job.status == "processing") &
+            (Job.started_at < started_before)
+        )
+        .values(
+            status="failed",
+            progress="done",
+            error_message=message[:255],
+            finished_at=datetime.now()
+        )
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return result.rowcount or 0
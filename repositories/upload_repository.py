@@ -0,0 +1,112 @@
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from db.models import UploadSession
+
+def create_upload(session: Session, upload: UploadSession) -> UploadSession:
+    """Création d'une session d'upload
+
+    Args:
+        session (Session): session d'accès à la base de données
+        upload (UploadSession): session d'upload à enregistrer
+
+    Returns:
+        UploadSession: la session d'upload créée
+    """
+    session.add(upload)
+    session.commit()
+    session.refresh(upload)
+    return upload
+
+def get_upload(session: Session, upload_id: str) -> UploadSession | None:
+    """Récupération d'une session d'upload
+
+    Args:
+        session (Session): session d'accès à la base de données
+        upload_id (str): identifiant de la session d'upload
+
+    Returns:
+        UploadSession | None: session d'upload récupérée
+    """
+    stmt = select(UploadSession).where(UploadSession.id == upload_id)
+    return session.execute(stmt).scalar_one_or_none()
+
+def update_received(
+    session: Session,
+    upload: UploadSession,
+    ranges: list,
+    chunks: list,
+    updated_at: datetime,
+    expires_at: datetime
+) -> bool:
+    """Mise à jour conditionnelle des plages et morceaux reçus d'une session d'upload
+
+    La mise à jour n'est appliquée que si la session n'a pas été modifiée depuis sa lecture
+    (même date de mise à jour, toujours ouverte) : les morceaux reçus en parallèle, éventuellement
+    par des processus différents, ne s'écrasent pas.
+
+    Args:
+        session (Session): session d'accès à la base de données
+        upload (UploadSession): session d'upload lue
+        ranges (list): plages d'octets reçues
+        chunks (list): morceaux reçus
+        updated_at (datetime): nouvelle date de mise à jour
+        expires_at (datetime): nouvelle date d'expiration
+
+    Returns:
+        bool: True si la mise à jour a été appliquée
+    """
+    result = session.execute(
+        update(UploadSession)
+        .where(
+            (UploadSession.id == upload.id) &
+            (UploadSession.updated_at == upload.updated_at) &
+            (UploadSession.status == "open")
+        )
+        .values(ranges=ranges, chunks=chunks, updated_at=updated_at, expires_at=expires_at)
+        .execution_options(synchronize_session=False)
+    )
+    session.commit()
+    return result.rowcount == 1
+
+def list_expired_uploads(session: Session, now: datetime | None = None) -> Sequence[UploadSession]:
+    """Liste des sessions d'upload expirées
+
+    Args:
+        session (Session): session d'accès à la base de données
+        now (datetime | None, optional): date de référence. Defaults to None.
+
+    Returns:
+        Sequence[UploadSession]: sessions d'upload expirées
+    """
+    stmt = select(UploadSession).where(UploadSession.expires_at < (now or datetime.now()))
+    return session.execute(stmt).scalars().all()
+
+def delete_upload(session: Session, upload: UploadSession):
+    """Suppression d'une session d'upload
+
+    Args:
+        session (Session): session d'accès à la base de données
+        upload (UploadSession): session d'upload à supprimer
+    """
+    session.delete(upload)
+    session.commit()
+
+def cleanup_expired_uploads(session: Session) -> list[str]:
+    """Suppression des sessions d'upload expirées
+
+    Args:
+        session (Session): session d'accès à la base de données
+
+    Returns:
+        list[str]: identifiants des sessions supprimées
+    """
+    expired = list_expired_uploads(session=session)
+    upload_ids = [upload.id for upload in expired]
+    for upload in expired:
+        session.delete(upload)
+    session.commit()
+    return upload_ids
@@ -5,6 +5,7 @@ from .collection import router_collection
 from .job import router_job
 from .auth import router_auth
 from .user import router_user
+from .upload import router_upload
 
 __all__ = [
     "router_collection", 
@@ -13,5 +14,6 @@ __all__ = [
     "router_system",
     "router_job",
     "router_auth",
-    "router_user"
+    "router_user",
+    "router_upload"
 ]
\ No newline at end of file
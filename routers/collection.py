@@ -5,17 +5,20 @@ from sqlalchemy.orm import Session
 
 from core.logging import logger
 from db.models import User
+from dependencies.job_runner import get_job_runner
 from dependencies.sqlite_session import get_db
+from dependencies.user_websocket import get_user_ws_manager
 from dependencies.vector_db import get_vector_db_service
 from dependencies.role_checker import allow_admin, allow_any_user
-from services import CollectionService, DbVectorielleService
+from services import CollectionService, DbVectorielleService, JobRunner, ReindexService, UserWebSocketManager
 from schemas import (
     CollectionCreate, 
     CollectionModel, 
     CollectionFilters, 
     CollectionListResponse,
     DocumentFilters,
-    DocumentListResponse
+    DocumentListResponse,
+    JobResponse
 )
 
 router_collection = APIRouter(prefix="/collections", tags=["Collections"])
@@ -294,3 +297,61 @@ async def delete_collection(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erreur lors de la suppression de la collection"
         )
+
+@router_collection.post(
+        "/{collection_name}/reindex",
+        summary="Réindexe une collection",
+        description="""
+        Recalcule les chunks et les embeddings de tous les documents de la collection à partir des
+        documents Docling enregistrés lors de la conversion, sans nouvelle conversion (modèle
+        d'embeddings ou paramètres de découpage modifiés). Les vecteurs sont écrits dans une nouvelle
+        collection Chroma sur laquelle la collection bascule une fois la réindexation terminée ; les
+        requêtes continuent d'utiliser l'index courant pendant le traitement. Les insertions dans la
+        collection sont refusées pendant la réindexation.
+        """,
+        response_model=JobResponse
+)
+async def reindex_collection(
+    collection_name: str,
+    current_user: User = Depends(allow_admin),
+    session: Session = Depends(get_db),
+    user_ws_manager: UserWebSocketManager = Depends(get_user_ws_manager),
+    job_runner: JobRunner = Depends(get_job_runner)
+) -> JobResponse:
+    """Lancement de la réindexation d'une collection
+
+    Args:
+        collection_name (str): nom de la collection à réindexer
+        current_user (User, optional): utilisateur courant. Defaults to Depends(allow_admin).
+        session (Session, optional): session d'accès à la base de données. Defaults to Depends(get_db).
+        user_ws_manager (UserWebSocketManager, optional): magasin de gestion des sockets utilisateurs. Defaults to Depends(get_user_ws_manager).
+        job_runner (JobRunner, optional): service de gestion des tâches. Defaults to Depends(get_job_runner).
+
+    Raises:
+        HTTPException: La collection n'existe pas
+        HTTPException: Réindexation ou insertions en cours sur la collection
+        HTTPException: Erreur lors du lancement de la réindexation
+
+    Returns:
+        JobResponse: identifiant du job de réindexation
+    """
+    try:
+        collection = CollectionService.get_by_name(session=session, name=collection_name)
+        if collection is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Collection introuvable")
+        job_id = await ReindexService.submit_reindex(
+            session=session,
+            user_id=current_user.id,
+            collection=CollectionModel.model_validate(collection),
+            user_ws_manager=user_ws_manager,
+            job_runner=job_runner
+        )
+        return JobResponse(job_id=job_id)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Crash inattendu lors du lancement de la réindexation : {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors du lancement de la réindexation"
+        )
@@ -1,8 +1,9 @@
+from typing import List
+
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
 from sqlalchemy.orm import Session
 import uuid
 
-from core import security
 from core.exceptions import RAGException
 from core.utility import delete_file
 from core.logging import logger
@@ -11,12 +12,68 @@ from dependencies.job_runner import get_job_runner
 from dependencies.user_websocket import get_user_ws_manager
 from dependencies.sqlite_session import get_db
 from dependencies.role_checker import allow_admin
-from repositories import job_repository
-from schemas import CollectionModel, JobResponse, JobOut
-from services import ConversionService, CollectionService, JobRunner, UserWebSocketManager, InsertionService
+from schemas import BatchJobResponse, CollectionModel, DuplicateCheckRequest, DuplicateCheckResponse, JobResponse
+from services import BatchService, ConversionService, CollectionService, InsertionService, JobRunner, ReindexService, UserWebSocketManager
 
 router_insert = APIRouter(prefix="/insert", tags=["Insertion fichier"])
 
+@router_insert.post(
+    "/check",
+    response_model=DuplicateCheckResponse,
+    summary="Vérifier la présence de fichiers dans une collection avant upload",
+    description="""
+    Vérification, à partir de leur hash MD5 ou SHA-256 (et de leur taille), des fichiers déjà présents
+    dans une collection : seuls les fichiers absents ont besoin d'être envoyés.
+    """
+)
+async def check_files(
+    payload: DuplicateCheckRequest,
+    user_admin: User = Depends(allow_admin),
+    session: Session = Depends(get_db)
+) -> DuplicateCheckResponse:
+    """Vérification de la présence de fichiers dans une collection avant upload
+
+    Args:
+        payload (DuplicateCheckRequest): collection et empreintes des fichiers
+        user_admin (User, optional): utilisateur courant. Defaults to Depends(allow_admin).
+        session (Session, optional): session d'accès à la base de données. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: collection inexistante ou empreinte sans hash
+        HTTPException: Erreur lors de la vérification des fichiers
+
+    Returns:
+        DuplicateCheckResponse: résultat par fichier
+    """
+    try:
+        collection = CollectionService.get_by_name(
+            session=session, 
+            name=payload.collection_name
+        )
+        if collection is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, 
+                detail=f"La collection {payload.collection_name} n'existe pas"
+            )
+        return ConversionService.check_duplicates(
+            session=session,
+            collection_id=collection.id,
+            files=payload.files
+        )
+    except HTTPException as he:
+        raise he
+    except ValueError as ve:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(ve)
+        )
+    except Exception as e:
+        logger.error(f"Crash inattendu : {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            detail="Erreur lors de la vérification des fichiers"
+        )
+
 @router_insert.post(
     "/pdf",
     response_model=JobResponse,
@@ -46,6 +103,7 @@ async def process_file(
 
     Raises:
         HTTPException: collection inexistante
+        HTTPException: collection en cours de réindexation
         HTTPException: Fichier déjà existant dans la collection
         he: Erreur lors de l'éxecution de la fonction
         HTTPException: Erreur lors de l'insertion du fichier
@@ -66,53 +124,39 @@ async def process_file(
                 detail=f"La collection {collection_name} n'existe pas"
             )
         collection = CollectionModel.model_validate(collection)
+        ReindexService.check_not_reindexing(session=session, collection_id=collection.id)
 
-        await security.validate_file_type(file=file)
-
-        # 2. Sauvegarde du fichier
-        job_id = str(uuid.uuid4())
-        doc_id = uuid.uuid4()
-        file_path = await ConversionService.save_imported_file(
+        # 2. Sauvegarde et validation du fichier en une seule lecture
+        doc_id = str(uuid.uuid4())
+        imported_file = await ConversionService.save_imported_file(
             file=file, 
             collection_name=collection_name, 
-            doc_id=str(doc_id)
+            doc_id=doc_id
         )
 
         # 3. Vérification de la présence du fichier dans la collection
         file_exist = ConversionService.check_md5(
-            file_path=file_path, 
+            md5=imported_file.md5, 
             collection_id=collection.id, 
             session=session
         )
         if file_exist:
-            delete_file(file_path=file_path)
+            delete_file(file_path=imported_file.path)
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST, 
                 detail="Le fichier est déjà présent dans la collection"
             )
         
-        # 4. Création du job dans la base de données
-        new_job = job_repository.create_job(
-            session=session, 
-            job_id=job_id,
+        # 4. Création du job et mise en attente du document dans la pile de traitement
+        job_id = await InsertionService.submit_insertion(
+            session=session,
             user_id=user_admin.id,
-            type="insertion"
-        )
-        await user_ws_manager.send_to_user(
-            user_id=user_admin.id,
-            data=JobOut.model_validate(new_job)
-        )
-        
-        print("Vérification fichier terminée")
-        # 5. Mise en attente du document dans la pile de traitement
-        await job_runner.submit(InsertionService.run_insert_doc,
-            file_path=file_path,
-            filename=file.filename or 'unknown',
-            doc_id=str(doc_id),
             collection=collection,
-            job_id=job_id,
-            user_id=user_admin.id,
-            user_ws_manager=user_ws_manager
+            imported_file=imported_file,
+            filename=file.filename or 'unknown',
+            doc_id=doc_id,
+            user_ws_manager=user_ws_manager,
+            job_runner=job_runner
         )
 
         return JobResponse(job_id=job_id)
@@ -131,4 +175,66 @@ async def process_file(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
             detail="Erreur lors du traitement du PDF"
         )
-    
\ No newline at end of file
+
+@router_insert.post(
+    "/batch",
+    response_model=BatchJobResponse,
+    summary="Lancer l'insertion d'un lot de documents (fichiers multiples ou archive ZIP)",
+    description="""
+    Insertion de plusieurs documents en une requête : fichiers envoyés ensemble et/ou archives ZIP,
+    extraites sur le serveur. Un job parent suit l'avancement du lot (documents traités / total),
+    chaque document étant inséré par son propre job. Les fichiers déjà présents dans la collection
+    ou refusés sont listés dans la réponse sans interrompre le lot.
+    """
+)
+async def process_batch(
+    files: List[UploadFile] = File(..., description="Fichiers ou archives ZIP à traiter"),
+    collection_name: str = "",
+    user_admin: User = Depends(allow_admin),
+    session: Session = Depends(get_db),
+    user_ws_manager: UserWebSocketManager = Depends(get_user_ws_manager),
+    job_runner: JobRunner = Depends(get_job_runner)
+) -> BatchJobResponse:
+    """Processus d'insertion d'un lot de fichiers dans la base de connaissances
+
+    Args:
+        files (List[UploadFile]): fichiers ou archives ZIP à insérer.
+        collection_name (str, optional): nom de la collection pour insertion des fichiers. Defaults to "".
+        user_admin (User, optional): utilisateur courant. Defaults to Depends(allow_admin).
+        session (Session, optional): session d'accès à la base de données. Defaults to Depends(get_db).
+        user_ws_manager (UserWebSocketManager, optional): magasin de gestion des sockets utilisateurs. Defaults to Depends(get_user_ws_manager).
+        job_runner (JobRunner, optional): service de gestion des tâches. Defaults to Depends(get_job_runner).
+
+    Raises:
+        HTTPException: collection inexistante, lot trop important ou archive invalide
+        HTTPException: Erreur lors de l'insertion du lot
+
+    Returns:
+        BatchJobResponse: identifiant du job parent, fichiers acceptés, doublons et fichiers refusés
+    """
+    try:
+        collection = CollectionService.get_by_name(
+            session=session, 
+            name=collection_name
+        )
+        if collection is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, 
+                detail=f"La collection {collection_name} n'existe pas"
+            )
+        return await BatchService.insert_batch(
+            session=session,
+            user_id=user_admin.id,
+            collection=CollectionModel.model_validate(collection),
+            files=files,
+            user_ws_manager=user_ws_manager,
+            job_runner=job_runner
+        )
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Crash inattendu lors de l'insertion d'un lot : {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            detail="Erreur lors de l'insertion du lot"
+        )
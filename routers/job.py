@@ -3,15 +3,47 @@ from sqlalchemy.orm import Session
 
 from core.logging import logger
 from db.models import User
+from dependencies.job_runner import get_job_runner
 from dependencies.sqlite_session import get_db
 from dependencies.role_checker import allow_admin, allow_any_user
 from schemas.response import JobCleaningResponse
-from services import JobService
-from schemas import JobOut
+from services import JobService, JobRunner
+from schemas import JobOut, JobRunnerStatus
 
 
 router_job = APIRouter(prefix="/jobs", tags=["Jobs"])
 
+@router_job.get(
+        "/runner/status",
+        response_model=JobRunnerStatus,
+        summary="Etat du gestionnaire de jobs",
+        description="Fourniture de l'état des workers et de la file d'attente des jobs",
+)
+def runner_status(
+    admin_user: User = Depends(allow_admin),
+    job_runner: JobRunner = Depends(get_job_runner)
+) -> JobRunnerStatus:
+    """Etat du gestionnaire de jobs
+
+    Args:
+        admin_user (User, optional): utilisateur courant. Defaults to Depends(allow_admin).
+        job_runner (JobRunner, optional): service de gestion des tâches. Defaults to Depends(get_job_runner).
+
+    Raises:
+        HTTPException: 500 internal server error
+
+    Returns:
+        JobRunnerStatus: état des workers et de la file d'attente
+    """
+    try:
+        return job_runner.status()
+    except Exception as e:
+        logger.error(f"Crash inattendu lors de la lecture de l'état des workers : {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            detail="Erreur lors de la lecture de l'état des workers"
+        )
+
 @router_job.get(
         "/{job_id}",
         response_model=JobOut,
@@ -1,5 +1,6 @@
 import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from core.exceptions import RAGException
@@ -12,8 +13,7 @@ from dependencies.user_websocket import get_user_ws_manager
 from dependencies.role_checker import allow_any_user
 from repositories import job_repository
 from schemas import QueryRequest, CollectionModel, JobResponse, JobOut
-from services import CollectionService, LlmService, JobRunner, UserWebSocketManager
-from worker.query_collection import query_collection
+from services import AsyncLlmService, CollectionService, JobRunner, RagService, UserWebSocketManager
 
 router_query = APIRouter(prefix="/query", tags=["Query"])
 
@@ -67,8 +67,8 @@ async def query(
 
         # 2. Vérification de l'existence du modèle
         model = payload.model if payload.model is not None else settings.LLM_MODEL
-        llm_service =  LlmService()
-        models = llm_service.list_models()
+        llm_service = AsyncLlmService.shared()
+        models = await llm_service.list_models()
         noms_models = [model.nom for model in models if not model.embed]
         if model not in noms_models:
             raise HTTPException(
@@ -76,13 +76,18 @@ async def query(
                 detail=f"Le modèle '{payload.model}' n'est pas disponible"
             )
 
-        # 3. Création du job dans la base de données
+        # 3. Création du job et de ses arguments dans la base de données
         job_id = str(uuid.uuid4())
         new_job = job_repository.create_job(
             session=session, 
             job_id=job_id, 
             user_id=user.id,
-            type="query"
+            type="query",
+            payload={
+                "query": payload.query,
+                "model": model,
+                "collection_name": payload.collection_name
+            }
         )
         await user_ws_manager.send_to_user(
             user_id=user.id,
@@ -90,14 +95,7 @@ async def query(
         )
 
         # 4. Mise en attente de la requête dans la pile de traitement
-        await job_runner.submit(query_collection,
-            job_id=job_id,
-            query=payload.query,
-            model=model,
-            collection_name=payload.collection_name,
-            user_id=user.id,
-            user_ws_manager=user_ws_manager
-        )
+        await job_runner.submit(job_id=job_id, job_type="query")
 
         return JobResponse(job_id=job_id)
 
@@ -116,3 +114,112 @@ async def query(
             detail="Erreur lors de l'éxécution de la requête"
         )
 
+@router_query.post(
+        "/stream",
+        summary="Interroge la base de connaissances en streaming (SSE)",
+        description="""
+        Exécute la requête dans la requête HTTP, sans passer par la file des jobs, et transmet la
+        réponse en Server-Sent Events :
+        - job : identifiant du job traçant la requête
+        - stage : étape atteinte (reformulation, recherche, reranking, génération)
+        - token : texte généré
+        - answer : réponse complète
+        - error : erreur de traitement
+        Le nombre de requêtes traitées simultanément est limité (429 lorsque toutes les places sont occupées).
+        """,
+        responses={429: {"description": "Trop de requêtes en streaming en cours"}}
+)
+async def query_stream(
+    payload: QueryRequest,
+    user: User = Depends(allow_any_user),
+    session: Session = Depends(get_db)
+    ) -> StreamingResponse:
+    """Exécution d'une requête utilisateur avec réponse en streaming SSE
+
+    Args:
+        payload (QueryRequest): Information sur la requête à effectuer
+            query: requête de l'utilisateur
+            collection_name: nom de la collection à interroger
+            model: nom du modèle à utiliser (optionel)
+        user (User, optional): utilisateur courant. Defaults to Depends(allow_any_user).
+        session (Session, optional): session de connection à la base de données. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: Trop de requêtes en streaming en cours
+        HTTPException: La collection ou le modèle n'existe pas
+        HTTPException: Erreur lors de l'éxecution de la fonction
+
+    Returns:
+        StreamingResponse: flux d'évènements SSE
+    """
+    # La place est réservée dès la réception de la requête et libérée à la fin du flux
+    if not await RagService.acquire_stream_slot():
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Trop de requêtes en cours, réessayez plus tard",
+            headers={"Retry-After": "5"}
+        )
+    streaming = False
+    try:
+
+        # 1. Vérification de la présence de la collection
+        collection = CollectionService.get_by_name(
+            session=session, 
+            name=payload.collection_name
+        )
+        if collection is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, 
+                detail=f"La collection {payload.collection_name} n'existe pas"
+            )
+        collection = CollectionModel.model_validate(collection)
+
+        # 2. Vérification de l'existence du modèle
+        model = payload.model if payload.model is not None else settings.LLM_MODEL
+        models = await AsyncLlmService.shared().list_models()
+        if model not in [m.nom for m in models if not m.embed]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, 
+                detail=f"Le modèle '{payload.model}' n'est pas disponible"
+            )
+
+        # 3. Création du job traçant la requête et streaming de la réponse
+        job_id = RagService.create_stream_job(
+            session=session,
+            user_id=user.id,
+            query=payload.query,
+            model=model,
+            collection_name=collection.name
+        )
+        response = StreamingResponse(
+            RagService.stream_query(
+                job_id=job_id,
+                user_id=user.id,
+                query=payload.query,
+                model=model,
+                collection=collection
+            ),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+        streaming = True
+        return response
+
+    except HTTPException as he:
+        raise he
+    except RAGException as re:
+        logger.error(f"Erreur lors de l'exécution de la requête {payload.query}: {re.message}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            detail="Erreur lors de l'éxécution de la requête"
+        )
+    except Exception as e:
+        logger.error(f"Crash inattendu lors de l'exécution d'une requête: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            detail="Erreur lors de l'éxécution de la requête"
+        )
+    finally:
+        # Requête refusée avant le streaming : la place n'est pas libérée par le flux
+        if not streaming:
+            RagService.stream_slots().release()
@@ -5,9 +5,9 @@ from core.logging import logger
 from db.models import User
 from dependencies.sqlite_session import get_db
 from dependencies.vector_db import get_vector_db_service
-from dependencies.role_checker import allow_any_user
-from services import DbVectorielleService, LlmService, HealthService
-from schemas import HealthResponse, Model
+from dependencies.role_checker import allow_admin, allow_any_user
+from services import DbVectorielleService, EmbeddingCache, LlmService, HealthService
+from schemas import EmbeddingCacheStats, HealthResponse, Model
 
 router_system = APIRouter(prefix="/system")
 
@@ -73,7 +73,7 @@ def list_models(
         list[Model]: liste des modèles disponibles sur le serveur LLM
     """
     try:
-        llm_service = LlmService()
+        llm_service = LlmService.shared()
         return llm_service.list_models()
     except Exception as e:
         logger.error(f"Crash inattendu lors du chargement des modèles: {e}")
@@ -81,3 +81,33 @@ def list_models(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
             detail="Erreur lors du chargement des modèles"
         )
+
+@router_system.get(
+    "/embedding-cache",
+    response_model=EmbeddingCacheStats,
+    summary="Statistiques du cache des embeddings",
+    description="Nombre d'embeddings en cache et taux de succès depuis le démarrage. Accès limité aux administrateurs",
+    tags=["Système"]
+)
+def embedding_cache_stats(
+    user: User = Depends(allow_admin)
+) -> EmbeddingCacheStats:
+    """Statistiques du cache des embeddings du processus
+
+    Args:
+        user (User, optional): utilisateur courant. Defaults to Depends(allow_admin).
+
+    Raises:
+        HTTPException: Erreur lors de la lecture du cache
+
+    Returns:
+        EmbeddingCacheStats: statistiques du cache des embeddings
+    """
+    try:
+        return EmbeddingCache.shared().stats()
+    except Exception as e:
+        logger.error(f"Crash inattendu lors de la lecture du cache des embeddings: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, 
+            detail="Erreur lors de la lecture du cache des embeddings"
+        )
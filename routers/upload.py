@@ -0,0 +1,248 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from core.exceptions import RAGException
+from core.logging import logger
+from db.models import UploadSession, User
+from dependencies.job_runner import get_job_runner
+from dependencies.user_websocket import get_user_ws_manager
+from dependencies.sqlite_session import get_db
+from dependencies.role_checker import allow_admin
+from repositories import upload_repository
+from schemas import CollectionModel, JobResponse, UploadSessionCreate, UploadSessionOut
+from services import CollectionService, JobRunner, UploadService, UserWebSocketManager
+
+router_upload = APIRouter(prefix="/insert/uploads", tags=["Insertion fichier"])
+
+def get_user_upload(session: Session, upload_id: str, user: User) -> UploadSession:
+    """Récupération d'une session d'upload de l'utilisateur courant
+
+    Args:
+        session (Session): session d'accès à la base de données
+        upload_id (str): identifiant de la session d'upload
+        user (User): utilisateur courant
+
+    Raises:
+        HTTPException: session d'upload inconnue
+
+    Returns:
+        UploadSession: session d'upload
+    """
+    upload = upload_repository.get_upload(session=session, upload_id=upload_id)
+    if upload is None or upload.user_id != user.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Session d'upload inconnue"
+        )
+    return upload
+
+@router_upload.post(
+    "",
+    response_model=UploadSessionOut,
+    summary="Créer une session d'upload en plusieurs morceaux",
+    description="""
+    Création d'une session d'upload pour un document volumineux. Le fichier est ensuite envoyé
+    par morceaux (PUT avec en-tête Content-Range) puis la session est finalisée (commit)
+    pour lancer le job d'insertion.
+    """
+)
+async def create_upload(
+    payload: UploadSessionCreate,
+    user_admin: User = Depends(allow_admin),
+    session: Session = Depends(get_db)
+) -> UploadSessionOut:
+    """Création d'une session d'upload
+
+    Args:
+        payload (UploadSessionCreate): description du fichier à uploader
+        user_admin (User, optional): utilisateur courant. Defaults to Depends(allow_admin).
+        session (Session, optional): session d'accès à la base de données. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: collection inexistante ou fichier refusé
+        HTTPException: Erreur lors de la création de la session d'upload
+
+    Returns:
+        UploadSessionOut: session d'upload créée
+    """
+    try:
+        collection = CollectionService.get_by_name(
+            session=session,
+            name=payload.collection_name
+        )
+        if collection is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"La collection {payload.collection_name} n'existe pas"
+            )
+        upload = UploadService.create_upload(
+            session=session,
+            user_id=user_admin.id,
+            collection=CollectionModel.model_validate(collection),
+            payload=payload
+        )
+        return UploadService.to_out(upload)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Crash inattendu lors de la création de la session d'upload : {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors de la création de la session d'upload"
+        )
+
+@router_upload.get(
+    "/{upload_id}",
+    response_model=UploadSessionOut,
+    summary="Etat d'une session d'upload",
+    description="Plages d'octets déjà reçues, pour reprendre un upload interrompu"
+)
+async def get_upload(
+    upload_id: str,
+    user_admin: User = Depends(allow_admin),
+    session: Session = Depends(get_db)
+) -> UploadSessionOut:
+    """Etat d'une session d'upload
+
+    Args:
+        upload_id (str): identifiant de la session d'upload
+        user_admin (User, optional): utilisateur courant. Defaults to Depends(allow_admin).
+        session (Session, optional): session d'accès à la base de données. Defaults to Depends(get_db).
+
+    Returns:
+        UploadSessionOut: session d'upload
+    """
+    return UploadService.to_out(get_user_upload(session=session, upload_id=upload_id, user=user_admin))
+
+@router_upload.put(
+    "/{upload_id}",
+    response_model=UploadSessionOut,
+    summary="Envoyer un morceau du fichier",
+    description="""
+    Envoi d'un morceau du fichier dans le corps de la requête. La position du morceau est donnée par
+    l'en-tête Content-Range (bytes début-fin/taille) et son checksum SHA-256 (hexadécimal) peut être
+    fourni dans l'en-tête X-Chunk-SHA256. Un morceau peut être renvoyé autant de fois que nécessaire.
+    """
+)
+async def put_upload_chunk(
+    upload_id: str,
+    request: Request,
+    content_range: str | None = Header(None),
+    x_chunk_sha256: str | None = Header(None),
+    user_admin: User = Depends(allow_admin),
+    session: Session = Depends(get_db)
+) -> UploadSessionOut:
+    """Ecriture d'un morceau du fichier
+
+    Args:
+        upload_id (str): identifiant de la session d'upload
+        request (Request): requête contenant le morceau
+        content_range (str | None, optional): en-tête Content-Range. Defaults to Header(None).
+        x_chunk_sha256 (str | None, optional): checksum SHA-256 du morceau. Defaults to Header(None).
+        user_admin (User, optional): utilisateur courant. Defaults to Depends(allow_admin).
+        session (Session, optional): session d'accès à la base de données. Defaults to Depends(get_db).
+
+    Raises:
+        HTTPException: plage, taille ou checksum du morceau incorrect
+        HTTPException: Erreur lors de l'écriture du morceau
+
+    Returns:
+        UploadSessionOut: session d'upload mise à jour
+    """
+    try:
+        upload = get_user_upload(session=session, upload_id=upload_id, user=user_admin)
+        start, end = UploadService.parse_content_range(content_range=content_range, size=upload.size)
+        upload = await UploadService.write_chunk(
+            session=session,
+            upload=upload,
+            start=start,
+            end=end,
+            stream=request.stream(),
+            checksum=x_chunk_sha256
+        )
+        return UploadService.to_out(upload)
+    except HTTPException as he:
+        raise he
+    except Exception as e:
+        logger.error(f"Crash inattendu lors de l'écriture d'un morceau d'upload : {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors de l'écriture du morceau"
+        )
+
+@router_upload.post(
+    "/{upload_id}/commit",
+    response_model=JobResponse,
+    summary="Finaliser une session d'upload",
+    description="Validation du fichier complet et lancement du job d'insertion dans la collection"
+)
+async def commit_upload(
+    upload_id: str,
+    user_admin: User = Depends(allow_admin),
+    session: Session = Depends(get_db),
+    user_ws_manager: UserWebSocketManager = Depends(get_user_ws_manager),
+    job_runner: JobRunner = Depends(get_job_runner)
+) -> JobResponse:
+    """Finalisation d'une session d'upload
+
+    Args:
+        upload_id (str): identifiant de la session d'upload
+        user_admin (User, optional): utilisateur courant. Defaults to Depends(allow_admin).
+        session (Session, optional): session d'accès à la base de données. Defaults to Depends(get_db).
+        user_ws_manager (UserWebSocketManager, optional): magasin de gestion des sockets utilisateurs. Defaults to Depends(get_user_ws_manager).
+        job_runner (JobRunner, optional): service de gestion des tâches. Defaults to Depends(get_job_runner).
+
+    Raises:
+        HTTPException: fichier incomplet, invalide ou déjà présent dans la collection
+        HTTPException: Erreur lors de la finalisation de l'upload
+
+    Returns:
+        JobResponse: identifiant du job d'insertion
+    """
+    try:
+        upload = get_user_upload(session=session, upload_id=upload_id, user=user_admin)
+        job_id = await UploadService.commit_upload(
+            session=session,
+            upload=upload,
+            user_ws_manager=user_ws_manager,
+            job_runner=job_runner
+        )
+        return JobResponse(job_id=job_id)
+    except HTTPException as he:
+        raise he
+    except RAGException as re:
+        logger.error(f"Erreur lors de la finalisation de l'upload {upload_id}: {re.message}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors du traitement du PDF"
+        )
+    except Exception as e:
+        logger.error(f"Crash inattendu lors de la finalisation de l'upload : {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erreur lors de la finalisation de l'upload"
+        )
+
+@router_upload.delete(
+    "/{upload_id}",
+    summary="Abandonner une session d'upload",
+    description="Suppression de la session d'upload et des morceaux reçus"
+)
+async def abort_upload(
+    upload_id: str,
+    user_admin: User = Depends(allow_admin),
+    session: Session = Depends(get_db)
+) -> dict:
+    """Abandon d'une session d'upload
+
+    Args:
+        upload_id (str): identifiant de la session d'upload
+        user_admin (User, optional): utilisateur courant. Defaults to Depends(allow_admin).
+        session (Session, optional): session d'accès à la base de données. Defaults to Depends(get_db).
+
+    Returns:
+        dict: confirmation de la suppression
+    """
+    upload = get_user_upload(session=session, upload_id=upload_id, user=user_admin)
+    UploadService.abort_upload(session=session, upload=upload)
+    return {"message": "Session d'upload supprimée"}
@@ -3,23 +3,35 @@ from .schema import (
     Model,
 )
 from .collection import (CollectionModel, CollectionCreate)
-from .document import (DocumentModel, DocumentCreate)
+from .document import (
+    DocumentModel,
+    DocumentCreate,
+    DocumentHash,
+    DuplicateCheckRequest,
+    DuplicateCheckResult,
+    DuplicateCheckResponse
+)
 from .user import (UserOut, UserCreate, UserUpdate)
-from .job import JobOut
+from .job import JobOut, JobRunnerStatus, JobTokenOut, LaneStatus, WorkerStatus
 from .chunk import (ChunkMetada, Chunk, ChunkingResponse)
-from .health import (OllamaHealth, HealthResponse)
+from .health import (OllamaHealth, HealthResponse, EmbeddingCacheStats)
 from .response import (
+    BatchFileRejected,
+    BatchJobResponse,
     JobResponse, 
     CollectionListResponse, 
     DocumentListResponse,
     UsersListResponse,
     QueryListResponse
 )
-from .conversion import ConvertPdfResponse
+from .conversion import ConvertPdfResponse, ConverterOptions, ImportedFile
 from .filters import CollectionFilters, DocumentFilters, UserFilters
 from .query import QueryModel
+from .upload import UploadChunkOut, UploadSessionCreate, UploadSessionOut
 
 __all__ = [
+    "BatchFileRejected",
+    "BatchJobResponse",
     "JobResponse",
     "QueryRequest",
     "Model",
@@ -30,13 +42,24 @@ __all__ = [
     "CollectionCreate",
     "DocumentModel",
     "DocumentCreate",
+    "DocumentHash",
+    "DuplicateCheckRequest",
+    "DuplicateCheckResult",
+    "DuplicateCheckResponse",
     "JobOut",
+    "JobTokenOut",
+    "JobRunnerStatus",
+    "LaneStatus",
+    "WorkerStatus",
     "ChunkMetada",
     "Chunk",
     "ChunkingResponse",
     "OllamaHealth",
     "HealthResponse",
+    "EmbeddingCacheStats",
     "ConvertPdfResponse",
+    "ConverterOptions",
+    "ImportedFile",
     "CollectionFilters",
     "CollectionListResponse",
     "DocumentFilters",
@@ -44,5 +67,8 @@ __all__ = [
     "UserFilters",
     "UsersListResponse",
     "QueryModel",
-    "QueryListResponse"
+    "QueryListResponse",
+    "UploadChunkOut",
+    "UploadSessionCreate",
+    "UploadSessionOut"
 ]
\ No newline at end of file
@@ -9,6 +9,7 @@ class ChunkMetada(BaseModel):
     section: str | None = Field(..., description="Le titre de la section contenant le chunck")
 
 class Chunk(BaseModel):
+    id: str | None = Field(None, description="Identifiant du chunk dans la base vectorielle")
     text: str = Field(..., description="Chunk au format texte")
     metadata: ChunkMetada = Field(..., description="Les metada du chunk")
 
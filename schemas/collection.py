@@ -48,6 +48,13 @@ class CollectionModel(BaseModel):
     description: str | None = Field(..., description="Description du contenu de la collection")
     creator: UserOut = Field(..., description="Créateur de la collection")
     date_creation: datetime = Field(..., description="Date de création de la collection")
+    vector_collection: str | None = Field(None, description="Collection Chroma courante (réindexation)")
+    version: int | None = Field(None, description="Version du contenu indexé de la collection")
+
+    @property
+    def vector_name(self) -> str:
+        """Nom de la collection Chroma contenant les chunks de la collection"""
+        return self.vector_collection or self.name
 
     class Config:
         from_attributes = True
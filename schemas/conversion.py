@@ -2,8 +2,31 @@ from pathlib import Path
 from pydantic import BaseModel, Field
 from docling_core.types.doc.document import DoclingDocument
 
+from core.config import settings
+
 class ConvertPdfResponse(BaseModel):
     """Réponse conversion d'un fichier PDF"""
     document: DoclingDocument = Field(..., description="Contenu du document au format docling")
     markdown: Path = Field(..., description="Nom du ficher markdown")
-    conversion_time: float = Field(..., description="Temps de conversion du fichier")
\ No newline at end of file
+    conversion_time: float = Field(..., description="Temps de conversion du fichier")
+
+class ImportedFile(BaseModel):
+    """Fichier uploadé enregistré sur le serveur"""
+    path: Path = Field(..., description="Chemin du fichier enregistré")
+    md5: str = Field(..., description="Hash MD5 du fichier")
+    sha256: str = Field(..., description="Hash SHA-256 du fichier")
+    size: int = Field(..., description="Taille du fichier en octets")
+    mime: str = Field(..., description="Type MIME détecté")
+
+class ConverterOptions(BaseModel):
+    """Options des pipelines de conversion Docling (clef du cache des convertisseurs)"""
+    do_ocr: bool = Field(False, description="Activation de l'OCR")
+    images_scale: float = Field(settings.IMAGE_RESOLUTION_SCALE, description="Résolution des images générées")
+    generate_picture_images: bool = Field(True, description="Génération des images des figures")
+    do_table_structure: bool = Field(True, description="Reconnaissance de la structure des tableaux")
+    table_mode: str = Field("accurate", description="Mode TableFormer (accurate ou fast)")
+    num_threads: int = Field(4, description="Nombre de threads des modèles")
+    device: str = Field("auto", description="Accélérateur utilisé (auto, cpu, cuda, mps)")
+
+    class Config:
+        frozen = True
@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel, Field
 from datetime import datetime
 
@@ -19,4 +21,30 @@ class DocumentModel(BaseModel):
     is_indexed: bool = Field(..., description="Etat d'indexation du fichier")
     
     class Config:
-        from_attributes = True 
\ No newline at end of file
+        from_attributes = True
+
+class DocumentHash(BaseModel):
+    """Empreinte d'un fichier à vérifier avant upload (md5 ou sha256 requis)"""
+    filename: str | None = Field(None, description="Nom du fichier (renvoyé tel quel dans la réponse)")
+    md5: str | None = Field(None, description="Hash MD5 du fichier")
+    sha256: str | None = Field(None, description="Hash SHA-256 du fichier")
+    size: int | None = Field(None, description="Taille du fichier en octets")
+
+class DuplicateCheckRequest(BaseModel):
+    """Vérification de la présence de fichiers dans une collection avant upload"""
+    collection_name: str = Field(..., description="Nom de la collection")
+    files: List[DocumentHash] = Field(..., min_length=1, max_length=1000, description="Fichiers à vérifier")
+
+class DuplicateCheckResult(BaseModel):
+    """Résultat de la vérification d'un fichier"""
+    filename: str | None = Field(None, description="Nom du fichier")
+    md5: str | None = Field(None, description="Hash MD5 du fichier")
+    sha256: str | None = Field(None, description="Hash SHA-256 du fichier")
+    exists: bool = Field(..., description="Fichier déjà présent dans la collection")
+    document_id: str | None = Field(None, description="Identifiant du document existant")
+    is_indexed: bool = Field(False, description="Etat d'indexation du document existant")
+
+class DuplicateCheckResponse(BaseModel):
+    """Réponse à la vérification de fichiers avant upload"""
+    results: List[DuplicateCheckResult] = Field(..., description="Résultat par fichier, dans l'ordre de la requête")
+    existing: int = Field(..., description="Nombre de fichiers déjà présents")
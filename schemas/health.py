@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List
 
 from schemas.schema import Model
@@ -17,3 +17,14 @@ class HealthResponse(BaseModel):
     sqlite: bool
     chromadb: bool
     ollama: OllamaHealth
+
+
+class EmbeddingCacheStats(BaseModel):
+    """Modèle statistiques du cache des embeddings"""
+    enabled: bool = Field(..., description="Cache activé")
+    entries: int = Field(..., description="Nombre d'embeddings en cache")
+    max_entries: int = Field(..., description="Nombre maximum d'embeddings en cache")
+    hits: int = Field(..., description="Nombre de chunks trouvés dans le cache")
+    misses: int = Field(..., description="Nombre de chunks absents du cache")
+    evictions: int = Field(..., description="Nombre d'embeddings supprimés du cache")
+    hit_rate: float = Field(..., description="Taux de succès du cache")
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from pydantic import BaseModel, Field
 from datetime import datetime
@@ -29,6 +29,51 @@ class JobOut(BaseModel):
     error_message: str  | None= Field(..., description="Description de l'erreur de traitement")
     created_at: datetime = Field(..., description="Date de début du traitement")
     finished_at: datetime | None = Field(..., description="Date de fin du traitement")
+    parent_id: str | None = Field(None, description="Job parent (insertion par lot)")
+    page_count: int | None = Field(None, description="Nombre de pages du document inséré")
+    started_at: datetime | None = Field(None, description="Date de début de la dernière tentative")
 
     class Config:
         from_attributes = True
+
+class JobTokenOut(BaseModel):
+    """Tokens de la réponse en cours de génération d'un job de requête"""
+    event: Literal["token"] = Field("token", description="Type de message (distingue les tokens des mises à jour de job)")
+    job_id: str = Field(..., description="ID du job de requête")
+    index: int = Field(..., description="Numéro d'ordre du message dans la génération")
+    delta: str = Field("", description="Texte généré depuis le message précédent")
+    done: bool = Field(False, description="Fin de la génération")
+
+class WorkerStatus(BaseModel):
+    """État d'un worker du gestionnaire de jobs"""
+    worker_id: int = Field(..., description="Identifiant du worker")
+    lanes: List[str] = Field(default_factory=list, description="Files de priorité consommées par le worker")
+    lane: Optional[str] = Field(None, description="File de priorité du job en cours")
+    state: str = Field("idle", description="Etat du worker (idle ou busy)")
+    job_id: Optional[str] = Field(None, description="Identifiant du job en cours")
+    job_type: Optional[str] = Field(None, description="Type du job en cours")
+    started_at: Optional[datetime] = Field(None, description="Date de début du job en cours")
+    processed: int = Field(0, description="Nombre de jobs traités")
+    failed: int = Field(0, description="Nombre de jobs en erreur")
+
+class LaneStatus(BaseModel):
+    """Statistiques d'une file de priorité du gestionnaire de jobs"""
+    lane: str = Field(..., description="Nom de la file de priorité")
+    depth: int = Field(0, description="Nombre de jobs en attente")
+    submitted: int = Field(0, description="Nombre de jobs soumis")
+    started: int = Field(0, description="Nombre de jobs démarrés")
+    total_wait: float = Field(0.0, description="Temps d'attente cumulé en secondes")
+    avg_wait: float = Field(0.0, description="Temps d'attente moyen en secondes")
+    max_wait: float = Field(0.0, description="Temps d'attente maximal en secondes")
+    oldest_wait: float = Field(0.0, description="Temps d'attente du plus ancien job en attente")
+
+class JobRunnerStatus(BaseModel):
+    """État du gestionnaire de jobs"""
+    running: bool = Field(..., description="Workers démarrés")
+    accepting: bool = Field(..., description="Acceptation de nouveaux jobs")
+    max_workers: int = Field(..., description="Nombre de workers")
+    reserved_query_workers: int = Field(..., description="Nombre de workers réservés aux requêtes")
+    busy_workers: int = Field(..., description="Nombre de workers occupés")
+    queue_size: int = Field(..., description="Nombre de jobs en attente")
+    lanes: List[LaneStatus] = Field(default_factory=list, description="Etat de chaque file de priorité")
+    workers: List[WorkerStatus] = Field(default_factory=list, description="Etat de chaque worker")
@@ -16,6 +16,18 @@ class JobResponse(BaseModel):
     """Réponse insertion d'un nouveau job"""
     job_id: str = Field(..., description="Identifiant du job d'insertion")
 
+class BatchFileRejected(BaseModel):
+    """Fichier refusé d'une insertion par lot"""
+    filename: str = Field(..., description="Nom du fichier")
+    reason: str = Field(..., description="Motif du refus")
+
+class BatchJobResponse(BaseModel):
+    """Réponse insertion d'un lot de fichiers"""
+    job_id: str = Field(..., description="Identifiant du job parent du lot")
+    accepted: int = Field(..., description="Nombre de fichiers mis en attente d'insertion")
+    duplicates: list[str] = Field(default_factory=list, description="Fichiers déjà présents dans la collection")
+    rejected: list[BatchFileRejected] = Field(default_factory=list, description="Fichiers refusés")
+
 class JobCleaningResponse(BaseModel):
     """Réponse après nettoyage des anciens jobs"""
     message: str = Field(..., description="Message de confirmation du nettoyage")
@@ -0,0 +1,30 @@
+from datetime import datetime
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from core.config import settings
+
+class UploadSessionCreate(BaseModel):
+    """Modèle de création d'une session d'upload"""
+    filename: str = Field(..., description="Nom du fichier à uploader (PDF ou DOCX)")
+    size: int = Field(..., gt=0, le=settings.UPLOAD_MAX_SIZE, description="Taille totale du fichier en octets")
+    collection_name: str = Field(..., description="Collection dans laquelle insérer le document")
+
+class UploadChunkOut(BaseModel):
+    """Morceau de fichier reçu"""
+    start: int = Field(..., description="Premier octet du morceau")
+    end: int = Field(..., description="Dernier octet du morceau (inclus)")
+    sha256: str = Field(..., description="Checksum SHA-256 du morceau")
+
+class UploadSessionOut(BaseModel):
+    """Modèle session d'upload pour réponse API"""
+    id: str = Field(..., description="Identifiant de la session d'upload")
+    filename: str = Field(..., description="Nom du fichier")
+    size: int = Field(..., description="Taille totale du fichier en octets")
+    status: str = Field(..., description="Statut de la session (open, committed)")
+    ranges: List[List[int]] = Field(default_factory=list, description="Plages d'octets reçues [début, fin]")
+    chunks: List[UploadChunkOut] = Field(default_factory=list, description="Morceaux reçus")
+    received: int = Field(..., description="Nombre d'octets reçus")
+    job_id: str | None = Field(None, description="Job d'insertion créé à la finalisation")
+    expires_at: datetime = Field(..., description="Date d'expiration de la session")
@@ -1,26 +1,51 @@
 from .chunking_service import ChunkingService
 from .db_vectorielle_service import DbVectorielleService
+from .embedding_cache import EmbeddingCache
+from .answer_cache_service import AnswerCacheService
 from .llm_service import LlmService
+from .async_llm_service import AsyncLlmService
 from .collection_service import CollectionService
 from .health_service import HealthService
 from .conversion_service import ConversionService
+from .conversion_pool import ConversionPool
 from .user_service import UserService
 from .job_runner import JobRunner
 from .job_service import JobService
 from .user_websocket_manager import UserWebSocketManager
 from .insertion_service import InsertionService
+from .job_checkpoint import JobCheckpoint
+from .ingestion_pipeline import IngestionPipeline
+from .upload_service import UploadService
+from .batch_service import BatchService
+from .reindex_service import ReindexService
+from .job_events import JobEventPublisher, JobEventRelay
+from .job_token_stream import JobTokenStream
+from .rag_service import RagService
 
 
 __all__ = [
     "ChunkingService", 
     "ConversionService",
+    "ConversionPool",
     "DbVectorielleService",
+    "EmbeddingCache",
+    "AnswerCacheService",
     "HealthService",
     "LlmService",
+    "AsyncLlmService",
     "CollectionService",
     "UserService",
     "JobService",
     "JobRunner",
     "UserWebSocketManager",
-    "InsertionService"
+    "InsertionService",
+    "JobCheckpoint",
+    "IngestionPipeline",
+    "UploadService",
+    "BatchService",
+    "ReindexService",
+    "JobEventPublisher",
+    "JobEventRelay",
+    "JobTokenStream",
+    "RagService"
 ]
\ No newline at end of file
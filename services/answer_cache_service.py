@@ -0,0 +1,128 @@
+import math
+import uuid
+from array import array
+from typing import List
+
+from ollama import GenerateResponse
+
+from core.config import settings
+from db.models import AnswerCacheEntry
+from dependencies.sqlite_session import SessionLocalSync
+from repositories import answer_cache_repository
+
+class AnswerCacheService:
+    """Cache sémantique des réponses aux requêtes d'une collection
+
+    Une réponse est réutilisée pour une question dont l'embedding est proche (similarité cosinus
+    supérieure à ANSWER_CACHE_THRESHOLD) d'une question déjà posée sur la même collection avec le
+    même modèle. Les entrées sont liées à la version de la collection, incrémentée à chaque
+    insertion ou réindexation : une modification des documents invalide les réponses en cache.
+    Fonctions bloquantes, à exécuter hors de la boucle d'évènements.
+    """
+
+    @staticmethod
+    def enabled() -> bool:
+        return settings.ANSWER_CACHE_MAX_ENTRIES > 0
+
+    @staticmethod
+    def normalize(embedding: List[float]) -> array:
+        """Embedding normalisé (norme 1), la similarité cosinus devenant un produit scalaire
+
+        Args:
+            embedding (List[float]): embedding de la question
+
+        Returns:
+            array: embedding normalisé (float32)
+        """
+        norm = math.sqrt(sum(value * value for value in embedding)) or 1.0
+        return array("f", (value / norm for value in embedding))
+
+    @staticmethod
+    def lookup(
+        collection_id: str,
+        collection_version: int,
+        model: str,
+        embedding: List[float]
+    ) -> GenerateResponse | None:
+        """Recherche d'une réponse à une question proche
+
+        Args:
+            collection_id (str): identifiant de la collection
+            collection_version (int): version courante de la collection
+            model (str): modèle de génération
+            embedding (List[float]): embedding de la question
+
+        Returns:
+            GenerateResponse | None: réponse en cache, None si aucune question n'est assez proche
+        """
+        query = AnswerCacheService.normalize(embedding)
+        with SessionLocalSync() as session:
+            best: AnswerCacheEntry | None = None
+            best_score = settings.ANSWER_CACHE_THRESHOLD
+            for entry in answer_cache_repository.list_entries(
+                session=session,
+                collection_id=collection_id,
+                collection_version=collection_version,
+                model=model,
+                limit=settings.ANSWER_CACHE_MAX_ENTRIES
+            ):
+                vector = array("f")
+                vector.frombytes(entry.embedding)
+                if len(vector) != len(query):
+                    continue
+                score = sum(a * b for a, b in zip(query, vector))
+                if score >= best_score:
+                    best, best_score = entry, score
+            if best is None:
+                return None
+            answer_cache_repository.record_hit(session=session, entry=best)
+            return GenerateResponse.model_validate(best.response)
+
+    @staticmethod
+    def store(
+        collection_id: str,
+        collection_version: int,
+        model: str,
+        question: str,
+        embedding: List[float],
+        response: GenerateResponse
+    ):
+        """Enregistrement de la réponse générée pour une question
+
+        Les entrées des versions précédentes de la collection sont supprimées et le nombre d'entrées
+        de la collection est limité à ANSWER_CACHE_MAX_ENTRIES. La réponse n'est pas enregistrée si
+        la collection a été modifiée (ou supprimée) pendant la génération.
+
+        Args:
+            collection_id (str): identifiant de la collection
+            collection_version (int): version de la collection lors de la génération
+            model (str): modèle de génération
+            question (str): question posée
+            embedding (List[float]): embedding de la question
+            response (GenerateResponse): réponse générée
+        """
+        with SessionLocalSync() as session:
+            if answer_cache_repository.get_collection_version(session=session, collection_id=collection_id) != collection_version:
+                return
+            answer_cache_repository.delete_stale_entries(
+                session=session,
+                collection_id=collection_id,
+                collection_version=collection_version
+            )
+            answer_cache_repository.add_entry(
+                session=session,
+                entry=AnswerCacheEntry(
+                    id=str(uuid.uuid4()),
+                    collection_id=collection_id,
+                    collection_version=collection_version,
+                    model=model,
+                    question=question,
+                    embedding=AnswerCacheService.normalize(embedding).tobytes(),
+                    response=response.model_dump(mode="json")
+                )
+            )
+            answer_cache_repository.trim_entries(
+                session=session,
+                collection_id=collection_id,
+                keep=settings.ANSWER_CACHE_MAX_ENTRIES
+            )
@@ -0,0 +1,171 @@
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+from chromadb import Metadata
+from ollama import AsyncClient, GenerateResponse
+
+from core.config import settings
+from core.exceptions import OllamaError
+from schemas import Model
+from .llm_service import LlmService
+
+# Réception d'un token généré
+TokenCallback = Callable[[str], Awaitable[None]]
+
+class AsyncLlmService:
+    """Service asynchrone pour l'interrogation du LLM
+
+    Mêmes prompts que LlmService, les requêtes à Ollama étant attendues sans bloquer la boucle
+    d'évènements (routes HTTP et websockets restent disponibles pendant les générations).
+    """
+
+    _shared: "AsyncLlmService | None" = None
+    _clients: Dict[str, AsyncClient] = {}
+
+    def __init__(self, llm_client: AsyncClient | None = None):
+        self.llm_client = llm_client or AsyncLlmService.shared_client()
+
+    @classmethod
+    def shared_client(cls, host: str = settings.OLLAMA_URL) -> AsyncClient:
+        """Client Ollama asynchrone partagé par le processus (connexions persistantes)
+
+        Args:
+            host (str, optional): url du serveur Ollama. Defaults to settings.OLLAMA_URL.
+
+        Returns:
+            AsyncClient: client Ollama asynchrone
+        """
+        if host not in cls._clients:
+            cls._clients[host] = AsyncClient(
+                host=host,
+                limits=httpx.Limits(
+                    max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                    keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY
+                )
+            )
+        return cls._clients[host]
+
+    @classmethod
+    def shared(cls) -> "AsyncLlmService":
+        """Service LLM asynchrone partagé par le processus
+
+        Returns:
+            AsyncLlmService: service LLM asynchrone
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    async def vectordb_query(self, query: str, model: str = settings.LLM_MODEL) -> str:
+        """Restructuration de la requête pour interrogation de la base de données vectorielle
+
+        Args:
+            query (str): la requête à reformuler
+            model (str, optional): le modèle à utiliser. Defaults to settings.LLM_MODEL.
+
+        Raises:
+            OllamaError: Erreur lors de l'appel à Ollama
+
+        Returns:
+            str: la requête à appliquer pour effectuer la recherche vectorielle
+        """
+        try:
+            reponse = await self.llm_client.generate(
+                model=model,
+                prompt=LlmService.vectordb_query_prompt(query),
+                think=False,
+                options={"temperature": 0}
+            )
+            return reponse.response
+
+        except Exception as e:
+            raise OllamaError("Erreur Ollama lors de la création de la requête d'interrogation de la base vectorielle", str(e))
+
+    async def create_answer(
+            self,
+            docs: List[str],
+            metadatas: List[Metadata],
+            query: str,
+            model: str = settings.LLM_MODEL,
+            on_token: TokenCallback | None = None
+        ) -> GenerateResponse:
+        """Construction de la réponse à la demande à partir des données fournies par la base vectorielle
+
+        La réponse est générée en streaming : chaque token est transmis à `on_token` dès sa
+        réception, la réponse complète étant retournée à la fin de la génération.
+
+        Args:
+            docs (List[str]): la liste des chunks à insérer dans le contexte
+            metadatas (List[Metadata]): liste des metadatas liés au chunks
+            query (str): la requête de l'utilisateur
+            model (str, optional): le modèle à utiliser. Defaults to settings.LLM_MODEL.
+            on_token (TokenCallback | None, optional): réception des tokens générés. Defaults to None.
+
+        Raises:
+            OllamaError: Erreur lors de l'appel à Ollama
+
+        Returns:
+            GenerateResponse: la réponse fournie par le LLM (dernier message du flux, texte complet)
+        """
+        try:
+            stream = await self.llm_client.generate(
+                model=model,
+                prompt=LlmService.answer_prompt(docs=docs, metadatas=metadatas, query=query),
+                think=False,
+                options={"temperature": 0},
+                stream=True
+            )
+            parts: List[str] = []
+            last: GenerateResponse | None = None
+            async for part in stream:
+                last = part
+                if part.response:
+                    parts.append(part.response)
+                    if on_token is not None:
+                        await on_token(part.response)
+            if last is None:
+                raise OllamaError("Réponse vide du LLM", "aucun message reçu")
+            return last.model_copy(update={"response": "".join(parts)})
+
+        except Exception as e:
+            raise OllamaError("Erreur Ollama lors de la génération de la réponse à la requête", str(e))
+
+    async def rerank_chunks_llm(self, query: str, chunks: list[str]) -> list[int]:
+        """Reranking des réponses (chunks) en fonction de leur pertinence
+
+        Args:
+            query (str): la requête initiale de l'utilisateur
+            chunks (list[str]): liste de chuncks à réordonner
+
+        Raises:
+            OllamaError: Erreur lors de l'appel à Ollama
+
+        Returns:
+            list[int]: la liste des chuncks réordonnées
+        """
+        try:
+            response = await self.llm_client.generate(
+                model=settings.LLM_MODEL,
+                prompt=LlmService.rerank_prompt(query=query, chunks=chunks),
+                options={"temperature": 0}
+            )
+            return LlmService.parse_ranking(response.response)
+
+        except Exception as e:
+            raise OllamaError("Erreur Ollama lors du reranking des chunks", str(e))
+
+    async def list_models(self) -> list[Model]:
+        """Récupération des modèles disponibles
+
+        Raises:
+            OllamaError: Erreur lors de la récupération des modèles Ollama
+
+        Returns:
+            list[Model]: Liste des modèles disponibles
+        """
+        try:
+            return LlmService.to_models(await self.llm_client.list())
+
+        except Exception as e:
+            raise OllamaError("Erreur Ollama lors de la récupération des modèles", str(e))
@@ -0,0 +1,327 @@
+import asyncio
+import shutil
+import uuid
+import zipfile
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import BinaryIO, List, Tuple
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.logging import logger
+from core.utility import delete_file
+from db.models import DocumentMetadata, Job
+from repositories import job_repository
+from repositories.collections_repository import CollectionRepository
+from schemas import BatchFileRejected, BatchJobResponse, CollectionModel, ImportedFile, JobOut
+from .conversion_service import ConversionService
+from .insertion_service import InsertionService
+from .job_runner import JobRunner
+from .reindex_service import ReindexService
+from .user_websocket_manager import UserWebSocketManager
+
+# Fichier du lot enregistré : (identifiant du document, nom d'origine, fichier importé)
+BatchItem = Tuple[str, str, ImportedFile]
+
+class BatchService:
+    """Service d'insertion d'un lot de fichiers (fichiers multiples ou archive ZIP)
+
+    Chaque fichier accepté donne un job d'insertion enfant d'un job parent unique, dont
+    l'avancement agrège celui des enfants (JobRunner._refresh_parent). Un fichier refusé ou
+    déjà présent dans la collection n'interrompt pas le traitement du lot.
+    """
+
+    @staticmethod
+    async def import_uploads(
+        files: List[UploadFile],
+        collection_name: str
+    ) -> Tuple[List[BatchItem], List[BatchFileRejected]]:
+        """Enregistrement et validation des fichiers envoyés
+
+        Args:
+            files (List[UploadFile]): fichiers envoyés
+            collection_name (str): nom de la collection d'insertion
+
+        Returns:
+            Tuple[List[BatchItem], List[BatchFileRejected]]: fichiers enregistrés et fichiers refusés
+        """
+        items: List[BatchItem] = []
+        rejected: List[BatchFileRejected] = []
+        for file in files:
+            filename = file.filename or "unknown"
+            doc_id = str(uuid.uuid4())
+            try:
+                imported_file = await ConversionService.save_imported_file(
+                    file=file,
+                    collection_name=collection_name,
+                    doc_id=doc_id
+                )
+                items.append((doc_id, filename, imported_file))
+            except HTTPException as he:
+                rejected.append(BatchFileRejected(filename=filename, reason=str(he.detail)))
+            except Exception as e:
+                logger.error(f"Erreur lors de l'enregistrement du fichier {filename} : {e}")
+                rejected.append(BatchFileRejected(filename=filename, reason="Erreur lors de l'enregistrement du fichier"))
+        return items, rejected
+
+    @staticmethod
+    def import_archive(
+        archive: BinaryIO,
+        collection_name: str
+    ) -> Tuple[List[BatchItem], List[BatchFileRejected]]:
+        """Extraction et validation des fichiers d'une archive ZIP
+
+        Seul le nom des fichiers est conservé (les répertoires de l'archive sont ignorés). Le nombre
+        de fichiers et la taille décompressée de l'archive sont contrôlés avant extraction.
+        Fonction bloquante, à exécuter hors de la boucle d'évènements.
+
+        Args:
+            archive (BinaryIO): contenu de l'archive
+            collection_name (str): nom de la collection d'insertion
+
+        Raises:
+            HTTPException: archive invalide, trop de fichiers ou trop volumineuse
+
+        Returns:
+            Tuple[List[BatchItem], List[BatchFileRejected]]: fichiers enregistrés et fichiers refusés
+        """
+        items: List[BatchItem] = []
+        rejected: List[BatchFileRejected] = []
+        try:
+            zf = zipfile.ZipFile(archive)
+        except zipfile.BadZipFile:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Archive ZIP invalide"
+            )
+        with zf:
+            members = [
+                member for member in zf.infolist()
+                if not member.is_dir()
+                and "__MACOSX" not in PurePosixPath(member.filename).parts
+                and not PurePosixPath(member.filename).name.startswith(".")
+            ]
+            if len(members) > settings.BATCH_MAX_FILES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"L'archive contient plus de {settings.BATCH_MAX_FILES} fichiers"
+                )
+            if sum(member.file_size for member in members) > settings.BATCH_MAX_ARCHIVE_SIZE:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail="Archive trop volumineuse une fois décompressée"
+                )
+
+            upload_dir = Path(settings.UPLOAD_DIR)
+            upload_dir.mkdir(parents=True, exist_ok=True)
+            for member in members:
+                filename = PurePosixPath(member.filename).name
+                doc_id = str(uuid.uuid4())
+                part_path = upload_dir / f"{doc_id}.part"
+                try:
+                    with zf.open(member) as src, open(part_path, "wb") as dst:
+                        shutil.copyfileobj(src, dst, settings.UPLOAD_CHUNK_SIZE)
+                    imported_file = ConversionService.import_local_file(
+                        source=part_path,
+                        filename=filename,
+                        collection_name=collection_name,
+                        doc_id=doc_id
+                    )
+                    items.append((doc_id, filename, imported_file))
+                except HTTPException as he:
+                    rejected.append(BatchFileRejected(filename=filename, reason=str(he.detail)))
+                except Exception as e:
+                    logger.error(f"Erreur lors de l'extraction du fichier {member.filename} : {e}")
+                    rejected.append(BatchFileRejected(filename=filename, reason="Erreur lors de l'extraction du fichier"))
+                finally:
+                    part_path.unlink(missing_ok=True)
+        return items, rejected
+
+    @staticmethod
+    def remove_duplicates(
+        session: Session,
+        collection_id: str,
+        items: List[BatchItem]
+    ) -> Tuple[List[BatchItem], List[str]]:
+        """Retrait des fichiers déjà présents dans la collection ou en double dans le lot
+
+        Args:
+            session (Session): session d'accès à la base de données
+            collection_id (str): identifiant de la collection
+            items (List[BatchItem]): fichiers enregistrés
+
+        Returns:
+            Tuple[List[BatchItem], List[str]]: fichiers à insérer et noms des doublons (supprimés du disque)
+        """
+        existing = CollectionRepository.find_documents_by_hashes(
+            session=session,
+            collection_id=collection_id,
+            md5s=[imported_file.md5 for _, _, imported_file in items],
+            sha256s=[]
+        )
+        seen = {document.md5 for document in existing}
+        accepted: List[BatchItem] = []
+        duplicates: List[str] = []
+        for item in items:
+            _, filename, imported_file = item
+            if imported_file.md5 in seen:
+                delete_file(file_path=imported_file.path)
+                duplicates.append(filename)
+                continue
+            seen.add(imported_file.md5)
+            accepted.append(item)
+        return accepted, duplicates
+
+    @staticmethod
+    async def submit_batch(
+        session: Session,
+        user_id: str,
+        collection: CollectionModel,
+        items: List[BatchItem],
+        user_ws_manager: UserWebSocketManager,
+        job_runner: JobRunner
+    ) -> str:
+        """Création du job parent, des documents et des jobs d'insertion d'un lot
+
+        Les documents et les jobs sont créés en une transaction chacun ; seul le job parent est
+        notifié à l'utilisateur.
+
+        Args:
+            session (Session): session d'accès à la base de données
+            user_id (str): identifiant de l'utilisateur créateur du lot
+            collection (CollectionModel): collection d'insertion
+            items (List[BatchItem]): fichiers à insérer
+            user_ws_manager (UserWebSocketManager): manager des sockets utilisateurs
+            job_runner (JobRunner): service de gestion des tâches
+
+        Returns:
+            str: identifiant du job parent
+        """
+        parent = Job(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            type="batch",
+            status="processing" if items else "completed",
+            progress=f"0/{len(items)}",
+            payload={"collection": collection.model_dump(mode="json"), "total": len(items)},
+            finished_at=None if items else datetime.now()
+        )
+        now = datetime.now()
+        CollectionRepository.add_documents(
+            session=session,
+            documents=[
+                DocumentMetadata(
+                    id=doc_id,
+                    filename=filename,
+                    collection_id=collection.id,
+                    inserted_by=user_id,
+                    date_insertion=now,
+                    md5=imported_file.md5,
+                    sha256=imported_file.sha256,
+                    size=imported_file.size
+                )
+                for doc_id, filename, imported_file in items
+            ]
+        )
+        children = [
+            Job(
+                id=str(uuid.uuid4()),
+                user_id=user_id,
+                type="insertion",
+                parent_id=parent.id,
+                payload=InsertionService.insertion_payload(
+                    collection=collection,
+                    imported_file=imported_file,
+                    filename=filename,
+                    doc_id=doc_id
+                )
+            )
+            for doc_id, filename, imported_file in items
+        ]
+        job_repository.create_jobs(session=session, jobs=[parent, *children])
+        await user_ws_manager.send_to_user(
+            user_id=user_id,
+            data=JobOut.model_validate(parent)
+        )
+        for child in children:
+            await job_runner.submit(job_id=child.id, job_type="insertion")
+        return parent.id
+
+    @staticmethod
+    async def insert_batch(
+        session: Session,
+        user_id: str,
+        collection: CollectionModel,
+        files: List[UploadFile],
+        user_ws_manager: UserWebSocketManager,
+        job_runner: JobRunner
+    ) -> BatchJobResponse:
+        """Insertion d'un lot de fichiers, les archives ZIP étant extraites
+
+        Args:
+            session (Session): session d'accès à la base de données
+            user_id (str): identifiant de l'utilisateur créateur du lot
+            collection (CollectionModel): collection d'insertion
+            files (List[UploadFile]): fichiers et archives ZIP envoyés
+            user_ws_manager (UserWebSocketManager): manager des sockets utilisateurs
+            job_runner (JobRunner): service de gestion des tâches
+
+        Raises:
+            HTTPException: collection en cours de réindexation, lot trop important ou archive invalide
+
+        Returns:
+            BatchJobResponse: job parent, nombre de fichiers acceptés, doublons et fichiers refusés
+        """
+        ReindexService.check_not_reindexing(session=session, collection_id=collection.id)
+        archives = [file for file in files if (file.filename or "").lower().endswith(".zip")]
+        documents = [file for file in files if file not in archives]
+        if len(documents) > settings.BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Le lot contient plus de {settings.BATCH_MAX_FILES} fichiers"
+            )
+
+        items, rejected = await BatchService.import_uploads(files=documents, collection_name=collection.name)
+        try:
+            for archive in archives:
+                archive_items, archive_rejected = await asyncio.to_thread(
+                    BatchService.import_archive,
+                    archive=archive.file,
+                    collection_name=collection.name
+                )
+                items.extend(archive_items)
+                rejected.extend(archive_rejected)
+            if len(items) > settings.BATCH_MAX_FILES:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"Le lot contient plus de {settings.BATCH_MAX_FILES} fichiers"
+                )
+        except Exception:
+            for _, _, imported_file in items:
+                delete_file(file_path=imported_file.path)
+            raise
+
+        items, duplicates = BatchService.remove_duplicates(
+            session=session,
+            collection_id=collection.id,
+            items=items
+        )
+        job_id = await BatchService.submit_batch(
+            session=session,
+            user_id=user_id,
+            collection=collection,
+            items=items,
+            user_ws_manager=user_ws_manager,
+            job_runner=job_runner
+        )
+        logger.info(
+            f"Lot {job_id} : {len(items)} fichiers acceptés, {len(duplicates)} doublons, {len(rejected)} refusés"
+        )
+        return BatchJobResponse(
+            job_id=job_id,
+            accepted=len(items),
+            duplicates=duplicates,
+            rejected=rejected
+        )
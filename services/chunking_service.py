@@ -1,5 +1,6 @@
+import threading
 import time
-from typing import List, Set
+from typing import List, Set, Type
 
 from docling_core.transforms.chunker.hybrid_chunker import HybridChunker
 from docling_core.transforms.chunker.base import BaseChunk
@@ -12,7 +13,9 @@ from docling_core.transforms.chunker.hierarchical_chunker import (
 )
 from transformers import AutoTokenizer
 
+from core.config import settings
 from core.exceptions import RAGException
+from core.logging import logger
 from schemas import ChunkMetada, Chunk, ChunkingResponse
 
 class MDTableSerializerProvider(ChunkingSerializerProvider):
@@ -22,18 +25,93 @@ class MDTableSerializerProvider(ChunkingSerializerProvider):
             table_serializer=MarkdownTableSerializer(),  # configuring a different table serializer
         )
 
+# Cache des chunkers par thread et par (modèle du tokenizer, nombre max de tokens, sérialiseur) :
+# un tokenizer HuggingFace rapide ne peut pas être utilisé par deux threads à la fois
+# (RuntimeError: Already borrowed), le chunking étant exécuté dans les threads de asyncio.to_thread
+_chunkers = threading.local()
+
 class ChunkingService:
     """Service pour la gestion des chunks"""
 
     def __init__(self, filename: str) -> None:
         self.filename = filename
+
+    @staticmethod
+    def load_tokenizer(model_id: str):
+        """Chargement d'un tokenizer HuggingFace depuis le cache local
+
+        Le tokenizer n'est téléchargé que s'il est absent du cache et que HF_OFFLINE est désactivé.
+
+        Args:
+            model_id (str): identifiant du modèle HuggingFace
+
+        Returns:
+            PreTrainedTokenizerBase: tokenizer
+        """
+        try:
+            return AutoTokenizer.from_pretrained(
+                model_id,
+                cache_dir=settings.HF_CACHE_DIR,
+                local_files_only=True
+            )
+        except OSError:
+            if settings.HF_OFFLINE:
+                raise
+            logger.info(f"Tokenizer {model_id} absent du cache local, téléchargement")
+            return AutoTokenizer.from_pretrained(model_id, cache_dir=settings.HF_CACHE_DIR)
+
+    @staticmethod
+    def get_chunker(
+        model_id: str = settings.CHUNK_TOKENIZER_MODEL,
+        max_tokens: int = settings.CHUNK_MAX_TOKENS,
+        serializer_provider: Type[ChunkingSerializerProvider] = MDTableSerializerProvider
+    ) -> HybridChunker:
+        """Chunker Docling du thread courant, créé une seule fois par thread et par configuration
+
+        Args:
+            model_id (str, optional): modèle du tokenizer. Defaults to settings.CHUNK_TOKENIZER_MODEL.
+            max_tokens (int, optional): taille maximale d'un chunk en tokens. Defaults to settings.CHUNK_MAX_TOKENS.
+            serializer_provider (Type[ChunkingSerializerProvider], optional): sérialiseur des éléments. Defaults to MDTableSerializerProvider.
+
+        Returns:
+            HybridChunker: chunker Docling
+        """
+        key = (model_id, max_tokens, serializer_provider.__qualname__)
+        cache: dict[tuple[str, int, str], HybridChunker] | None = getattr(_chunkers, "cache", None)
+        if cache is None:
+            cache = _chunkers.cache = {}
+        chunker = cache.get(key)
+        if chunker is None:
+            tokenizer = HuggingFaceTokenizer(
+                tokenizer=ChunkingService.load_tokenizer(model_id),
+                max_tokens=max_tokens,  # optional, by default derived from `tokenizer` for HF case
+            )
+            chunker = HybridChunker(
+                tokenizer=tokenizer,
+                serializer_provider=serializer_provider(),
+                merge_peers=True,  # optional, defaults to True
+                always_emit_headings=True,
+            )
+            cache[key] = chunker
+        return chunker
+
+    @staticmethod
+    def warmup():
+        """Chargement du tokenizer (fichiers mis en cache) et du chunker par défaut du thread courant"""
+        ChunkingService.get_chunker()
     
-    def __docling_chunk_to_db_chunk(self, chunk: BaseChunk, document_id: str) -> Chunk:
+    def __docling_chunk_to_db_chunk(
+        self,
+        chunk: BaseChunk,
+        document_id: str,
+        default_section: str | None = None
+    ) -> Chunk:
         """Transforme un chunk Docling en payload avec metadonnées
         (texte + metadonnées enrichies)
 
         Args:
             chunk (BaseChunk): le chunk Docling à traiter
+            default_section (str | None, optional): section attribuée à un chunk sans titre. Defaults to None.
 
         Raises:
             Exception: 500 - errreur lors de l'éxécution de la fonction
@@ -55,6 +133,8 @@ class ChunkingService:
                     section = head.text if hasattr(head, "text") else head
                     sections.add(section)
             full_section_path = ">".join(sections)
+            if not full_section_path and default_section:
+                full_section_path = default_section
 
             # Récupère les numéros de page
             pages: Set[int] = set()
@@ -77,11 +157,24 @@ class ChunkingService:
             raise RAGException("Erreur lors de la définition des metadonnées", str(e))
         
 
-    def basic_chunking(self, document: DoclingDocument, document_id: str) -> ChunkingResponse:
+    def basic_chunking(
+        self,
+        document: DoclingDocument,
+        document_id: str,
+        default_section: str | None = None,
+        id_prefix: str | None = None
+    ) -> ChunkingResponse:
         """Chunking du document Docling
 
+        Les chunks reçoivent un identifiant déterministe ({préfixe}-{rang}) : une nouvelle indexation
+        du même document remplace ses chunks au lieu de les dupliquer.
+
         Args:
             document (DoclingDocument): le document à chunker
+            default_section (str | None, optional): section des chunks précédant le premier titre,
+                utilisée pour prolonger la dernière section de la fenêtre de pages précédente. Defaults to None.
+            id_prefix (str | None, optional): préfixe des identifiants des chunks, identifiant du
+                document par défaut. Defaults to None.
  
         Raises:
             Exception: 500 - errreur lors de l'éxécution de la fonction
@@ -92,20 +185,7 @@ class ChunkingService:
 
         try:
             start_time = time.time()
-            EMBED_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
-            MAX_TOKENS = 512 
-
-            tokenizer = HuggingFaceTokenizer(
-                tokenizer=AutoTokenizer.from_pretrained(EMBED_MODEL_ID),
-                max_tokens=MAX_TOKENS,  # optional, by default derived from `tokenizer` for HF case
-            )
-            
-            chunker = HybridChunker(
-                tokenizer=tokenizer,
-                serializer_provider=MDTableSerializerProvider(),
-                merge_peers=True,  # optional, defaults to True
-                always_emit_headings=True,
-            )
+            chunker = ChunkingService.get_chunker()
             chunk_iter = chunker.chunk(dl_doc=document)
             chunks = list(chunk_iter)
 
@@ -114,8 +194,12 @@ class ChunkingService:
 
             for chunk in chunks:
                 if len(chunk.text.strip()):
-                    payload = self.__docling_chunk_to_db_chunk(chunk=chunk, document_id=document_id)
-
+                    payload = self.__docling_chunk_to_db_chunk(
+                        chunk=chunk,
+                        document_id=document_id,
+                        default_section=default_section
+                    )
+                    payload.id = f"{id_prefix or document_id}-{len(chunks_for_db)}"
                     chunks_for_db.append(payload)
 
             # Calcul du temps écoulé
@@ -128,4 +212,34 @@ class ChunkingService:
 
         except Exception as e:
             raise RAGException("Erreur chunking Docling", str(e))
-        
\ No newline at end of file
+
+    def chunk_documents(
+        self,
+        documents: List[DoclingDocument],
+        document_id: str
+    ) -> List[Chunk]:
+        """Chunking des fenêtres de pages successives d'un document
+
+        La dernière section d'une fenêtre est reportée sur les premiers chunks de la suivante.
+
+        Args:
+            documents (List[DoclingDocument]): fenêtres de pages du document, dans l'ordre
+            document_id (str): identifiant du document
+
+        Returns:
+            List[Chunk]: chunks du document
+        """
+        chunks: List[Chunk] = []
+        last_section: str | None = None
+        for index, document in enumerate(documents):
+            window_chunks = self.basic_chunking(
+                document=document,
+                document_id=document_id,
+                default_section=last_section,
+                id_prefix=f"{document_id}-s{index}" if len(documents) > 1 else None
+            ).chunks
+            if window_chunks:
+                last_section = window_chunks[-1].metadata.section or last_section
+            chunks.extend(window_chunks)
+        return chunks
+
@@ -7,6 +7,7 @@ from sqlalchemy.orm import Session
 from core.config import settings
 from schemas import CollectionFilters, CollectionListResponse, DocumentFilters, DocumentListResponse
 from services import DbVectorielleService
+from repositories import answer_cache_repository
 from repositories.collections_repository import CollectionRepository
 from db.models import CollectionMetadata
 
@@ -139,8 +140,8 @@ class CollectionService:
             raise ValueError("Collection not found")
 
         try:
-            # Supprimer côté Chroma
-            vector_session.delete_collection(collection_name=name)
+            # Supprimer côté Chroma (collection issue de la dernière réindexation le cas échéant)
+            vector_session.delete_collection(collection_name=collection.vector_collection or name)
 
             # Supprimer les documents session
             CollectionRepository.delete_documents(
@@ -148,6 +149,12 @@ class CollectionService:
                 collection_id=str(collection.id)
             )
 
+            # Supprimer les réponses en cache
+            answer_cache_repository.delete_collection_entries(
+                session=session,
+                collection_id=str(collection.id)
+            )
+
             # Supprimer la collection session
             CollectionRepository.delete_collection(
                 session=session,
@@ -0,0 +1,350 @@
+import asyncio
+import multiprocessing
+import time
+import weakref
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+from docling_core.types.doc.document import DoclingDocument
+
+from core.config import settings
+from core.exceptions import DocumentParsingError
+from core.logging import logger
+from schemas import Chunk, ConvertPdfResponse
+from .chunking_service import ChunkingService
+from .conversion_service import ConversionService
+
+# Suivi de la conversion : (pages converties, nombre total de pages)
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+
+def _init_worker():
+    """Initialisation d'un processus worker : chargement des modèles Docling"""
+    ConversionService.warmup()
+
+def _ping() -> bool:
+    """Tâche vide permettant de démarrer les processus workers"""
+    return True
+
+def _serialize(document: DoclingDocument) -> bytes:
+    """Sérialisation compacte d'un document Docling (JSON compressé)"""
+    return zlib.compress(document.model_dump_json().encode("utf-8"), level=1)
+
+def _deserialize(payload: bytes) -> DoclingDocument:
+    """Reconstruction d'un document Docling sérialisé par _serialize"""
+    return DoclingDocument.model_validate_json(zlib.decompress(payload))
+
+def _convert_in_worker(file_path: str, collection_name: str, doc_id: str) -> tuple[bytes, str, float]:
+    """Conversion d'un document dans un processus worker
+
+    Args:
+        file_path (str): chemin vers le fichier à convertir
+        collection_name (str): nom de la collection
+        doc_id (str): identifiant du document
+
+    Returns:
+        tuple[bytes, str, float]: document Docling (JSON compressé), fichier markdown et durée de conversion
+    """
+    result = ConversionService.convert_to_md(
+        file_path=file_path,
+        collection_name=collection_name,
+        doc_id=doc_id
+    )
+    return _serialize(result.document), str(result.markdown), result.conversion_time
+
+def _convert_shard_in_worker(file_path: str, page_range: tuple[int, int]) -> bytes:
+    """Conversion d'une plage de pages dans un processus worker
+
+    Args:
+        file_path (str): chemin vers le fichier PDF
+        page_range (tuple[int, int]): plage de pages à convertir
+
+    Returns:
+        bytes: document Docling de la plage (JSON compressé)
+    """
+    return _serialize(ConversionService.convert_document(file_path=file_path, page_range=page_range))
+
+def _rechunk_in_worker(collection_name: str, doc_id: str, filename: str) -> list[Chunk] | None:
+    """Chunking d'un document à partir de ses documents Docling enregistrés
+
+    Args:
+        collection_name (str): nom de la collection
+        doc_id (str): identifiant du document
+        filename (str): nom du fichier d'origine
+
+    Returns:
+        list[Chunk] | None: chunks du document, None si aucun document Docling n'est enregistré
+    """
+    documents = ConversionService.load_docling_documents(collection_name, doc_id)
+    if not documents:
+        return None
+    return ChunkingService(filename=filename).chunk_documents(documents=documents, document_id=doc_id)
+
+class ConversionPool:
+    """Pool de processus dédiés à la conversion Docling
+
+    Les modèles de mise en page et TableFormer sont chargés une fois par processus et restent en
+    mémoire : la conversion ne partage plus le GIL ni l'exécuteur par défaut avec l'API.
+    Les PDF d'au moins CONVERSION_SHARD_MIN_PAGES pages sont découpés en plages de pages converties
+    en parallèle par les différents processus puis fusionnées (le document est découpé en chunks
+    en entier). Les PDF dépassant le budget mémoire sont convertis par segments (convert_window)
+    dans le pipeline d'ingestion.
+    Avec CONVERSION_WORKERS=0, la conversion est exécutée dans un thread du processus courant.
+    """
+
+    _shared: "ConversionPool | None" = None
+
+    def __init__(self, size: int = settings.CONVERSION_WORKERS):
+        self.size = max(0, size)
+        self.executor: ProcessPoolExecutor | None = None
+        # Pools arrêtés après l'annulation d'une tâche en cours
+        self._recycled: "weakref.WeakSet[ProcessPoolExecutor]" = weakref.WeakSet()
+
+    @classmethod
+    def shared(cls) -> "ConversionPool":
+        """Pool de conversion partagé par le processus
+
+        Returns:
+            ConversionPool: pool de conversion
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    def start(self):
+        """Démarrage et préchauffage des processus de conversion"""
+        if self.executor is not None:
+            return
+        if self.size == 0:
+            # Conversion dans le processus courant : préchauffage du convertisseur local
+            ConversionService.warmup()
+            return
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.size,
+            mp_context=multiprocessing.get_context(settings.CONVERSION_START_METHOD),
+            initializer=_init_worker
+        )
+        # Les processus sont créés à la demande : une tâche vide par worker force leur démarrage
+        for _ in range(self.size):
+            self.executor.submit(_ping)
+        logger.info(f"Pool de conversion démarré avec {self.size} processus")
+
+    def shutdown(self):
+        """Arrêt des processus de conversion"""
+        if self.executor is None:
+            return
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.executor = None
+        logger.info("Pool de conversion arrêté")
+
+    async def _submit(self, func: Callable, *args: Any) -> Any:
+        """Exécution d'une fonction dans un processus du pool
+
+        Args:
+            func (Callable): fonction à exécuter (définie au niveau du module)
+            args (Any): arguments de la fonction
+
+        Une tâche annulée (délai du job dépassé) alors qu'elle est en cours d'exécution arrête les
+        processus du pool, recréé pour les tâches suivantes : la conversion abandonnée n'occupe pas
+        un processus pendant la nouvelle tentative du job. Les autres tâches interrompues par cet
+        arrêt sont soumises à nouveau.
+
+        Raises:
+            DocumentParsingError: arrêt brutal du processus de conversion
+
+        Returns:
+            Any: résultat de la fonction
+        """
+        while True:
+            self.start()
+            executor = self.executor
+            future = executor.submit(func, *args)
+            try:
+                return await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                if not future.cancel():
+                    self.recycle(executor)
+                raise
+            except BrokenProcessPool as e:
+                if executor in self._recycled:
+                    continue
+                # Processus tué (mémoire insuffisante...) : le pool est recréé pour les jobs suivants
+                logger.error(f"Pool de conversion interrompu : {e}")
+                if self.executor is executor:
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    self.executor = None
+                raise DocumentParsingError("Processus de conversion interrompu", str(e))
+
+    def recycle(self, executor: ProcessPoolExecutor):
+        """Arrêt des processus d'un pool dont une tâche en cours a été annulée
+
+        Args:
+            executor (ProcessPoolExecutor): pool exécutant la tâche annulée
+        """
+        if executor is not self.executor:
+            return
+        logger.warning("Conversion annulée en cours d'exécution : redémarrage des processus de conversion")
+        self._recycled.add(executor)
+        # ProcessPoolExecutor ne permet pas d'interrompre une tâche démarrée : ses processus sont arrêtés
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=False)
+        self.executor = None
+
+    async def convert(
+        self,
+        file_path: Path | str,
+        collection_name: str,
+        doc_id: str,
+        page_count: int | None = None,
+        on_progress: ProgressCallback | None = None
+    ) -> ConvertPdfResponse:
+        """Conversion d'un document dans les processus du pool
+
+        Args:
+            file_path (Path | str): chemin vers le fichier à convertir
+            collection_name (str): nom de la collection
+            doc_id (str): identifiant du document
+            page_count (int | None, optional): nombre de pages déjà calculé par l'appelant, lu dans le PDF s'il est absent. Defaults to None.
+            on_progress (ProgressCallback | None, optional): suivi des pages converties. Defaults to None.
+
+        Raises:
+            DocumentParsingError: erreur de conversion ou arrêt brutal du processus de conversion
+
+        Returns:
+            ConvertPdfResponse: document Docling, fichier markdown et durée de conversion
+        """
+        if self.size == 0:
+            return await asyncio.to_thread(
+                ConversionService.convert_to_md,
+                file_path=file_path,
+                collection_name=collection_name,
+                doc_id=doc_id
+            )
+
+        if page_count is None:
+            page_count = await asyncio.to_thread(ConversionService.page_count, file_path)
+        if self.size > 1 and page_count is not None and page_count >= settings.CONVERSION_SHARD_MIN_PAGES:
+            return await self.convert_sharded(
+                file_path=file_path,
+                collection_name=collection_name,
+                doc_id=doc_id,
+                page_count=page_count,
+                on_progress=on_progress
+            )
+
+        payload, md_filename, conversion_time = await self._submit(
+            _convert_in_worker,
+            str(file_path),
+            collection_name,
+            doc_id
+        )
+        document = await asyncio.to_thread(_deserialize, payload)
+        if on_progress is not None and page_count is not None:
+            await on_progress(page_count, page_count)
+        return ConvertPdfResponse(
+            document=document,
+            markdown=Path(md_filename),
+            conversion_time=conversion_time
+        )
+
+    async def convert_window(self, file_path: Path | str, page_range: tuple[int, int]) -> DoclingDocument:
+        """Conversion d'une fenêtre de pages (mode streaming)
+
+        Args:
+            file_path (Path | str): chemin vers le fichier PDF
+            page_range (tuple[int, int]): plage de pages à convertir
+
+        Raises:
+            DocumentParsingError: erreur de conversion ou arrêt brutal du processus de conversion
+
+        Returns:
+            DoclingDocument: document Docling de la fenêtre
+        """
+        if self.size == 0:
+            return await asyncio.to_thread(
+                ConversionService.convert_document,
+                file_path=file_path,
+                page_range=page_range
+            )
+        payload = await self._submit(_convert_shard_in_worker, str(file_path), page_range)
+        return await asyncio.to_thread(_deserialize, payload)
+
+    async def rechunk(self, collection_name: str, doc_id: str, filename: str) -> list[Chunk] | None:
+        """Chunking d'un document enregistré au format Docling, sans nouvelle conversion
+
+        Args:
+            collection_name (str): nom de la collection
+            doc_id (str): identifiant du document
+            filename (str): nom du fichier d'origine
+
+        Returns:
+            list[Chunk] | None: chunks du document, None si aucun document Docling n'est enregistré
+        """
+        if self.size == 0:
+            return await asyncio.to_thread(_rechunk_in_worker, collection_name, doc_id, filename)
+        return await self._submit(_rechunk_in_worker, collection_name, doc_id, filename)
+
+    async def convert_sharded(
+        self,
+        file_path: Path | str,
+        collection_name: str,
+        doc_id: str,
+        page_count: int,
+        on_progress: ProgressCallback | None = None
+    ) -> ConvertPdfResponse:
+        """Conversion parallèle d'un PDF découpé en plages de CONVERSION_SHARD_PAGES pages
+
+        Args:
+            file_path (Path | str): chemin vers le fichier PDF
+            collection_name (str): nom de la collection
+            doc_id (str): identifiant du document
+            page_count (int): nombre de pages du document
+            on_progress (ProgressCallback | None, optional): suivi des pages converties. Defaults to None.
+
+        Raises:
+            DocumentParsingError: erreur de conversion d'une plage de pages
+
+        Returns:
+            ConvertPdfResponse: document Docling fusionné, fichier markdown et durée de conversion
+        """
+        start_time = time.time()
+        page_ranges = ConversionService.page_ranges(page_count, settings.CONVERSION_SHARD_PAGES)
+        logger.info(f"Conversion de {file_path} en {len(page_ranges)} plages de pages")
+
+        async def convert_shard(index: int, page_range: tuple[int, int]) -> tuple[int, int, bytes]:
+            payload = await self._submit(_convert_shard_in_worker, str(file_path), page_range)
+            return index, page_range[1] - page_range[0] + 1, payload
+
+        payloads: list[bytes] = [b""] * len(page_ranges)
+        pages_done = 0
+        tasks = [asyncio.ensure_future(convert_shard(i, r)) for i, r in enumerate(page_ranges)]
+        try:
+            for next_shard in asyncio.as_completed(tasks):
+                index, pages, payload = await next_shard
+                payloads[index] = payload
+                pages_done += pages
+                if on_progress is not None:
+                    await on_progress(pages_done, page_count)
+        except BaseException:
+            # Abandon des plages restantes (celles déjà en cours dans un processus se terminent seules)
+            for task in tasks:
+                task.cancel()
+            raise
+
+        document = await asyncio.to_thread(
+            lambda: ConversionService.merge_documents([_deserialize(payload) for payload in payloads])
+        )
+        md_filename = await asyncio.to_thread(
+            ConversionService.save_converted_markdown,
+            convert_doc=document,
+            collection_name=collection_name,
+            doc_id=doc_id
+        )
+        return ConvertPdfResponse(
+            document=document,
+            markdown=md_filename,
+            conversion_time=time.time() - start_time
+        )
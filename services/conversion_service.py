@@ -1,6 +1,15 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import re
 import time
 import shutil
-from fastapi import UploadFile
+import threading
+from collections import OrderedDict
+from typing import Any, BinaryIO
+from fastapi import HTTPException, UploadFile, status
 from pathlib import Path
 from sqlalchemy.orm import Session
 
@@ -16,14 +25,34 @@ from docling.datamodel.pipeline_options import (
     TableFormerMode
 )
 from docling.document_converter import DocumentConverter, PdfFormatOption, WordFormatOption
+from pypdf import PdfReader
 
 
 from core.config import settings
 from core.exceptions import DocumentParsingError, RAGException
-from core.security import hash_file
-from schemas import ConvertPdfResponse
+from core.logging import logger
+from core.security import validate_file_head, validate_filename, validate_pdf
+from schemas import (
+    ConvertPdfResponse,
+    ConverterOptions,
+    DocumentHash,
+    DuplicateCheckResponse,
+    DuplicateCheckResult,
+    ImportedFile
+)
 from repositories.collections_repository import CollectionRepository
 
+# Cache des convertisseurs Docling du processus, par jeu d'options (ordre LRU)
+_converters: OrderedDict[ConverterOptions, DocumentConverter] = OrderedDict()
+_converters_lock = threading.Lock()
+# Conversions du processus : un DocumentConverter Docling n'est pas garanti utilisable par plusieurs
+# threads à la fois (CONVERSION_WORKERS=0, conversions dans les threads de asyncio.to_thread)
+_conversion_lock = threading.Lock()
+
+# Références internes d'un document Docling ("#/texts/12") à décaler lors d'une fusion
+_DOC_REF = re.compile(r"^#/(texts|tables|pictures|groups|key_value_items|form_items)/(\d+)$")
+_DOC_ITEM_LISTS = ("texts", "tables", "pictures", "groups", "key_value_items", "form_items")
+
 class ConversionService:
     """Service pour gérer l'envoi des fichiers pdf"""
     
@@ -31,47 +60,150 @@ class ConversionService:
     async def save_imported_file(
         file: UploadFile,
         collection_name: str,
-        doc_id: str
-    ) -> Path:
-        """Sauvegarde du fichier pdf
+        doc_id: str,
+        chunk_size: int = settings.UPLOAD_CHUNK_SIZE
+    ) -> ImportedFile:
+        """Sauvegarde et validation du fichier uploadé en une seule lecture
+
+        Le fichier est lu par blocs et écrit dans un fichier temporaire en calculant ses hash MD5 et SHA-256 ;
+        le type réel est contrôlé sur le premier bloc et la structure d'un PDF est vérifiée sur disque,
+        hors de la boucle d'évènements. Le fichier n'est renommé qu'une fois validé.
 
         Args:
             file (UploadFile): fichier à sauvegarder
             collection_name (str): nom de la base de connaissance d'insertion du fichier
+            doc_id (str): identifiant du document
+            chunk_size (int, optional): taille des blocs lus. Defaults to settings.UPLOAD_CHUNK_SIZE.
 
         Raises:
+            HTTPException: fichier refusé (nom, type ou PDF invalide)
             ValueError: Erreur lors de l'enregistrement du fichier
 
         Returns:
-            Path: chemin du fichier sauvegardé
+            ImportedFile: chemin, hash, taille et type du fichier sauvegardé
         """
+        filename = validate_filename(file.filename)
+        md_dir = Path(settings.STATIC_DIR) / collection_name
+        path = md_dir / f"{doc_id}.{filename.split('.')[-1].lower()}"
+        part_path = path.with_name(f"{path.name}.part")
         try:
             # Gestion du répertoires de stockage
-            md_dir = Path(settings.STATIC_DIR) / collection_name
             md_dir.mkdir(exist_ok=True)
 
+            md5 = hashlib.md5()
+            sha256 = hashlib.sha256()
+            size = 0
+            mime: str | None = None
+
+            def write_block(out: BinaryIO, block: bytes):
+                md5.update(block)
+                sha256.update(block)
+                out.write(block)
+
             # Enregistrement du fichier
-            if file.filename is None or not file.filename.lower().endswith((".pdf", ".docx")):
-                raise ValueError("Format de fichier non supporté. Seuls les fichiers PDF et DOCX sont autorisés.")
-            filename = f"{doc_id}.{file.filename.split('.')[-1]}"
-            path = md_dir / filename
-            pdf_bytes = await file.read()
-            with open(path, "wb") as f:
-                f.write(pdf_bytes)
-            return path
+            with open(part_path, "wb") as out:
+                while block := await file.read(chunk_size):
+                    if mime is None:
+                        mime = validate_file_head(block[:2048])
+                    await asyncio.to_thread(write_block, out, block)
+                    size += len(block)
+            if mime is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Le fichier est vide."
+                )
+            if mime == "application/pdf":
+                await asyncio.to_thread(validate_pdf, part_path)
+
+            part_path.replace(path)
+            return ImportedFile(
+                path=path,
+                md5=md5.hexdigest(),
+                sha256=sha256.hexdigest(),
+                size=size,
+                mime=mime
+            )
+        except HTTPException:
+            part_path.unlink(missing_ok=True)
+            raise
         except Exception as e:
+            part_path.unlink(missing_ok=True)
             raise ValueError(e)
         
+    @staticmethod
+    def import_local_file(
+        source: Path,
+        filename: str,
+        collection_name: str,
+        doc_id: str,
+        chunk_size: int = settings.UPLOAD_CHUNK_SIZE
+    ) -> ImportedFile:
+        """Validation et déplacement d'un fichier déjà présent sur le serveur dans la collection
+
+        Le fichier est lu une seule fois pour les hash MD5 et SHA-256, son type réel étant contrôlé sur le
+        premier bloc. Fonction bloquante, à exécuter hors de la boucle d'évènements.
+
+        Args:
+            source (Path): fichier à importer (déplacé en cas de succès)
+            filename (str): nom d'origine du fichier
+            collection_name (str): nom de la base de connaissance d'insertion du fichier
+            doc_id (str): identifiant du document
+            chunk_size (int, optional): taille des blocs lus. Defaults to settings.UPLOAD_CHUNK_SIZE.
+
+        Raises:
+            HTTPException: fichier refusé (nom, type ou PDF invalide)
+            ValueError: Erreur lors de l'import du fichier
+
+        Returns:
+            ImportedFile: chemin, hash, taille et type du fichier importé
+        """
+        filename = validate_filename(filename)
+        try:
+            md5 = hashlib.md5()
+            sha256 = hashlib.sha256()
+            size = 0
+            mime: str | None = None
+            with open(source, "rb") as f:
+                while block := f.read(chunk_size):
+                    if mime is None:
+                        mime = validate_file_head(block[:2048])
+                    md5.update(block)
+                    sha256.update(block)
+                    size += len(block)
+            if mime is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Le fichier est vide."
+                )
+            if mime == "application/pdf":
+                validate_pdf(source)
+
+            md_dir = Path(settings.STATIC_DIR) / collection_name
+            md_dir.mkdir(exist_ok=True)
+            path = md_dir / f"{doc_id}.{filename.split('.')[-1].lower()}"
+            shutil.move(source, path)
+            return ImportedFile(
+                path=path,
+                md5=md5.hexdigest(),
+                sha256=sha256.hexdigest(),
+                size=size,
+                mime=mime
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise ValueError(e)
+
     @staticmethod
     def check_md5(
-        file_path: Path,
+        md5: str,
         collection_id: str,
         session: Session
     ) -> bool:
         """Vérification de la présence du fichier dans la collection
 
         Args:
-            filepath (Path): chemin du fichier à vérifier
+            md5 (str): hash MD5 du fichier à vérifier
             collection_id (str): l'identifant de la collection
             session (Session): session d'accès à la base de données
 
@@ -82,7 +214,6 @@ class ConversionService:
             bool: présence du fichier
         """
         try:
-            md5 = hash_file(file_path=file_path)
             document = CollectionRepository.get_document_collection_by_md5(
                 session=session,
                 collection_id=collection_id,
@@ -92,13 +223,156 @@ class ConversionService:
         except Exception as e:
             raise ValueError(e)
         
+    @staticmethod
+    def check_duplicates(
+        session: Session,
+        collection_id: str,
+        files: list[DocumentHash]
+    ) -> DuplicateCheckResponse:
+        """Vérification de la présence de fichiers dans une collection à partir de leur hash, avant upload
+
+        Un fichier est présent si un document de la collection a le même hash MD5 ou SHA-256
+        et, lorsque les deux tailles sont connues, la même taille.
+
+        Args:
+            session (Session): session d'accès à la base de données
+            collection_id (str): identifiant de la collection
+            files (list[DocumentHash]): empreintes des fichiers à vérifier
+
+        Raises:
+            ValueError: empreinte sans hash
+
+        Returns:
+            DuplicateCheckResponse: résultat par fichier
+        """
+        if any(file.md5 is None and file.sha256 is None for file in files):
+            raise ValueError("Un hash md5 ou sha256 est requis pour chaque fichier")
+        documents = CollectionRepository.find_documents_by_hashes(
+            session=session,
+            collection_id=collection_id,
+            md5s=list({file.md5.lower() for file in files if file.md5}),
+            sha256s=list({file.sha256.lower() for file in files if file.sha256})
+        )
+        by_md5 = {document.md5: document for document in documents if document.md5}
+        by_sha256 = {document.sha256: document for document in documents if document.sha256}
+
+        results: list[DuplicateCheckResult] = []
+        for file in files:
+            document = (
+                (by_sha256.get(file.sha256.lower()) if file.sha256 else None)
+                or (by_md5.get(file.md5.lower()) if file.md5 else None)
+            )
+            if document is not None and None not in (file.size, document.size) and file.size != document.size:
+                document = None
+            results.append(DuplicateCheckResult(
+                filename=file.filename,
+                md5=file.md5,
+                sha256=file.sha256,
+                exists=document is not None,
+                document_id=document.id if document else None,
+                is_indexed=bool(document and document.is_indexed)
+            ))
+        return DuplicateCheckResponse(
+            results=results,
+            existing=sum(1 for result in results if result.exists)
+        )
+
+    @staticmethod
+    def docling_dir(collection_name: str, doc_id: str) -> Path:
+        """Répertoire des documents Docling enregistrés d'un document
+
+        Args:
+            collection_name (str): nom de la collection
+            doc_id (str): identifiant du document
+
+        Returns:
+            Path: répertoire des documents Docling (un fichier par fenêtre de pages)
+        """
+        return Path(settings.STATIC_DIR) / collection_name / "docling" / doc_id
+
+    @staticmethod
+    def save_docling_document(
+        convert_doc: DoclingDocument,
+        collection_name: str,
+        doc_id: str,
+        reset: bool = False,
+        page_range: tuple[int, int] | None = None
+    ) -> Path:
+        """Enregistrement compact (JSON compressé, sans images) d'un document Docling converti
+
+        Le document est conservé pour pouvoir être redécoupé et réindexé sans nouvelle conversion.
+        Les fenêtres de pages d'un même document sont enregistrées dans l'ordre, une par fichier.
+        Une fenêtre identifiée par sa plage de pages remplace celle enregistrée par une tentative
+        précédente au lieu de s'y ajouter.
+
+        Args:
+            convert_doc (DoclingDocument): document ou fenêtre de pages convertie
+            collection_name (str): nom de la collection
+            doc_id (str): identifiant du document
+            reset (bool, optional): suppression des fenêtres enregistrées précédemment. Defaults to False.
+            page_range (tuple[int, int] | None, optional): plage de pages de la fenêtre. Defaults to None.
+
+        Returns:
+            Path: fichier enregistré
+        """
+        docling_dir = ConversionService.docling_dir(collection_name, doc_id)
+        if reset and docling_dir.exists():
+            shutil.rmtree(docling_dir)
+        docling_dir.mkdir(parents=True, exist_ok=True)
+
+        content = convert_doc.export_to_dict()
+        # Les images ne servent pas au découpage : elles restent dans le répertoire du markdown
+        for picture in content.get("pictures", []):
+            picture["image"] = None
+        for page in content.get("pages", {}).values():
+            page["image"] = None
+
+        if page_range is not None:
+            path = docling_dir / f"{page_range[0]:05d}-{page_range[1]:05d}.json.gz"
+        else:
+            path = docling_dir / f"{len(list(docling_dir.glob('*.json.gz'))):05d}.json.gz"
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as f:
+            json.dump(content, f)
+        return path
+
+    @staticmethod
+    def load_docling_documents(collection_name: str, doc_id: str) -> list[DoclingDocument]:
+        """Documents Docling enregistrés d'un document, dans l'ordre des pages
+
+        Args:
+            collection_name (str): nom de la collection
+            doc_id (str): identifiant du document
+
+        Returns:
+            list[DoclingDocument]: documents enregistrés, liste vide pour un document converti avant leur enregistrement
+        """
+        documents: list[DoclingDocument] = []
+        for path in sorted(ConversionService.docling_dir(collection_name, doc_id).glob("*.json.gz")):
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                documents.append(DoclingDocument.model_validate(json.load(f)))
+        return documents
+
     @staticmethod
     def save_converted_markdown(
         convert_doc: DoclingDocument,
         collection_name: str,
-        doc_id: str
+        doc_id: str,
+        page_range: tuple[int, int] | None = None
     ) -> Path:
-            
+        """Sauvegarde du document converti au format markdown (et au format Docling compact)
+
+        Args:
+            convert_doc (DoclingDocument): document converti
+            collection_name (str): nom de la collection
+            doc_id (str): identifiant du document
+            page_range (tuple[int, int] | None, optional): plage de pages de la première fenêtre d'un document converti par fenêtres. Defaults to None.
+
+        Raises:
+            ValueError: Erreur lors de l'écriture des fichiers
+
+        Returns:
+            Path: fichier markdown du document
+        """
         try:
             # Gestion des répertoires de stockage
             md_dir = Path(settings.STATIC_DIR) / collection_name
@@ -115,6 +389,70 @@ class ConversionService:
                 artifacts_dir=Path("images") / doc_id, 
                 image_mode=ImageRefMode.REFERENCED
             )
+            ConversionService.save_docling_document(
+                convert_doc=convert_doc,
+                collection_name=collection_name,
+                doc_id=doc_id,
+                reset=True,
+                page_range=page_range
+            )
+
+            return md_filename
+
+        except Exception as e:
+            raise ValueError(e)
+
+    @staticmethod
+    def append_converted_markdown(
+        convert_doc: DoclingDocument,
+        collection_name: str,
+        doc_id: str,
+        page_range: tuple[int, int] | None = None,
+        offset: int | None = None
+    ) -> Path:
+        """Ajout d'une fenêtre de pages convertie à la fin du fichier markdown d'un document
+        (et enregistrement de la fenêtre au format Docling compact)
+
+        Le fichier markdown est d'abord tronqué à `offset` : le contenu ajouté par une tentative
+        interrompue avant l'enregistrement de son point de reprise n'est pas dupliqué.
+
+        Args:
+            convert_doc (DoclingDocument): fenêtre de pages convertie
+            collection_name (str): nom de la collection
+            doc_id (str): identifiant du document
+            page_range (tuple[int, int] | None, optional): plage de pages de la fenêtre. Defaults to None.
+            offset (int | None, optional): taille du fichier markdown avant l'ajout de la fenêtre. Defaults to None.
+
+        Raises:
+            ValueError: Erreur lors de l'écriture du fichier
+
+        Returns:
+            Path: fichier markdown du document
+        """
+        try:
+            md_dir = Path(settings.STATIC_DIR) / collection_name
+            md_filename = md_dir / f"{doc_id}.md"
+            part_filename = md_dir / f"{doc_id}.part.md"
+
+            # Les images de la fenêtre sont enregistrées avec celles des fenêtres précédentes
+            convert_doc.save_as_markdown(
+                filename=part_filename,
+                artifacts_dir=Path("images") / doc_id,
+                image_mode=ImageRefMode.REFERENCED
+            )
+            if offset is not None and md_filename.exists():
+                os.truncate(md_filename, offset)
+            with open(md_filename, "a", encoding="utf-8") as md_file, open(part_filename, encoding="utf-8") as part_file:
+                if md_file.tell() > 0:
+                    md_file.write("\n\n")
+                shutil.copyfileobj(part_file, md_file)
+            part_filename.unlink()
+            ConversionService.save_docling_document(
+                convert_doc=convert_doc,
+                collection_name=collection_name,
+                doc_id=doc_id,
+                page_range=page_range
+            )
 
             return md_filename
 
@@ -122,12 +460,228 @@ class ConversionService:
             raise ValueError(e)
 
     @staticmethod
-    def convert_to_md(file_path: Path | str, collection_name: str, doc_id: str) -> ConvertPdfResponse:
+    def build_converter(options: ConverterOptions | None = None) -> DocumentConverter:
+        """Création d'un convertisseur Docling configuré pour les formats PDF et DOCX
+
+        Args:
+            options (ConverterOptions | None, optional): options des pipelines. Defaults to None.
+
+        Returns:
+            DocumentConverter: convertisseur Docling
+        """
+        options = options or ConverterOptions()
+        accelerator_options = AcceleratorOptions(
+            num_threads=options.num_threads, device=AcceleratorDevice(options.device)
+        )
+
+        # Configuration des options de conversion PDF
+        pdf_pipeline_options = PdfPipelineOptions()
+        pdf_pipeline_options.do_ocr = options.do_ocr
+        pdf_pipeline_options.images_scale = options.images_scale
+        pdf_pipeline_options.generate_picture_images = options.generate_picture_images
+        pdf_pipeline_options.do_table_structure = options.do_table_structure
+        pdf_pipeline_options.table_structure_options = TableStructureOptions(
+            mode = TableFormerMode(options.table_mode)
+        )
+        pdf_pipeline_options.accelerator_options = accelerator_options
+
+        # Configuration des options de conversion DOCX
+        docx_pipepline_options = PaginatedPipelineOptions()
+        docx_pipepline_options.images_scale = options.images_scale
+        docx_pipepline_options.generate_picture_images = options.generate_picture_images
+        docx_pipepline_options.accelerator_options = accelerator_options
+
+        return DocumentConverter(
+            allowed_formats=[InputFormat.PDF, InputFormat.DOCX],
+            format_options={
+                InputFormat.PDF: PdfFormatOption(pipeline_options=pdf_pipeline_options),
+                InputFormat.DOCX: WordFormatOption(pipeline_options=docx_pipepline_options)
+            }
+        )
+
+    @staticmethod
+    def get_converter(options: ConverterOptions | None = None) -> DocumentConverter:
+        """Convertisseur Docling du processus pour un jeu d'options, créé à la première demande
+
+        Les convertisseurs les moins récemment utilisés sont libérés au-delà de CONVERTER_CACHE_SIZE.
+
+        Args:
+            options (ConverterOptions | None, optional): options des pipelines. Defaults to None.
+
+        Returns:
+            DocumentConverter: convertisseur Docling
+        """
+        options = options or ConverterOptions()
+        with _converters_lock:
+            converter = _converters.get(options)
+            if converter is not None:
+                _converters.move_to_end(options)
+                return converter
+
+            converter = ConversionService.build_converter(options)
+            _converters[options] = converter
+            while len(_converters) > max(1, settings.CONVERTER_CACHE_SIZE):
+                evicted, _ = _converters.popitem(last=False)
+                logger.info(f"Convertisseur Docling libéré : {evicted}")
+            return converter
+
+    @staticmethod
+    def warmup(options: list[ConverterOptions] | None = None):
+        """Création des convertisseurs et chargement des modèles des pipelines PDF et DOCX
+
+        Args:
+            options (list[ConverterOptions] | None, optional): jeux d'options à préparer. Defaults to None.
+        """
+        start_time = time.time()
+        for converter_options in options or [ConverterOptions()]:
+            converter = ConversionService.get_converter(converter_options)
+            with _conversion_lock:
+                for input_format in (InputFormat.PDF, InputFormat.DOCX):
+                    converter.initialize_pipeline(input_format)
+        logger.info(f"Convertisseurs Docling initialisés en {time.time() - start_time:.1f} s")
+
+    @staticmethod
+    def page_count(file_path: Path | str) -> int | None:
+        """Nombre de pages d'un fichier PDF
+
+        Args:
+            file_path (Path | str): chemin vers le fichier
+
+        Returns:
+            int | None: nombre de pages, None pour un fichier non PDF ou illisible
+        """
+        if not str(file_path).lower().endswith(".pdf"):
+            return None
+        try:
+            return len(PdfReader(file_path).pages)
+        except Exception:
+            return None
+
+    @staticmethod
+    def page_ranges(page_count: int, shard_pages: int) -> list[tuple[int, int]]:
+        """Découpage d'un document en plages de pages
+
+        Args:
+            page_count (int): nombre de pages du document
+            shard_pages (int): nombre de pages par plage
+
+        Returns:
+            list[tuple[int, int]]: plages de pages (début et fin inclus, numérotation à partir de 1)
+        """
+        shard_pages = max(1, shard_pages)
+        return [
+            (start, min(start + shard_pages - 1, page_count))
+            for start in range(1, page_count + 1, shard_pages)
+        ]
+
+    @staticmethod
+    def streaming_window(page_count: int | None) -> int | None:
+        """Taille des fenêtres de pages du mode streaming
+
+        Le mode streaming est utilisé lorsque la mémoire estimée du document converti
+        (CONVERSION_PAGE_MEMORY_MB par page) dépasse CONVERSION_MEMORY_BUDGET_MB.
+
+        Args:
+            page_count (int | None): nombre de pages du document
+
+        Returns:
+            int | None: nombre de pages par fenêtre, None si le document tient dans le budget mémoire
+        """
+        budget = settings.CONVERSION_MEMORY_BUDGET_MB
+        page_memory = max(1, settings.CONVERSION_PAGE_MEMORY_MB)
+        if page_count is None or budget <= 0 or page_count * page_memory <= budget:
+            return None
+        return max(1, budget // page_memory)
+
+    @staticmethod
+    def convert_document(
+        file_path: Path | str,
+        page_range: tuple[int, int] | None = None,
+        options: ConverterOptions | None = None
+    ) -> DoclingDocument:
+        """Conversion Docling d'un document ou d'une plage de pages
+
+        Les numéros de pages du document converti sont ceux du fichier d'origine. Les conversions
+        d'un même processus sont exécutées l'une après l'autre.
+
+        Args:
+            file_path (Path | str): chemin vers le fichier à convertir
+            page_range (tuple[int, int] | None, optional): plage de pages à convertir. Defaults to None.
+            options (ConverterOptions | None, optional): options des pipelines de conversion. Defaults to None.
+
+        Raises:
+            DocumentParsingError: Erreur docling
+
+        Returns:
+            DoclingDocument: document converti
+        """
+        try:
+            converter = ConversionService.get_converter(options)
+            with _conversion_lock:
+                if page_range is None:
+                    return converter.convert(file_path).document
+                return converter.convert(file_path, page_range=page_range).document
+        except Exception as e:
+            raise DocumentParsingError("Erreur docling", str(e))
+
+    @staticmethod
+    def merge_documents(documents: list[DoclingDocument]) -> DoclingDocument:
+        """Fusion de documents Docling issus de plages de pages consécutives
+
+        Les éléments de chaque document sont ajoutés à la suite de ceux des précédents (références
+        internes décalées), ce qui conserve l'ordre de lecture et donc la hiérarchie des titres
+        d'une plage à l'autre. Les pages gardent leur numéro d'origine.
+
+        Args:
+            documents (list[DoclingDocument]): documents dans l'ordre des pages
+
+        Returns:
+            DoclingDocument: document fusionné
+        """
+        if len(documents) == 1:
+            return documents[0]
+
+        def shift_refs(node: Any, offsets: dict[str, int]) -> Any:
+            if isinstance(node, dict):
+                shifted = {}
+                for key, value in node.items():
+                    match = _DOC_REF.match(value) if key in ("$ref", "self_ref") and isinstance(value, str) else None
+                    if match:
+                        shifted[key] = f"#/{match.group(1)}/{int(match.group(2)) + offsets[match.group(1)]}"
+                    else:
+                        shifted[key] = shift_refs(value, offsets)
+                return shifted
+            if isinstance(node, list):
+                return [shift_refs(value, offsets) for value in node]
+            return node
+
+        merged = documents[0].export_to_dict()
+        for document in documents[1:]:
+            offsets = {name: len(merged.get(name, [])) for name in _DOC_ITEM_LISTS}
+            part = shift_refs(document.export_to_dict(), offsets)
+            for name in _DOC_ITEM_LISTS:
+                merged.setdefault(name, []).extend(part.get(name, []))
+            for root in ("body", "furniture"):
+                if root in part:
+                    merged[root].setdefault("children", []).extend(part[root].get("children", []))
+            merged.setdefault("pages", {}).update(part.get("pages", {}))
+
+        return DoclingDocument.model_validate(merged)
+
+    @staticmethod
+    def convert_to_md(
+        file_path: Path | str,
+        collection_name: str,
+        doc_id: str,
+        options: ConverterOptions | None = None
+    ) -> ConvertPdfResponse:
         """_summary_
 
         Args:
             file_path (Path | str): chemin vers le fichier à traiter
             collection_name (str): nom de la collection / table pour le stockage des données
+            doc_id (str): identifiant du document
+            options (ConverterOptions | None, optional): options des pipelines de conversion. Defaults to None.
 
         Raises:
             Exception: Erreur lors de l'éxécution de la fonction
@@ -140,44 +694,12 @@ class ConversionService:
         """
 
         try: 
-            try: 
-                # Configuration des options de conversion PDF
-                pdf_pipeline_options = PdfPipelineOptions()
-                pdf_pipeline_options.do_ocr = False
-                pdf_pipeline_options.images_scale = settings.IMAGE_RESOLUTION_SCALE
-                pdf_pipeline_options.generate_picture_images = True
-                pdf_pipeline_options.do_table_structure = True
-                pdf_pipeline_options.table_structure_options = TableStructureOptions(
-                    mode = TableFormerMode.ACCURATE
-                )
-                pdf_pipeline_options.accelerator_options = AcceleratorOptions(
-                    num_threads=4, device=AcceleratorDevice.AUTO
-                )
-
-                # Configuration des options de conversion DOCX
-                docx_pipepline_options = PaginatedPipelineOptions()
-                docx_pipepline_options.images_scale = settings.IMAGE_RESOLUTION_SCALE
-                docx_pipepline_options.generate_picture_images = True
-                docx_pipepline_options.accelerator_options = AcceleratorOptions(
-                    num_threads=4, device=AcceleratorDevice.AUTO
-                )
-
-                # Conversion du document
-                start_time = time.time()
-                doc_converter = DocumentConverter(
-                    allowed_formats=[InputFormat.PDF, InputFormat.DOCX],
-                    format_options={
-                        InputFormat.PDF: PdfFormatOption(pipeline_options=pdf_pipeline_options),
-                        InputFormat.DOCX: WordFormatOption(pipeline_options=docx_pipepline_options)
-                    }
-                )
-                convert_doc = doc_converter.convert(file_path)
-            
-            except Exception as e:
-                raise DocumentParsingError("Erreur docling", str(e))
+            # Conversion du document
+            start_time = time.time()
+            document = ConversionService.convert_document(file_path=file_path, options=options)
             
             md_filename = ConversionService.save_converted_markdown(
-                convert_doc=convert_doc.document,
+                convert_doc=document,
                 collection_name=collection_name,
                 doc_id=doc_id
             )
@@ -187,7 +709,7 @@ class ConversionService:
 
             # Retour de la réponse
             return ConvertPdfResponse(
-                document=convert_doc.document,
+                document=document,
                 markdown=md_filename,
                 conversion_time=elapsed_time
             )
@@ -197,5 +719,3 @@ class ConversionService:
 
         except Exception as e:
             raise e
-
-        
\ No newline at end of file
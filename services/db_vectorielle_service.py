@@ -1,4 +1,5 @@
-from typing import List, Sequence
+import asyncio
+from typing import Awaitable, Callable, Dict, List, Sequence
 import uuid
 import chromadb
 from chromadb import Collection, QueryResult
@@ -6,17 +7,69 @@ from chromadb.errors import NotFoundError
 from chromadb.utils.embedding_functions import OllamaEmbeddingFunction
 from chromadb.api.types import EmbeddingFunction
 
+from core.config import settings
 from schemas import Chunk
+from .embedding_cache import EmbeddingCache
+from .llm_service import LlmService
+
+# Suivi de l'indexation : (chunks indexés, nombre total de chunks)
+IndexingProgressCallback = Callable[[int, int], Awaitable[None]]
+
+# Lot de chunks écrit dans la base vectorielle
+IndexedBatchCallback = Callable[[List[Chunk]], Awaitable[None]]
 
 class DbVectorielleService:
-    """Service pour la gestion de la base de données vectorielles"""
+    """Service pour la gestion de la base de données vectorielles
+
+    Les embeddings sont calculés avec le client Ollama partagé du processus (connexions
+    persistantes) et les collections Chroma ouvertes sont conservées en cache jusqu'à leur
+    suppression.
+    """
+
+    _shared: "DbVectorielleService | None" = None
 
     def __init__(self, chroma_db: str, embedding_model: str, ollama_url: str):
         self.client = chromadb.PersistentClient(path=chroma_db)
+        self.embedding_model = embedding_model
+        self.embedding_cache = EmbeddingCache.shared()
+        self.ollama_client = LlmService.shared_client(host=ollama_url)
         self.embedding_function: EmbeddingFunction = OllamaEmbeddingFunction(
             model_name=embedding_model,
             url=ollama_url
         )
+        self.collections: Dict[str, Collection] = {}
+
+    @classmethod
+    def shared(cls) -> "DbVectorielleService":
+        """Service de base de données vectorielle partagé par le processus (API et jobs)
+
+        Returns:
+            DbVectorielleService: service de base de données vectorielle
+        """
+        if cls._shared is None:
+            cls._shared = cls(
+                chroma_db=settings.CHROMA_DB,
+                embedding_model=settings.LLM_EMBEDDINGS_MODEL,
+                ollama_url=settings.OLLAMA_URL
+            )
+        return cls._shared
+
+    def get_collection(self, collection_name: str, refresh: bool = False) -> Collection:
+        """Collection Chroma ouverte, lue depuis le cache
+
+        Args:
+            collection_name (str): nom de la collection
+            refresh (bool, optional): relecture de la collection (supprimée puis recréée par un autre processus). Defaults to False.
+
+        Returns:
+            Collection: collection Chroma
+        """
+        if refresh or collection_name not in self.collections:
+            self.collections[collection_name] = self.client.get_collection(
+                name=collection_name,
+                embedding_function=self.embedding_function
+            )
+        return self.collections[collection_name]
 
     def create_collection(self, collection_name: str) -> bool:
         """Création d'une collection
@@ -31,7 +84,7 @@ class DbVectorielleService:
             bool: Collection créée avec succès
         """
         try:
-            self.client.create_collection(
+            self.collections[collection_name] = self.client.create_collection(
                 name=collection_name,
                 embedding_function=self.embedding_function
             )
@@ -51,6 +104,7 @@ class DbVectorielleService:
         Returns:
             bool: Collection supprimée avec succès
         """
+        self.collections.pop(collection_name, None)
         try:
             self.client.get_collection(name=collection_name)
             self.client.delete_collection(name=collection_name)
@@ -71,18 +125,38 @@ class DbVectorielleService:
             QueryResult: résultat de la recherche
         """
         try:
-            collection = self.client.get_collection(
-                name=collection_name, 
-                embedding_function=self.embedding_function
-            )
-            return collection.query(
-                query_texts=[query],
-                include=["documents", "metadatas"], 
-                n_results=5
-            )
+            query_embeddings = self.embed_documents([query])
+            try:
+                collection = self.get_collection(collection_name)
+                return collection.query(
+                    query_embeddings=query_embeddings,
+                    include=["documents", "metadatas"],
+                    n_results=5
+                )
+            except NotFoundError:
+                collection = self.get_collection(collection_name, refresh=True)
+                return collection.query(
+                    query_embeddings=query_embeddings,
+                    include=["documents", "metadatas"],
+                    n_results=5
+                )
         except Exception as e:
             raise Exception(e)
         
+    async def query_collection_async(self, query: str, collection_name: str) -> QueryResult:
+        """Interrogation d'une collection sans bloquer la boucle d'évènements
+
+        L'embedding de la requête et la recherche Chroma sont exécutés dans un thread.
+
+        Args:
+            query (str): requête d'interrogation
+            collection_name (str): nom de la collection à interroger
+
+        Returns:
+            QueryResult: résultat de la recherche
+        """
+        return await asyncio.to_thread(self.query_collection, query=query, collection_name=collection_name)
+
     def list_collections(self) -> Sequence[Collection]:
         """Obtenir la liste des collections présentes dans la base de données vectorielles
 
@@ -104,25 +178,123 @@ class DbVectorielleService:
         except Exception:
             return False
                     
-    def insert_chunk(self, collection_name: str, chunks: List[Chunk]):
+    def embed_documents(self, documents: List[str]) -> List[List[float]]:
+        """Calcul des embeddings d'une liste de textes
+
+        Le cache des embeddings est consulté avant Ollama : seuls les textes absents du cache
+        sont encodés, puis ajoutés au cache.
+
+        Args:
+            documents (List[str]): textes à encoder
+
+        Returns:
+            List[List[float]]: embeddings des textes
+        """
+        hashes = [EmbeddingCache.text_hash(document) for document in documents]
+        embeddings = self.embedding_cache.get_many(self.embedding_model, hashes)
+
+        # Textes absents du cache, dédoublonnés
+        missing: dict[str, str] = {}
+        for text_hash, document in zip(hashes, documents):
+            if text_hash not in embeddings:
+                missing.setdefault(text_hash, document)
+        if missing:
+            response = self.ollama_client.embed(model=self.embedding_model, input=list(missing.values()))
+            computed = {
+                text_hash: list(map(float, embedding))
+                for text_hash, embedding in zip(missing.keys(), response.embeddings)
+            }
+            self.embedding_cache.put_many(self.embedding_model, computed)
+            embeddings.update(computed)
+
+        return [embeddings[text_hash] for text_hash in hashes]
+
+    def delete_document_chunks(self, collection_name: str, document_id: str):
+        """Suppression des chunks d'un document d'une collection
+
+        Args:
+            collection_name (str): nom de la collection
+            document_id (str): identifiant du document
+        """
         try:
-            collection = self.client.get_collection(
-                name=collection_name, 
-                embedding_function=self.embedding_function
-            )
-            ids = []
-            documents = []
-            metadatas = []
-            for chunk in chunks:
-                ids.append(str(uuid.uuid4()))
-                documents.append(chunk.text)
-                metadatas.append(chunk.metadata.model_dump())
-
-            collection.add(
-                ids=ids,
-                metadatas=metadatas,
-                documents=documents
-            )
+            self.get_collection(collection_name).delete(where={"document_id": document_id})
+        except NotFoundError:
+            self.get_collection(collection_name, refresh=True).delete(where={"document_id": document_id})
+
+    def add_chunks(self, collection: Collection, chunks: List[Chunk], embeddings: List[List[float]]):
+        """Ajout de chunks et de leurs embeddings dans une collection
+
+        Les chunks identifiés remplacent les chunks de même identifiant déjà présents.
+
+        Args:
+            collection (Collection): collection Chroma
+            chunks (List[Chunk]): chunks à ajouter
+            embeddings (List[List[float]]): embeddings des chunks
+        """
+        collection.upsert(
+            ids=[chunk.id or str(uuid.uuid4()) for chunk in chunks],
+            metadatas=[chunk.metadata.model_dump() for chunk in chunks],
+            documents=[chunk.text for chunk in chunks],
+            embeddings=embeddings
+        )
+
+    async def insert_chunk(
+        self,
+        collection_name: str,
+        chunks: List[Chunk],
+        batch_size: int = settings.EMBEDDING_BATCH_SIZE,
+        concurrency: int = settings.EMBEDDING_CONCURRENCY,
+        on_progress: IndexingProgressCallback | None = None,
+        on_batch: IndexedBatchCallback | None = None
+    ):
+        """Indexation de chunks par lots d'embeddings
+
+        Les lots sont encodés par Ollama avec au plus `concurrency` requêtes simultanées et chaque
+        lot est écrit dans Chroma dès le retour de ses embeddings.
+
+        Args:
+            collection_name (str): nom de la collection
+            chunks (List[Chunk]): chunks à indexer
+            batch_size (int, optional): nombre de chunks par lot. Defaults to settings.EMBEDDING_BATCH_SIZE.
+            concurrency (int, optional): nombre de lots encodés simultanément. Defaults to settings.EMBEDDING_CONCURRENCY.
+            on_progress (IndexingProgressCallback | None, optional): suivi des chunks indexés. Defaults to None.
+            on_batch (IndexedBatchCallback | None, optional): appelé après l'écriture de chaque lot. Defaults to None.
+
+        Raises:
+            Exception: Erreur lors de l'indexation des chunks
+        """
+        try:
+            collection = await asyncio.to_thread(self.get_collection, collection_name)
+            batch_size = max(1, batch_size)
+            batches = [chunks[i:i + batch_size] for i in range(0, len(chunks), batch_size)]
+            semaphore = asyncio.Semaphore(max(1, concurrency))
+            indexed = 0
+
+            async def index_batch(batch: List[Chunk]):
+                nonlocal indexed, collection
+                async with semaphore:
+                    embeddings = await asyncio.to_thread(
+                        self.embed_documents,
+                        [chunk.text for chunk in batch]
+                    )
+                try:
+                    await asyncio.to_thread(self.add_chunks, collection, batch, embeddings)
+                except NotFoundError:
+                    # Collection recréée par un autre processus depuis sa mise en cache
+                    collection = await asyncio.to_thread(self.get_collection, collection_name, True)
+                    await asyncio.to_thread(self.add_chunks, collection, batch, embeddings)
+                if on_batch is not None:
+                    await on_batch(batch)
+                indexed += len(batch)
+                if on_progress is not None:
+                    await on_progress(indexed, len(chunks))
+
+            tasks = [asyncio.ensure_future(index_batch(batch)) for batch in batches]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                for task in tasks:
+                    task.cancel()
+                raise
         except Exception as e:
-            raise Exception(e)
-        
\ No newline at end of file
+            raise Exception(e) from e
@@ -0,0 +1,185 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from pathlib import Path
+from typing import Dict, List
+
+from core.config import settings
+from core.logging import logger
+from schemas import EmbeddingCacheStats
+
+class EmbeddingCache:
+    """Cache disque des embeddings adressé par le contenu des chunks
+
+    Les embeddings sont indexés par (modèle d'embeddings, empreinte SHA-256 du texte normalisé) et
+    stockés en float32 dans une base SQLite dédiée, partagée par l'API et les workers externes.
+    Au-delà de `max_entries` entrées, les embeddings les moins récemment utilisés sont supprimés.
+    Le nombre d'entrées et les statistiques (succès, échecs, évictions) sont tenus à jour dans la
+    base : ils cumulent l'activité de tous les processus sans recompter la table à chaque écriture.
+    """
+
+    _shared: "EmbeddingCache | None" = None
+
+    def __init__(self, path: str = settings.EMBEDDING_CACHE_DB, max_entries: int = settings.EMBEDDING_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    @classmethod
+    def shared(cls) -> "EmbeddingCache":
+        """Cache des embeddings partagé par le processus
+
+        Returns:
+            EmbeddingCache: cache des embeddings
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Empreinte du texte normalisé d'un chunk (Unicode NFC, espaces réduits)
+
+        Args:
+            text (str): texte du chunk
+
+        Returns:
+            str: empreinte SHA-256 du texte normalisé
+        """
+        normalized = re.sub(r"\s+", " ", unicodedata.normalize("NFC", text)).strip()
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connexion à la base du cache, créée à la première utilisation"""
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, "
+                "text_hash TEXT NOT NULL, "
+                "vector BLOB NOT NULL, "
+                "last_used REAL NOT NULL, "
+                "PRIMARY KEY (model, text_hash))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_embeddings_last_used ON embeddings (last_used)")
+            conn.execute("CREATE TABLE IF NOT EXISTS stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+            # Compteurs créés une seule fois, le nombre d'entrées initialisé depuis la table existante
+            conn.execute(
+                "INSERT OR IGNORE INTO stats (name, value) SELECT 'entries', COUNT(*) FROM embeddings"
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO stats (name, value) VALUES (?, 0)",
+                [("hits",), ("misses",), ("evictions",)]
+            )
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get_many(self, model: str, hashes: List[str]) -> Dict[str, List[float]]:
+        """Lecture des embeddings présents dans le cache
+
+        Args:
+            model (str): modèle d'embeddings
+            hashes (List[str]): empreintes des textes
+
+        Returns:
+            Dict[str, List[float]]: embeddings trouvés par empreinte
+        """
+        if not self.enabled or not hashes:
+            return {}
+        found: Dict[str, List[float]] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            conn = self._connection()
+            # Requêtes par paquets pour rester sous la limite de paramètres de SQLite
+            for i in range(0, len(unique), 500):
+                batch = unique[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for text_hash, vector in rows:
+                    found[text_hash] = array("f", vector).tolist()
+            if found:
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND text_hash = ?",
+                    [(time.time(), model, text_hash) for text_hash in found]
+                )
+            hits = sum(1 for text_hash in hashes if text_hash in found)
+            self._increment(conn, hits=hits, misses=len(hashes) - hits)
+            conn.commit()
+        return found
+
+    @staticmethod
+    def _increment(conn: sqlite3.Connection, **counters: int):
+        """Incrément des compteurs de la table stats (dans la transaction en cours)"""
+        conn.executemany(
+            "UPDATE stats SET value = value + ? WHERE name = ?",
+            [(value, name) for name, value in counters.items() if value]
+        )
+
+    def put_many(self, model: str, embeddings: Dict[str, List[float]]):
+        """Enregistrement d'embeddings dans le cache puis éviction LRU au-delà de la taille maximale
+
+        Args:
+            model (str): modèle d'embeddings
+            embeddings (Dict[str, List[float]]): embeddings par empreinte de texte
+        """
+        if not self.enabled or not embeddings:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            # Un embedding déjà enregistré (par un autre processus) est identique : il est conservé
+            inserted = conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, text_hash, vector, last_used) VALUES (?, ?, ?, ?)",
+                [
+                    (model, text_hash, array("f", vector).tobytes(), now)
+                    for text_hash, vector in embeddings.items()
+                ]
+            ).rowcount
+            self._increment(conn, entries=inserted)
+            count = conn.execute("SELECT value FROM stats WHERE name = 'entries'").fetchone()[0]
+            excess = count - self.max_entries
+            if excess > 0:
+                evicted = conn.execute(
+                    "DELETE FROM embeddings WHERE rowid IN "
+                    "(SELECT rowid FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,)
+                ).rowcount
+                self._increment(conn, entries=-evicted, evictions=evicted)
+                logger.info(f"Cache des embeddings : {evicted} entrées supprimées")
+            conn.commit()
+
+    def stats(self) -> EmbeddingCacheStats:
+        """Statistiques du cache, cumulées par l'API et les workers externes
+
+        Returns:
+            EmbeddingCacheStats: statistiques du cache
+        """
+        counters = {"entries": 0, "hits": 0, "misses": 0, "evictions": 0}
+        if self.enabled:
+            with self._lock:
+                counters.update(self._connection().execute("SELECT name, value FROM stats").fetchall())
+        lookups = counters["hits"] + counters["misses"]
+        return EmbeddingCacheStats(
+            enabled=self.enabled,
+            entries=counters["entries"],
+            max_entries=self.max_entries,
+            hits=counters["hits"],
+            misses=counters["misses"],
+            evictions=counters["evictions"],
+            hit_rate=counters["hits"] / lookups if lookups else 0.0
+        )
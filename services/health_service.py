@@ -29,7 +29,7 @@ class HealthService:
         try:
             sqlite_ok = CollectionService.check_db(session=session)
             chroma_ok = vector_db.check_db()
-            ollama_status = LlmService().check_ollama()
+            ollama_status = LlmService.shared().check_ollama()
 
             status = "ok" if (
                 sqlite_ok and chroma_ok and ollama_status.ok
@@ -0,0 +1,246 @@
+import asyncio
+import gc
+from collections import deque
+from pathlib import Path
+from typing import Awaitable, Callable, List, Tuple
+
+from docling_core.types.doc.document import DoclingDocument
+
+from core.config import settings
+from core.logging import logger
+from schemas import Chunk
+from .chunking_service import ChunkingService
+from .conversion_pool import ConversionPool
+from .conversion_service import ConversionService
+from .db_vectorielle_service import DbVectorielleService
+from .job_checkpoint import JobCheckpoint
+
+# Suivi du pipeline : (pages converties, pages indexées, nombre total de pages)
+PipelineProgressCallback = Callable[[int, int, int], Awaitable[None]]
+
+# Fin de flux entre deux étages du pipeline
+_END = None
+
+class IngestionPipeline:
+    """Pipeline d'ingestion d'un PDF par segments de pages
+
+    Trois étages reliés par des files bornées traitent les segments en parallèle :
+    conversion (jusqu'à un segment par processus du pool de conversion), markdown et chunking,
+    puis embeddings et indexation. Les chunks des premières pages sont indexés pendant la
+    conversion des pages suivantes, et la taille des files borne le nombre de segments en mémoire.
+    Les segments sont traités dans l'ordre des pages, la dernière section d'un segment est reportée
+    sur les premiers chunks du suivant.
+    Avec un point de reprise, les segments déjà découpés ne sont pas reconvertis et les chunks déjà
+    indexés ne sont pas réencodés. Le fichier markdown est ramené à sa taille au dernier segment
+    enregistré et les fenêtres Docling sont nommées par plage de pages : un segment écrit par une
+    tentative interrompue avant son point de reprise est remplacé, pas dupliqué.
+    """
+
+    def __init__(
+        self,
+        file_path: Path | str,
+        filename: str,
+        doc_id: str,
+        collection_name: str,
+        page_count: int,
+        db_vector_service: DbVectorielleService,
+        segment_pages: int = settings.INGESTION_SEGMENT_PAGES,
+        queue_size: int = settings.INGESTION_QUEUE_SIZE,
+        conversion_pool: ConversionPool | None = None,
+        on_progress: PipelineProgressCallback | None = None,
+        checkpoint: JobCheckpoint | None = None,
+        vector_collection: str | None = None
+    ):
+        self.file_path = file_path
+        self.doc_id = doc_id
+        self.collection_name = collection_name
+        self.vector_collection = vector_collection or collection_name
+        self.page_count = page_count
+        self.db_vector_service = db_vector_service
+        self.conversion_pool = conversion_pool or ConversionPool.shared()
+        self.conversion_concurrency = max(1, self.conversion_pool.size)
+        self.queue_size = max(1, queue_size)
+        self.segment_pages = self.bounded_segment_pages(segment_pages)
+        self.page_ranges = ConversionService.page_ranges(page_count, self.segment_pages)
+        self.chunking_service = ChunkingService(filename=filename)
+        self.on_progress = on_progress
+        self.checkpoint = checkpoint
+        self.resumed_segments = self.load_checkpoint()
+        self.indexed_ids = checkpoint.indexed_ids() if checkpoint is not None else set()
+        self.converted_pages = 0
+        self.indexed_pages = 0
+        self.nb_chunks = 0
+
+    def load_checkpoint(self) -> List[Tuple[Tuple[int, int], List[Chunk], str | None, int | None]]:
+        """Segments déjà découpés lors d'une tentative précédente
+
+        Seuls les premiers segments consécutifs sont repris, le fichier markdown du document les
+        contenant déjà. Un découpage en segments différent invalide le point de reprise.
+
+        Returns:
+            List[Tuple[Tuple[int, int], List[Chunk], str | None, int | None]]: plage de pages, chunks, dernière section et taille du markdown des segments repris
+        """
+        if self.checkpoint is None:
+            return []
+        saved = self.checkpoint.load_segments()
+        if any(page_range not in self.page_ranges for page_range in saved):
+            self.checkpoint.clear_segments()
+            return []
+        resumed = []
+        for page_range in self.page_ranges:
+            if page_range not in saved:
+                break
+            resumed.append((page_range, *saved[page_range]))
+        return resumed
+
+    def bounded_segment_pages(self, segment_pages: int) -> int:
+        """Taille des segments respectant le budget mémoire de conversion
+
+        Au plus un segment par étage, par conversion en cours et par place dans les files est
+        en mémoire à un instant donné.
+
+        Args:
+            segment_pages (int): taille des segments demandée
+
+        Returns:
+            int: nombre de pages par segment
+        """
+        budget = settings.CONVERSION_MEMORY_BUDGET_MB
+        if budget <= 0:
+            return max(1, segment_pages)
+        in_flight = self.conversion_concurrency + 2 * self.queue_size + 2
+        budget_pages = budget // max(1, settings.CONVERSION_PAGE_MEMORY_MB) // in_flight
+        return max(1, min(segment_pages, budget_pages))
+
+    async def _report(self):
+        if self.on_progress is not None:
+            await self.on_progress(self.converted_pages, self.indexed_pages, self.page_count)
+
+    async def _convert_stage(self, output: asyncio.Queue):
+        """Conversion des segments, plusieurs à la fois, transmis dans l'ordre des pages"""
+        pending: deque[Tuple[Tuple[int, int], asyncio.Future]] = deque()
+        try:
+            for page_range in self.page_ranges[len(self.resumed_segments):]:
+                pending.append((page_range, asyncio.ensure_future(
+                    self.conversion_pool.convert_window(file_path=self.file_path, page_range=page_range)
+                )))
+                if len(pending) < self.conversion_concurrency:
+                    continue
+                page_range, task = pending.popleft()
+                await self._emit_segment(output, page_range, await task)
+            while pending:
+                page_range, task = pending.popleft()
+                await self._emit_segment(output, page_range, await task)
+        finally:
+            for _, task in pending:
+                task.cancel()
+        await output.put(_END)
+
+    async def _emit_segment(self, output: asyncio.Queue, page_range: Tuple[int, int], segment: DoclingDocument):
+        self.converted_pages += page_range[1] - page_range[0] + 1
+        await self._report()
+        await output.put((page_range, segment))
+
+    async def _chunk_stage(self, source: asyncio.Queue, output: asyncio.Queue):
+        """Ajout des segments au fichier markdown et découpage en chunks"""
+        last_section: str | None = None
+        md_size: int | None = None
+        first = True
+        for page_range, chunks, section, size in self.resumed_segments:
+            self.converted_pages += page_range[1] - page_range[0] + 1
+            last_section = section
+            md_size = size
+            first = False
+            await output.put((page_range, chunks))
+        while (item := await source.get()) is not _END:
+            page_range, segment = item
+            # Le premier segment réinitialise le fichier markdown et les images du document
+            if first:
+                md_filename = await asyncio.to_thread(
+                    ConversionService.save_converted_markdown,
+                    convert_doc=segment,
+                    collection_name=self.collection_name,
+                    doc_id=self.doc_id,
+                    page_range=page_range
+                )
+            else:
+                md_filename = await asyncio.to_thread(
+                    ConversionService.append_converted_markdown,
+                    convert_doc=segment,
+                    collection_name=self.collection_name,
+                    doc_id=self.doc_id,
+                    page_range=page_range,
+                    offset=md_size
+                )
+            md_size = md_filename.stat().st_size
+            first = False
+            chunking_result = await asyncio.to_thread(
+                self.chunking_service.basic_chunking,
+                document=segment,
+                document_id=self.doc_id,
+                default_section=last_section,
+                id_prefix=f"{self.doc_id}-p{page_range[0]}"
+            )
+            del item, segment
+            if chunking_result.chunks:
+                last_section = chunking_result.chunks[-1].metadata.section or last_section
+            if self.checkpoint is not None:
+                await asyncio.to_thread(
+                    self.checkpoint.save_segment,
+                    page_range=page_range,
+                    chunks=chunking_result.chunks,
+                    section=last_section,
+                    md_size=md_size
+                )
+            await output.put((page_range, chunking_result.chunks))
+        await output.put(_END)
+
+    async def _embed_stage(self, source: asyncio.Queue):
+        """Calcul des embeddings et indexation des chunks"""
+        while (item := await source.get()) is not _END:
+            page_range, chunks = item
+            remaining = [chunk for chunk in chunks if chunk.id not in self.indexed_ids]
+            if remaining:
+                await self.db_vector_service.insert_chunk(
+                    collection_name=self.vector_collection,
+                    chunks=remaining,
+                    on_batch=self._batch_indexed if self.checkpoint is not None else None
+                )
+            self.nb_chunks += len(chunks)
+            self.indexed_pages += page_range[1] - page_range[0] + 1
+            del item, chunks, remaining
+            gc.collect()
+            await self._report()
+
+    async def _batch_indexed(self, batch: List[Chunk]):
+        """Enregistrement d'un lot de chunks indexés dans le point de reprise"""
+        await asyncio.to_thread(self.checkpoint.add_indexed, [chunk.id for chunk in batch])
+
+    async def run(self) -> int:
+        """Exécution du pipeline
+
+        Raises:
+            Exception: erreur levée par l'un des étages, les autres étages sont annulés
+
+        Returns:
+            int: nombre de chunks indexés
+        """
+        logger.info(
+            f"Pipeline d'ingestion de {self.file_path} : {len(self.page_ranges)} segments de {self.segment_pages} pages"
+            f" ({len(self.resumed_segments)} repris)"
+        )
+        converted: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        chunked: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        stages = [
+            asyncio.ensure_future(self._convert_stage(converted)),
+            asyncio.ensure_future(self._chunk_stage(converted, chunked)),
+            asyncio.ensure_future(self._embed_stage(chunked))
+        ]
+        try:
+            await asyncio.gather(*stages)
+        except BaseException:
+            for stage in stages:
+                stage.cancel()
+            await asyncio.gather(*stages, return_exceptions=True)
+            raise
+        return self.nb_chunks
@@ -1,47 +1,210 @@
 import asyncio
+import uuid
+from datetime import datetime
 from pathlib import Path
 
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.exceptions import is_retryable
 from core.logging import logger
+from core.utility import delete_file
 from dependencies.sqlite_session import SessionLocalSync
-from schemas import CollectionModel, JobOut
+from repositories.collections_repository import CollectionRepository
+from schemas import CollectionModel, ImportedFile, JobOut
+from .conversion_service import ConversionService
+from .db_vectorielle_service import DbVectorielleService
+from .job_checkpoint import JobCheckpoint
+from .job_runner import JobRunner
 from .user_websocket_manager import UserWebSocketManager
 from worker.insert_doc import insert_doc
 from repositories import job_repository
 
 class InsertionService:
 
+    @staticmethod
+    def insertion_payload(
+        collection: CollectionModel,
+        imported_file: ImportedFile,
+        filename: str,
+        doc_id: str
+    ) -> dict:
+        """Arguments (sérialisables JSON) d'un job d'insertion
+
+        Args:
+            collection (CollectionModel): collection d'insertion
+            imported_file (ImportedFile): fichier enregistré et validé
+            filename (str): nom d'origine du fichier
+            doc_id (str): identifiant du document
+
+        Returns:
+            dict: arguments du job
+        """
+        return {
+            "file_path": str(imported_file.path),
+            "filename": filename,
+            "doc_id": doc_id,
+            "collection": collection.model_dump(mode="json"),
+            "md5": imported_file.md5,
+            "sha256": imported_file.sha256,
+            "size": imported_file.size
+        }
+
+    @staticmethod
+    async def submit_insertion(
+        session: Session,
+        user_id: str,
+        collection: CollectionModel,
+        imported_file: ImportedFile,
+        filename: str,
+        doc_id: str,
+        user_ws_manager: UserWebSocketManager,
+        job_runner: JobRunner
+    ) -> str:
+        """Création et mise en attente du job d'insertion d'un fichier enregistré
+
+        Args:
+            session (Session): session d'accès à la base de données
+            user_id (str): identifiant de l'utilisateur créateur du job
+            collection (CollectionModel): collection d'insertion
+            imported_file (ImportedFile): fichier enregistré et validé
+            filename (str): nom d'origine du fichier
+            doc_id (str): identifiant du document
+            user_ws_manager (UserWebSocketManager): manager des sockets utilisateurs
+            job_runner (JobRunner): service de gestion des tâches
+
+        Returns:
+            str: identifiant du job d'insertion
+        """
+        job_id = str(uuid.uuid4())
+        new_job = job_repository.create_job(
+            session=session,
+            job_id=job_id,
+            user_id=user_id,
+            type="insertion",
+            payload=InsertionService.insertion_payload(
+                collection=collection,
+                imported_file=imported_file,
+                filename=filename,
+                doc_id=doc_id
+            )
+        )
+        await user_ws_manager.send_to_user(
+            user_id=user_id,
+            data=JobOut.model_validate(new_job)
+        )
+        await job_runner.submit(job_id=job_id, job_type="insertion")
+        return job_id
+
+    @staticmethod
+    def insertion_timeout(session: Session, page_count: int | None) -> float:
+        """Délai d'une tentative d'insertion selon la taille du document
+
+        La durée est estimée à partir du débit (pages par seconde) des dernières insertions
+        terminées, multipliée par INSERTION_TIMEOUT_FACTOR et bornée par INSERTION_TIMEOUT_MIN et
+        INSERTION_TIMEOUT_MAX. Sans nombre de pages (DOCX), le délai minimal est retenu.
+
+        Args:
+            session (Session): session d'accès à la base de données
+            page_count (int | None): nombre de pages du document
+
+        Returns:
+            float: délai en secondes
+        """
+        if not page_count:
+            return settings.INSERTION_TIMEOUT_MIN
+        pages_per_second = job_repository.insertion_throughput(
+            session=session,
+            limit=settings.INSERTION_THROUGHPUT_HISTORY
+        ) or settings.INSERTION_DEFAULT_PAGES_PER_SECOND
+        estimate = settings.INSERTION_TIMEOUT_FACTOR * page_count / pages_per_second
+        return min(max(estimate, settings.INSERTION_TIMEOUT_MIN), settings.INSERTION_TIMEOUT_MAX)
+
+    @staticmethod
+    async def discard_document(
+        session: Session,
+        doc_id: str,
+        collection: CollectionModel,
+        file_path: Path
+    ):
+        """Suppression d'un document dont l'insertion a définitivement échoué
+
+        Le document non indexé (enregistré à la création d'un job par lot ou avant l'indexation),
+        ses chunks déjà indexés et le fichier stocké sont supprimés : le fichier n'est plus signalé
+        comme doublon et peut être inséré à nouveau.
+
+        Args:
+            session (Session): session d'accès à la base de données
+            doc_id (str): identifiant du document
+            collection (CollectionModel): collection d'insertion
+            file_path (Path): fichier stocké du document
+        """
+        document = CollectionRepository.get_document_collection_by_id(session=session, document_id=doc_id)
+        if document is not None and document.is_indexed:
+            return
+        try:
+            await asyncio.to_thread(
+                DbVectorielleService.shared().delete_document_chunks,
+                collection_name=collection.vector_name,
+                document_id=doc_id
+            )
+        except Exception as e:
+            logger.error(f"Suppression des chunks du document {doc_id} impossible : {e}")
+        if document is not None:
+            CollectionRepository.delete_document(session=session, document_id=doc_id)
+            session.commit()
+        if file_path.exists():
+            delete_file(file_path=file_path)
+
     @staticmethod
     async def run_insert_doc(
         job_id: str,
         user_id: str,
-        file_path: Path,
+        file_path: Path | str,
         filename: str,
         doc_id: str,
-        collection: CollectionModel,
-        user_ws_manager: UserWebSocketManager
+        collection: CollectionModel | dict,
+        user_ws_manager: UserWebSocketManager,
+        md5: str | None = None,
+        sha256: str | None = None,
+        size: int | None = None
     ):
         """job d'insertion d'un document dans la base de données vectorielles
 
         Args:
             job_id (str): identifiant du job
             user_id (str): identifiant de l'utilisateur créateur du job
-            file_path (str): chemin vers le fichier à insérer
+            file_path (Path | str): chemin vers le fichier à insérer
             filename (str): nom du fichier à insérer
             doc_id (str): identifiant du document à insérer
-            collection (CollectionModel): collection d'insertion
+            collection (CollectionModel | dict): collection d'insertion (dict lorsqu'elle est relue depuis le job)
             ws_manager (UserWebSocketManager): manager des sockets utilisateurs
+            md5 (str | None, optional): hash MD5 calculé lors de l'upload. Defaults to None.
+            sha256 (str | None, optional): hash SHA-256 calculé lors de l'upload. Defaults to None.
+            size (int | None, optional): taille du fichier en octets. Defaults to None.
+
+        Le délai de chaque tentative dépend du nombre de pages du document. Seules les erreurs
+        transitoires (connexion à Ollama, délai dépassé) donnent lieu à une nouvelle tentative.
         """
-        max_attempts = 3
+        file_path = Path(file_path)
+        collection = CollectionModel.model_validate(collection)
+        # Les tentatives successives reprennent au premier étage non terminé
+        checkpoint = JobCheckpoint(job_id)
 
         with SessionLocalSync() as session:
             job = job_repository.get_job(session=session, job_id=job_id)
             if job is None:
                 logger.error(f"Job {job_id} inconnu")
                 raise Exception("Aucun job avec cet identifiant dans la base")
+            max_attempts = job.max_attemps or 3
+            job.page_count = await asyncio.to_thread(ConversionService.page_count, file_path)
+            timeout = InsertionService.insertion_timeout(session=session, page_count=job.page_count)
+            session.commit()
             
             for attempt in range(1, max_attempts + 1):
                 try:
                     job.attemps = attempt
+                    job.started_at = datetime.now()
                     session.commit()
                     await user_ws_manager.send_to_user(
                         user_id=user_id,
@@ -55,13 +218,18 @@ class InsertionService:
                             collection=collection,
                             job_id=job_id,
                             user_id=user_id,
-                            user_ws_manager=user_ws_manager
+                            user_ws_manager=user_ws_manager,
+                            md5=md5,
+                            sha256=sha256,
+                            size=size,
+                            page_count=job.page_count
                         ),
-                        timeout=300
+                        timeout=timeout
                     )
                     job.status = "completed"
                     job.progress = "done"
                     session.commit()
+                    await asyncio.to_thread(checkpoint.clear)
                     await user_ws_manager.send_to_user(
                         user_id=user_id,
                         data=JobOut.model_validate(job)
@@ -69,14 +237,30 @@ class InsertionService:
                     return
 
                 except Exception as e:
-                    if attempt >= max_attempts:
-                        job.error_message = str(e)
+                    session.rollback()
+                    error = f"Délai de {timeout:.0f} s dépassé" if isinstance(e, TimeoutError) else str(e) or type(e).__name__
+                    retryable = is_retryable(e)
+                    if attempt >= max_attempts or not retryable:
+                        if not retryable:
+                            logger.error(f"Job {job_id} : erreur définitive, pas de nouvelle tentative ({error})")
+                        job.status = "failed"
+                        job.progress = "done"
+                        job.error_message = error[:255]
+                        job.finished_at = datetime.now()
                         session.commit()
+                        await asyncio.to_thread(checkpoint.clear)
+                        await InsertionService.discard_document(
+                            session=session,
+                            doc_id=doc_id,
+                            collection=collection,
+                            file_path=file_path
+                        )
                         await user_ws_manager.send_to_user(
                             user_id=user_id,
                             data=JobOut.model_validate(job)
                         )  
                         return
+                    logger.warning(f"Job {job_id} : erreur transitoire, tentative {attempt + 1}/{max_attempts} ({error})")
                     delay = 2 ** attempt
                     job.status = "retrying"
                     session.commit()
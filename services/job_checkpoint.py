@@ -0,0 +1,141 @@
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+from docling_core.types.doc.document import DoclingDocument
+
+from core.config import settings
+from schemas import Chunk
+
+class JobCheckpoint:
+    """Points de reprise d'un job d'insertion
+
+    Les résultats de chaque étage sont enregistrés dans JOB_CHECKPOINT_DIR/{job_id} : document
+    Docling après conversion, chunks après découpage (par segment de pages pour le pipeline
+    d'ingestion) et identifiants des chunks indexés. Une nouvelle tentative du job reprend au
+    premier étage non terminé. Fonctions bloquantes, à exécuter hors de la boucle d'évènements.
+    """
+
+    def __init__(self, job_id: str, root: Path | str = settings.JOB_CHECKPOINT_DIR):
+        self.path = Path(root) / job_id
+
+    @staticmethod
+    def _write(path: Path, content: str):
+        """Ecriture atomique d'un fichier (fichier temporaire renommé)"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        tmp_path.write_text(content, encoding="utf-8")
+        os.replace(tmp_path, path)
+
+    def load_document(self) -> DoclingDocument | None:
+        """Document Docling enregistré après la conversion
+
+        Returns:
+            DoclingDocument | None: document converti, None si la conversion n'est pas terminée
+        """
+        path = self.path / "document.json"
+        if not path.exists():
+            return None
+        return DoclingDocument.model_validate_json(path.read_text(encoding="utf-8"))
+
+    def save_document(self, document: DoclingDocument):
+        """Enregistrement du document Docling converti
+
+        Args:
+            document (DoclingDocument): document converti
+        """
+        self._write(self.path / "document.json", document.model_dump_json())
+
+    def load_chunks(self) -> List[Chunk] | None:
+        """Chunks enregistrés après le découpage du document
+
+        Returns:
+            List[Chunk] | None: chunks du document, None si le découpage n'est pas terminé
+        """
+        path = self.path / "chunks.json"
+        if not path.exists():
+            return None
+        return [Chunk.model_validate(chunk) for chunk in json.loads(path.read_text(encoding="utf-8"))]
+
+    def save_chunks(self, chunks: List[Chunk]):
+        """Enregistrement des chunks du document
+
+        Args:
+            chunks (List[Chunk]): chunks du document
+        """
+        self._write(self.path / "chunks.json", json.dumps([chunk.model_dump() for chunk in chunks]))
+
+    def load_segments(self) -> Dict[Tuple[int, int], Tuple[List[Chunk], str | None, int | None]]:
+        """Segments de pages découpés par le pipeline d'ingestion
+
+        Returns:
+            Dict[Tuple[int, int], Tuple[List[Chunk], str | None, int | None]]: chunks, dernière section et taille du markdown par plage de pages
+        """
+        segments: Dict[Tuple[int, int], Tuple[List[Chunk], str | None, int | None]] = {}
+        for path in (self.path / "segments").glob("*.json"):
+            start, end = (int(page) for page in path.stem.split("-"))
+            content = json.loads(path.read_text(encoding="utf-8"))
+            segments[(start, end)] = (
+                [Chunk.model_validate(chunk) for chunk in content["chunks"]],
+                content["section"],
+                content.get("md_size")
+            )
+        return segments
+
+    def save_segment(
+        self,
+        page_range: Tuple[int, int],
+        chunks: List[Chunk],
+        section: str | None,
+        md_size: int | None = None
+    ):
+        """Enregistrement des chunks d'un segment de pages
+
+        Args:
+            page_range (Tuple[int, int]): plage de pages du segment
+            chunks (List[Chunk]): chunks du segment
+            section (str | None): dernière section du segment, reportée sur le segment suivant
+            md_size (int | None, optional): taille du fichier markdown du document après l'ajout du segment. Defaults to None.
+        """
+        self._write(
+            self.path / "segments" / f"{page_range[0]}-{page_range[1]}.json",
+            json.dumps({
+                "chunks": [chunk.model_dump() for chunk in chunks],
+                "section": section,
+                "md_size": md_size
+            })
+        )
+
+    def clear_segments(self):
+        """Suppression des segments enregistrés (découpage en segments modifié)"""
+        shutil.rmtree(self.path / "segments", ignore_errors=True)
+
+    def indexed_ids(self) -> Set[str]:
+        """Identifiants des chunks déjà indexés
+
+        Returns:
+            Set[str]: identifiants des chunks indexés
+        """
+        path = self.path / "indexed.txt"
+        if not path.exists():
+            return set()
+        # Une ligne incomplète (arrêt pendant l'écriture) est ignorée
+        return {line[:-1] for line in path.read_text(encoding="utf-8").splitlines(keepends=True) if line.endswith("\n")}
+
+    def add_indexed(self, chunk_ids: Iterable[str]):
+        """Ajout des identifiants d'un lot de chunks indexés
+
+        Args:
+            chunk_ids (Iterable[str]): identifiants des chunks indexés
+        """
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / "indexed.txt", "a", encoding="utf-8") as f:
+            f.write("".join(f"{chunk_id}\n" for chunk_id in chunk_ids))
+            f.flush()
+            os.fsync(f.fileno())
+
+    def clear(self):
+        """Suppression des points de reprise du job"""
+        shutil.rmtree(self.path, ignore_errors=True)
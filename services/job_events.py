@@ -0,0 +1,87 @@
+import asyncio
+
+from pydantic import BaseModel
+
+from core.config import settings
+from core.logging import logger
+from dependencies.sqlite_session import SessionLocalSync
+from repositories import job_event_repository
+from .user_websocket_manager import UserWebSocketManager
+
+class JobEventPublisher(UserWebSocketManager):
+    """Publication des messages utilisateurs depuis un worker externe
+
+    Le worker n'a pas accès aux websockets de l'API : les messages sont enregistrés dans la table
+    job_events et relayés par le JobEventRelay de chaque processus API.
+    """
+
+    async def send_to_user(self, user_id: str, data: BaseModel):
+        """Enregistrement d'un message à destination de l'utilisateur
+
+        Args:
+            user_id (str): identifiant de l'utilisateur
+            data (BaseModel): information à envoyer
+        """
+        await self.send_json_to_user(user_id=user_id, data=data.model_dump(mode="json"))
+
+    async def send_json_to_user(self, user_id: str, data: dict):
+        """Enregistrement d'un message déjà sérialisé à destination de l'utilisateur
+
+        Args:
+            user_id (str): identifiant de l'utilisateur
+            data (dict): information à envoyer sous forme de dictionnaire
+        """
+        try:
+            with SessionLocalSync() as session:
+                job_event_repository.add_event(session=session, user_id=user_id, data=data)
+        except Exception as e:
+            logger.error(f"Publication du message pour l'utilisateur {user_id} impossible : {e}")
+
+class JobEventRelay:
+    """Relais des messages publiés par les workers externes vers les websockets de l'API"""
+
+    def __init__(
+        self,
+        user_ws_manager: UserWebSocketManager,
+        poll_interval: float = settings.JOB_EVENT_POLL_SECONDS,
+        retention: float = settings.JOB_EVENT_RETENTION_SECONDS
+    ):
+        self.user_ws_manager = user_ws_manager
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.last_id = 0
+        self.task: asyncio.Task | None = None
+
+    async def start(self):
+        """Démarrage du relais à partir du dernier message enregistré"""
+        if self.task is not None:
+            return
+        with SessionLocalSync() as session:
+            self.last_id = job_event_repository.get_last_event_id(session=session)
+        self.task = asyncio.create_task(self._run(), name="job-event-relay")
+
+    async def stop(self):
+        """Arrêt du relais"""
+        if self.task is None:
+            return
+        self.task.cancel()
+        await asyncio.gather(self.task, return_exceptions=True)
+        self.task = None
+
+    async def _run(self):
+        """Boucle de lecture et de transmission des messages"""
+        cycles_between_cleanups = max(1, int(self.retention / self.poll_interval))
+        cycle = 0
+        while True:
+            try:
+                with SessionLocalSync() as session:
+                    events = job_event_repository.list_events_after(session=session, last_id=self.last_id)
+                    for event in events:
+                        self.last_id = event.id
+                        await self.user_ws_manager.send_json_to_user(user_id=event.user_id, data=event.data)
+                    cycle += 1
+                    if cycle % cycles_between_cleanups == 0:
+                        job_event_repository.cleanup_events(session=session, seconds=self.retention)
+            except Exception as e:
+                logger.error(f"Erreur lors du relais des messages des workers : {e}")
+            await asyncio.sleep(self.poll_interval)
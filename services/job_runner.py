@@ -1,32 +1,460 @@
 import asyncio
-from typing import Callable, Any
+import os
+import socket
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Callable
 
 from core.logging import logger
 from core.config import settings
+from dependencies.sqlite_session import SessionLocalSync
+from repositories import job_repository
+from schemas import JobOut, JobRunnerStatus, LaneStatus, WorkerStatus
+from .user_websocket_manager import UserWebSocketManager
+
+# Files de priorité, de la plus prioritaire à la moins prioritaire
+LANE_QUERY = "query"
+LANE_INSERTION = "insertion"
+LANES = (LANE_QUERY, LANE_INSERTION)
 
 class JobRunner:
+    """Gestionnaire des jobs : pool de workers asynchrones consommant des files de priorité
+
+    Les requêtes utilisateurs sont toujours servies avant les insertions. Une partie des workers
+    (QUERY_RESERVED_WORKERS) est réservée aux requêtes, et un job d'insertion qui attend depuis plus
+    de JOB_AGING_SECONDS passe devant les requêtes pour garantir la progression des insertions.
+
+    Les arguments des jobs sont stockés dans la table jobs : les files en mémoire ne contiennent que
+    des identifiants. Un worker pose un bail sur le job avant de le traiter et le renouvelle tant
+    qu'il s'exécute ; les jobs non terminés dont le bail a expiré sont remis en file.
+
+    En mode JOB_EXECUTION_MODE=external, l'API ne fait qu'enregistrer les jobs (execute=False) et
+    les processus lancés par `python -m worker` les récupèrent en interrogeant la table jobs.
+    """
 
-    def __init__(self):
-        self.queue = asyncio.Queue()
+    def __init__(
+        self,
+        user_ws_manager: UserWebSocketManager,
+        max_workers: int = settings.MAX_WORKER,
+        reserved_query_workers: int = settings.QUERY_RESERVED_WORKERS,
+        aging_seconds: float = settings.JOB_AGING_SECONDS,
+        lease_seconds: float = settings.JOB_LEASE_SECONDS,
+        poll_interval: float | None = None,
+        execute: bool = True
+    ):
+        self.user_ws_manager = user_ws_manager
+        self.execute = execute
+        # Intervalle de recherche des jobs à reprendre dans la base (par défaut la durée du bail).
+        # Un worker externe qui interroge la base ne prend que les jobs qu'il peut traiter tout de suite
+        self.polling = poll_interval is not None
+        self.poll_interval = poll_interval or lease_seconds
+        self.max_workers = max(1, max_workers)
+        # Au moins un worker doit rester disponible pour les insertions
+        self.reserved_query_workers = max(0, min(reserved_query_workers, self.max_workers - 1))
+        if self.reserved_query_workers < reserved_query_workers:
+            logger.warning(
+                f"{self.reserved_query_workers} worker(s) réservé(s) aux requêtes sur {reserved_query_workers} demandé(s) :"
+                f" MAX_WORKER={self.max_workers} doit dépasser QUERY_RESERVED_WORKERS"
+            )
+        self.aging_seconds = aging_seconds
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.handlers: dict[str, tuple[Callable, str]] = {}
+        self.queues: dict[str, deque] = {lane: deque() for lane in LANES}
+        self.enqueued: set[str] = set()
+        self.condition = asyncio.Condition()
         self.running = False
-        self.semaphore = asyncio.Semaphore(settings.MAX_WORKER)
+        self.accepting = False
+        self.pending = 0
+        self.idle = asyncio.Event()
+        self.idle.set()
+        self.workers: list[asyncio.Task] = []
+        self.reaper: asyncio.Task | None = None
+        self.states: dict[int, WorkerStatus] = {}
+        self.lane_stats: dict[str, LaneStatus] = {lane: LaneStatus(lane=lane) for lane in LANES}
+
+    def register(self, job_type: str, handler: Callable, lane: str = LANE_INSERTION):
+        """Enregistrement de la coroutine traitant un type de job
+
+        La coroutine reçoit job_id, user_id, user_ws_manager et les arguments stockés dans le job.
+
+        Args:
+            job_type (str): type de job (colonne type de la table jobs)
+            handler (Callable): coroutine de traitement
+            lane (str, optional): file de priorité du type de job. Defaults to LANE_INSERTION.
+
+        Raises:
+            ValueError: file de priorité inconnue
+        """
+        if lane not in self.queues:
+            raise ValueError(f"File de priorité inconnue : {lane}")
+        self.handlers[job_type] = (handler, lane)
 
     async def start(self):
+        """Démarrage des workers (un par slot défini par MAX_WORKER) et reprise des jobs interrompus"""
         if self.running:
             return
-        
+
+        self.accepting = True
+        if not self.execute:
+            logger.info("JobRunner en mode externe : les jobs sont traités par les processus worker")
+            return
         self.running = True
 
+        for worker_id in range(self.max_workers):
+            lanes = [LANE_QUERY] if worker_id < self.reserved_query_workers else list(LANES)
+            self.states[worker_id] = WorkerStatus(worker_id=worker_id, lanes=lanes)
+            self.workers.append(
+                asyncio.create_task(self._worker(worker_id), name=f"job-worker-{worker_id}")
+            )
+        self.reaper = asyncio.create_task(self._reaper(), name="job-reaper")
+        logger.info(
+            f"JobRunner {self.owner} démarré avec {self.max_workers} worker(s) "
+            f"dont {self.reserved_query_workers} réservé(s) aux requêtes"
+        )
+
+    async def recover(self) -> int:
+        """Remise en file des jobs non terminés sans bail valide (jobs interrompus ou soumis par un
+        autre processus). En mode polling, dans la limite des workers disponibles.
+
+        Returns:
+            int: nombre de jobs remis en file
+        """
+        count = 0
+        capacity = self.max_workers - self.pending if self.polling else None
+        with SessionLocalSync() as session:
+            jobs = []
+            # Les files les plus prioritaires sont servies en premier
+            for lane in LANES:
+                remaining = None if capacity is None else capacity - len(jobs)
+                if remaining is not None and remaining <= 0:
+                    break
+                types = [job_type for job_type, (_, job_lane) in self.handlers.items() if job_lane == lane]
+                if types:
+                    jobs.extend(job_repository.list_recoverable_jobs(
+                        session=session,
+                        types=types,
+                        limit=remaining
+                    ))
+            for job in jobs:
+                if job.id in self.enqueued:
+                    continue
+                if job.payload is None:
+                    # Job antérieur au stockage des arguments : il ne peut pas être rejoué
+                    job_repository.fail_job(
+                        session=session,
+                        job_id=job.id,
+                        message="Job interrompu par l'arrêt de l'application"
+                    )
+                    continue
+                if await self._enqueue(job_id=job.id, job_type=job.type):
+                    count += 1
+        if count:
+            logger.info(f"JobRunner: {count} job(s) mis en file depuis la base")
+        return count
+
+    async def _reaper(self):
+        """Reprise périodique des jobs en attente ou dont le bail a expiré"""
         while True:
-            job_func, kwargs = await self.queue.get()
+            try:
+                await self.recover()
+            except Exception as e:
+                logger.error(f"Erreur lors de la reprise des jobs interrompus : {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _next_job(self, lanes: list[str]) -> tuple[str, float, str, str] | None:
+        """Sélection du prochain job à exécuter parmi les files autorisées
+
+        Args:
+            lanes (list[str]): files consommées par le worker
+
+        Returns:
+            tuple[str, float, str, str] | None: file, date de mise en attente, identifiant et type du job
+        """
+        now = time.monotonic()
+        candidates = [lane for lane in lanes if self.queues[lane]]
+        if not candidates:
+            return None
+
+        # Vieillissement : le job ayant dépassé le délai d'attente le plus ancien est prioritaire
+        aged = [
+            lane for lane in candidates
+            if now - self.queues[lane][0][0] >= self.aging_seconds
+        ]
+        if aged:
+            lane = min(aged, key=lambda name: self.queues[name][0][0])
+        else:
+            lane = candidates[0]
+
+        enqueued_at, job_id, job_type = self.queues[lane].popleft()
+        return lane, enqueued_at, job_id, job_type
+
+    async def _worker(self, worker_id: int):
+        """Boucle de consommation d'un worker
+
+        Args:
+            worker_id (int): identifiant du worker
+        """
+        state = self.states[worker_id]
+        while True:
+            async with self.condition:
+                job = self._next_job(state.lanes)
+                while job is None:
+                    await self.condition.wait()
+                    job = self._next_job(state.lanes)
+            lane, enqueued_at, job_id, job_type = job
+
+            wait_time = time.monotonic() - enqueued_at
+            stats = self.lane_stats[lane]
+            stats.depth = len(self.queues[lane])
+            stats.started += 1
+            stats.total_wait += wait_time
+            stats.max_wait = max(stats.max_wait, wait_time)
+
+            state.state = "busy"
+            state.lane = lane
+            state.job_id = job_id
+            state.job_type = job_type
+            state.started_at = datetime.now()
+            try:
+                if await self._run(job_id=job_id, job_type=job_type):
+                    state.processed += 1
+            except Exception as e:
+                state.failed += 1
+                logger.error(f"Erreur lors de l'exécution du Job (worker {worker_id}): {e}")
+            finally:
+                state.state = "idle"
+                state.lane = None
+                state.job_id = None
+                state.job_type = None
+                state.started_at = None
+                self.enqueued.discard(job_id)
+                self.pending -= 1
+                if self.pending == 0:
+                    self.idle.set()
 
+    async def _run(self, job_id: str, job_type: str) -> bool:
+        """Exécution d'un job sous bail
+
+        Args:
+            job_id (str): identifiant du job
+            job_type (str): type du job
+
+        Returns:
+            bool: False si le job est déjà pris en charge par un autre worker
+        """
+        handler, _ = self.handlers[job_type]
+        with SessionLocalSync() as session:
+            claimed = job_repository.claim_job(
+                session=session,
+                job_id=job_id,
+                owner=self.owner,
+                lease_seconds=self.lease_seconds
+            )
+            if not claimed:
+                logger.info(f"Job {job_id} déjà pris en charge ou terminé")
+                return False
+            job = job_repository.get_job(session=session, job_id=job_id)
+            if job is None:
+                return False
+            user_id = job.user_id
+            payload = dict(job.payload or {})
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            await handler(
+                job_id=job_id,
+                user_id=user_id,
+                user_ws_manager=self.user_ws_manager,
+                **payload
+            )
+        except asyncio.CancelledError:
+            # Arrêt du worker : le job conserve son statut et sera repris au prochain démarrage
+            self._release(job_id=job_id, interrupted=True)
+            raise
+        except Exception as e:
+            self._release(job_id=job_id, error=str(e))
+            await self._refresh_parent(job_id)
+            raise
+        else:
+            self._release(job_id=job_id)
+            await self._refresh_parent(job_id)
+        finally:
+            heartbeat.cancel()
+        return True
+
+    async def _refresh_parent(self, job_id: str):
+        """Mise à jour et notification de l'avancement du job parent d'un job terminé
+
+        Args:
+            job_id (str): identifiant du job terminé
+        """
+        try:
+            with SessionLocalSync() as session:
+                parent = job_repository.refresh_parent_job(session=session, job_id=job_id)
+                if parent is None:
+                    return
+                await self.user_ws_manager.send_to_user(
+                    user_id=parent.user_id,
+                    data=JobOut.model_validate(parent)
+                )
+        except Exception as e:
+            logger.error(f"Mise à jour du job parent du job {job_id} impossible : {e}")
+
+    async def _heartbeat(self, job_id: str):
+        """Renouvellement périodique du bail d'un job en cours
+
+        Args:
+            job_id (str): identifiant du job
+        """
+        while True:
+            await asyncio.sleep(settings.JOB_HEARTBEAT_SECONDS)
             try:
-                await job_func(**kwargs)
+                with SessionLocalSync() as session:
+                    job_repository.renew_lease(
+                        session=session,
+                        job_id=job_id,
+                        owner=self.owner,
+                        lease_seconds=self.lease_seconds
+                    )
             except Exception as e:
-                print(f"Job error: {e}")
-                logger.error(f"Erreur lors de l'exécution du Job: {e}")
+                logger.warning(f"Renouvellement du bail du job {job_id} impossible : {e}")
+
+    def _release(self, job_id: str, error: str | None = None, interrupted: bool = False):
+        """Libération du bail d'un job
+
+        Args:
+            job_id (str): identifiant du job
+            error (str | None, optional): erreur levée par le job. Defaults to None.
+            interrupted (bool, optional): traitement interrompu. Defaults to False.
+        """
+        try:
+            with SessionLocalSync() as session:
+                job_repository.release_job(
+                    session=session,
+                    job_id=job_id,
+                    owner=self.owner,
+                    error=error,
+                    interrupted=interrupted
+                )
+        except Exception as e:
+            logger.error(f"Libération du bail du job {job_id} impossible : {e}")
+
+    async def _enqueue(self, job_id: str, job_type: str) -> bool:
+        """Ajout d'un job dans sa file de priorité
+
+        Args:
+            job_id (str): identifiant du job
+            job_type (str): type du job
+
+        Returns:
+            bool: False si le job est déjà en file ou en cours dans ce processus
+        """
+        if job_id in self.enqueued:
+            return False
+        lane = self.handlers[job_type][1]
+        async with self.condition:
+            self.queues[lane].append((time.monotonic(), job_id, job_type))
+            self.enqueued.add(job_id)
+            self.lane_stats[lane].submitted += 1
+            self.lane_stats[lane].depth = len(self.queues[lane])
+            self.pending += 1
+            self.idle.clear()
+            self.condition.notify_all()
+        return True
+
+    async def submit(self, job_id: str, job_type: str):
+        """Mise en attente d'un job créé dans la base avec ses arguments
+
+        Args:
+            job_id (str): identifiant du job
+            job_type (str): type du job
+
+        Raises:
+            RuntimeError: le gestionnaire n'accepte plus de nouveaux jobs
+            ValueError: type de job inconnu
+        """
+        if not self.accepting:
+            raise RuntimeError("Le gestionnaire de jobs n'accepte pas de nouveaux jobs")
+        if job_type not in self.handlers:
+            raise ValueError(f"Type de job inconnu : {job_type}")
+        if not self.execute:
+            # Le job est déjà enregistré en base : un worker externe le prendra en charge
+            return
+        await self._enqueue(job_id=job_id, job_type=job_type)
+
+    async def drain(self, timeout: float | None = None) -> bool:
+        """Attente de la fin des jobs en cours et en attente, sans en accepter de nouveaux
+
+        Args:
+            timeout (float | None, optional): durée maximale d'attente en secondes. Defaults to None.
+
+        Returns:
+            bool: True si les files ont été entièrement vidées
+        """
+        self.accepting = False
+        if self.reaper is not None:
+            self.reaper.cancel()
+        try:
+            await asyncio.wait_for(self.idle.wait(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(
+                f"JobRunner: {self.pending} job(s) encore en attente ou en cours à l'arrêt, "
+                "ils seront repris au prochain démarrage"
+            )
+            return False
+
+    async def stop(self, drain: bool = True, timeout: float | None = settings.JOB_DRAIN_TIMEOUT):
+        """Arrêt des workers
+
+        Args:
+            drain (bool, optional): attendre la fin des jobs avant l'arrêt. Defaults to True.
+            timeout (float | None, optional): durée maximale de l'attente. Defaults to settings.JOB_DRAIN_TIMEOUT.
+        """
+        self.accepting = False
+        if not self.running:
+            return
+
+        if drain:
+            await self.drain(timeout=timeout)
+
+        tasks = list(self.workers)
+        if self.reaper is not None:
+            tasks.append(self.reaper)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.workers.clear()
+        self.reaper = None
+        self.running = False
+        logger.info("JobRunner arrêté")
+
+    def status(self) -> JobRunnerStatus:
+        """État du gestionnaire de jobs
 
-            self.queue.task_done()
+        Returns:
+            JobRunnerStatus: état des files de priorité et des workers
+        """
+        now = time.monotonic()
+        workers = [state.model_copy() for state in self.states.values()]
+        lanes: list[LaneStatus] = []
+        for lane, queue in self.queues.items():
+            stats = self.lane_stats[lane].model_copy()
+            stats.depth = len(queue)
+            stats.oldest_wait = now - queue[0][0] if queue else 0.0
+            stats.avg_wait = stats.total_wait / stats.started if stats.started else 0.0
+            lanes.append(stats)
 
-    async def submit(self, job_func: Callable, **kwargs: Any):
-        await self.queue.put((job_func, kwargs))
\ No newline at end of file
+        return JobRunnerStatus(
+            running=self.running,
+            accepting=self.accepting,
+            max_workers=self.max_workers,
+            reserved_query_workers=self.reserved_query_workers,
+            busy_workers=len([w for w in workers if w.state == "busy"]),
+            queue_size=sum(len(queue) for queue in self.queues.values()),
+            lanes=lanes,
+            workers=workers
+        )
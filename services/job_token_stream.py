@@ -0,0 +1,59 @@
+import time
+
+from core.config import settings
+from schemas import JobTokenOut
+from .user_websocket_manager import UserWebSocketManager
+
+class JobTokenStream:
+    """Transmission à l'utilisateur des tokens générés pour un job de requête
+
+    Les tokens reçus d'Ollama sont regroupés et envoyés au plus toutes les `interval` secondes,
+    un message par token saturant les websockets (et la table job_events en mode external).
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        user_id: str,
+        user_ws_manager: UserWebSocketManager,
+        interval: float = settings.TOKEN_STREAM_INTERVAL
+    ):
+        self.job_id = job_id
+        self.user_id = user_id
+        self.user_ws_manager = user_ws_manager
+        self.interval = max(0.0, interval)
+        self.buffer: list[str] = []
+        self.index = 0
+        self.last_flush = time.monotonic()
+
+    async def push(self, delta: str):
+        """Ajout d'un token généré, envoyé avec les précédents si l'intervalle est écoulé
+
+        Args:
+            delta (str): texte généré
+        """
+        if delta:
+            self.buffer.append(delta)
+        if self.buffer and time.monotonic() - self.last_flush >= self.interval:
+            await self.flush()
+
+    async def flush(self, done: bool = False):
+        """Envoi des tokens en attente
+
+        Args:
+            done (bool, optional): dernier message de la génération. Defaults to False.
+        """
+        if not self.buffer and not done:
+            return
+        await self.user_ws_manager.send_to_user(
+            user_id=self.user_id,
+            data=JobTokenOut(
+                job_id=self.job_id,
+                index=self.index,
+                delta="".join(self.buffer),
+                done=done
+            )
+        )
+        self.index += 1
+        self.buffer.clear()
+        self.last_flush = time.monotonic()
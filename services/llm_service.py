@@ -1,9 +1,9 @@
-import os
-from typing import List
+from typing import Dict, List
 
+import httpx
 from chromadb import Metadata
 from dotenv import load_dotenv
-from ollama import Client, GenerateResponse
+from ollama import Client, GenerateResponse, ListResponse
 
 from core.exceptions import OllamaError, RAGException
 from schemas import Model
@@ -15,51 +15,79 @@ load_dotenv()
 class LlmService:
     """_summary_Service pour l'interrogation du LLM"""
 
-    def __init__(self):
-        self.llm_client = Client(os.environ.get("OLLAMA_BASE_URL"))
+    _shared: "LlmService | None" = None
+    _clients: Dict[str, Client] = {}
 
-    def vectordb_query(self, query: str, model: str = settings.LLM_MODEL) -> str:
-        """Restructuration de la requête pour interrogation de la base de données vectorielle
+    def __init__(self, llm_client: Client | None = None):
+        self.llm_client = llm_client or LlmService.shared_client()
+
+    @classmethod
+    def shared_client(cls, host: str = settings.OLLAMA_URL) -> Client:
+        """Client Ollama partagé par le processus
+
+        Les connexions HTTP vers Ollama sont conservées entre les requêtes (keep-alive) et
+        partagées par les jobs, les routes et le calcul des embeddings.
 
         Args:
-            query (str): la requête à reformuler
-            model (Optional(str)): le modèle à utiliser par défaut celui présent dans le fichier config
+            host (str, optional): url du serveur Ollama. Defaults to settings.OLLAMA_URL.
 
         Returns:
-            str: la requête à appliquer pour effectuer la recherche vectorielle
+            Client: client Ollama
         """
-        try:
-            reponse = self.llm_client.generate(
-                model=model,
-                prompt=f"""
-                Tu es un assistant spécialisé en recherche sémantique sur base de données vectorielle.
-
-                Objectif :
-                Reformuler la requête utilisateur afin de maximiser la pertinence des résultats retournés par une recherche vectorielle.
-
-                Instructions :
-                - Retourne la réponse en langue française
-                - Reformule la requête de manière claire, concise et factuelle
-                - Supprime les éléments conversationnels ou subjectifs
-                - Conserve uniquement l’intention informationnelle
-                - Ajoute des synonymes ou termes proches si cela améliore la couverture sémantique
-                - Ne pose pas de questions
-                - Ne donne aucune explication
-                - Ne réponds pas à la requête, reformule-la uniquement
-
-                Requête utilisateur :
-                "{query}"
-                """,
-                think=False,
-                options={"temperature": 0}
+        if host not in cls._clients:
+            cls._clients[host] = Client(
+                host=host,
+                limits=httpx.Limits(
+                    max_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OLLAMA_MAX_CONNECTIONS,
+                    keepalive_expiry=settings.OLLAMA_KEEPALIVE_EXPIRY
+                )
             )
+        return cls._clients[host]
 
-            return reponse.response
-        
-        except Exception as e:
-            raise OllamaError("Erreur Ollama lors de la création de la requête d'interrogation de la base vectorielle", str(e))
-        
-    def __define_context(self, docs: List[str], metadatas: List[Metadata]) -> str:
+    @classmethod
+    def shared(cls) -> "LlmService":
+        """Service LLM partagé par le processus
+
+        Returns:
+            LlmService: service LLM
+        """
+        if cls._shared is None:
+            cls._shared = cls()
+        return cls._shared
+
+    @staticmethod
+    def vectordb_query_prompt(query: str) -> str:
+        """Prompt de reformulation de la requête pour la recherche vectorielle
+
+        Args:
+            query (str): la requête à reformuler
+
+        Returns:
+            str: prompt à envoyer au LLM
+        """
+        return f"""
+        Tu es un assistant spécialisé en recherche sémantique sur base de données vectorielle.
+
+        Objectif :
+        Reformuler la requête utilisateur afin de maximiser la pertinence des résultats retournés par une recherche vectorielle.
+
+        Instructions :
+        - Retourne la réponse en langue française
+        - Reformule la requête de manière claire, concise et factuelle
+        - Supprime les éléments conversationnels ou subjectifs
+        - Conserve uniquement l’intention informationnelle
+        - Ajoute des synonymes ou termes proches si cela améliore la couverture sémantique
+        - Ne pose pas de questions
+        - Ne donne aucune explication
+        - Ne réponds pas à la requête, reformule-la uniquement
+
+        Requête utilisateur :
+        "{query}"
+        """
+
+    @staticmethod
+    def define_context(docs: List[str], metadatas: List[Metadata]) -> str:
         """ Définition du contexte à partir des chunks fournis par la base vectorielle
 
         Args:
@@ -71,28 +99,164 @@ class LlmService:
         """
         try:
             context_blocks = []
+            for idx, (doc, metadata) in enumerate(zip(docs, metadatas), start=1):
+                filename = metadata.get('filename') or "source inconnue"
+                section = metadata.get('section') or "section non precisée"
+                pages = metadata.get('pages') or "non spécifiées"
+
+                block = f"""Source {idx}
+                Fichier : {filename}
+                Section : {section}
+                Pages: {pages}
+                Contenu :
+                {doc.strip()}
+                """
+                context_blocks.append(block)
+            return "\n\n".join(context_blocks)
 
-            if len(docs):
-                for idx, doc in enumerate(docs, start=1):
-                    filename = metadatas[idx].get('filename') or "source inconnue"
-                    section = metadatas[idx].get('section') or "section non precisée"
-                    pages = metadatas[idx].get('pages') or "non spécifiées"
-
-                    block = f"""Source {idx}
-                    Fichier : {filename}
-                    Section : {section}
-                    Pages: {pages}
-                    Contenu :
-                    {doc.strip()}
-                    """
-                    context_blocks.append(block)
-                    full_context = "\n\n".join(context_blocks)
-                    return full_context
-            
-            return str()
-        
         except Exception as e:
             raise RAGException("Erreur Ollama lors de la création du contexte", str(e))
+
+    @staticmethod
+    def answer_prompt(docs: List[str], metadatas: List[Metadata], query: str) -> str:
+        """Prompt de génération de la réponse à partir des chunks retournés par la base vectorielle
+
+        Args:
+            docs (List[str]): la liste des chunks à insérer dans le contexte
+            metadatas (List[Metadata]): liste des metadatas liés au chunks
+            query (str): la requête de l'utilisateur
+
+        Returns:
+            str: prompt à envoyer au LLM
+        """
+        context = LlmService.define_context(docs=docs, metadatas=metadatas)
+        return f"""
+        Tu es un moteur de réponse factuelle dans un système RAG.
+
+        CONTRAINTES ABSOLUES :
+        - Toute phrase de la réponse DOIT être justifiée par au moins une source du contexte
+        - Si une information ne peut pas être justifiée, elle DOIT être omise
+        - Il est interdit d’inférer, de déduire ou de compléter une information absente
+        - Les sources doivent correspondre exactement aux métadonnées fournies
+        - Si aucune source n’est applicable, retourne :
+        {{
+            "answer": "Aucune donnée trouvée permettant de répondre à la question posée",
+            "sources": []
+        }}
+
+        FORMAT DE SORTIE STRICT (JSON UNIQUEMENT) :
+        {{
+            "answer": "...",
+            "sources": [
+                {{
+                    "filename": "...",
+                    "section": "...",
+                    "pages": [...]
+                }}
+            ]
+        }}
+
+        CONTEXTE DOCUMENTAIRE :
+        {context}
+
+        QUESTION :
+        {query}
+
+        RÉPONSE JSON :
+        """
+
+    @staticmethod
+    def rerank_prompt(query: str, chunks: list[str]) -> str:
+        """Prompt de reranking des chunks
+
+        Args:
+            query (str): la requête initiale de l'utilisateur
+            chunks (list[str]): liste de chuncks à réordonner
+
+        Returns:
+            str: prompt à envoyer au LLM
+        """
+        chunks_text = "\n\n".join(
+            f"[{i}] {doc}"
+            for i, doc in enumerate(chunks)
+        )
+        return f"""
+        Tu es un moteur de reranking pour un système RAG.
+
+        Question utilisateur :
+        {query}
+
+        Voici des extraits de documents numérotés.
+        Classe-les par ordre de pertinence pour répondre à la question.
+        Réponds uniquement par une liste d’indices séparés par des virgules.
+
+        Extraits :
+        {chunks_text}
+
+        Classement :
+        """.strip()
+
+    @staticmethod
+    def parse_ranking(response: str) -> list[int]:
+        """Lecture du classement retourné par le LLM
+
+        Args:
+            response (str): réponse du LLM (indices séparés par des virgules)
+
+        Returns:
+            list[int]: indices des chunks par ordre de pertinence
+        """
+        return [
+            int(i.strip())
+            for i in response.split(",")
+            if i.strip().isdigit()
+        ]
+
+    @staticmethod
+    def to_models(liste: ListResponse) -> list[Model]:
+        """Conversion de la liste des modèles retournée par Ollama
+
+        Args:
+            liste (ListResponse): modèles disponibles sur le serveur Ollama
+
+        Returns:
+            list[Model]: liste des modèles
+        """
+        models: List[Model] = []
+        for model in liste.models:
+            nom = model.model
+            if model.model is not None:
+                embed = True if "embed" in model.model else False
+            else:
+                embed = False
+            models.append(Model(
+                nom=nom,
+                embed=embed
+            ))
+        return models
+
+    def vectordb_query(self, query: str, model: str = settings.LLM_MODEL) -> str:
+        """Restructuration de la requête pour interrogation de la base de données vectorielle
+
+        Args:
+            query (str): la requête à reformuler
+            model (Optional(str)): le modèle à utiliser par défaut celui présent dans le fichier config
+
+        Returns:
+            str: la requête à appliquer pour effectuer la recherche vectorielle
+        """
+        try:
+            reponse = self.llm_client.generate(
+                model=model,
+                prompt=LlmService.vectordb_query_prompt(query),
+                think=False,
+                options={"temperature": 0}
+            )
+
+            return reponse.response
+        
+        except Exception as e:
+            raise OllamaError("Erreur Ollama lors de la création de la requête d'interrogation de la base vectorielle", str(e))
         
     def create_answer(
             self, 
@@ -116,43 +280,9 @@ class LlmService:
         """
 
         try:
-            context = self.__define_context(docs=docs, metadatas=metadatas)
             return self.llm_client.generate(
                 model=model,
-                prompt=f"""
-                Tu es un moteur de réponse factuelle dans un système RAG.
-
-                CONTRAINTES ABSOLUES :
-                - Toute phrase de la réponse DOIT être justifiée par au moins une source du contexte
-                - Si une information ne peut pas être justifiée, elle DOIT être omise
-                - Il est interdit d’inférer, de déduire ou de compléter une information absente
-                - Les sources doivent correspondre exactement aux métadonnées fournies
-                - Si aucune source n’est applicable, retourne :
-                {{
-                    "answer": "Aucune donnée trouvée permettant de répondre à la question posée",
-                    "sources": []
-                }}
-
-                FORMAT DE SORTIE STRICT (JSON UNIQUEMENT) :
-                {{
-                    "answer": "...",
-                    "sources": [
-                        {{
-                            "filename": "...",
-                            "section": "...",
-                            "pages": [...]
-                        }}
-                    ]
-                }}
-
-                CONTEXTE DOCUMENTAIRE :
-                {context}
-
-                QUESTION :
-                {query}
-
-                RÉPONSE JSON :
-                """,
+                prompt=LlmService.answer_prompt(docs=docs, metadatas=metadatas, query=query),
                 think=False,
                 options={"temperature": 0}
             )
@@ -175,38 +305,12 @@ class LlmService:
         """
         
         try: 
-            chunks_text = "\n\n".join(
-                f"[{i}] {doc}"
-                for i, doc in enumerate(chunks)
-            )
-
-            prompt = f"""
-            Tu es un moteur de reranking pour un système RAG.
-
-            Question utilisateur :
-            {query}
-
-            Voici des extraits de documents numérotés.
-            Classe-les par ordre de pertinence pour répondre à la question.
-            Réponds uniquement par une liste d’indices séparés par des virgules.
-
-            Extraits :
-            {chunks_text}
-
-            Classement :
-            """.strip()
-
             response = self.llm_client.generate(
                 model=settings.LLM_MODEL,
-                prompt=prompt,
+                prompt=LlmService.rerank_prompt(query=query, chunks=chunks),
                 options={"temperature": 0}
             )
-
-            return [
-                int(i.strip())
-                for i in response["response"].split(",")
-                if i.strip().isdigit()
-            ]
+            return LlmService.parse_ranking(response["response"])
         
         except Exception as e:
             raise OllamaError("Erreur Ollama lors du reranking des chunks", str(e))
@@ -221,19 +325,7 @@ class LlmService:
             ListResponse: Liste des modèles disponibles
         """
         try:
-            liste = self.llm_client.list()
-            models: List[Model] = []
-            for model in liste.models:
-                nom = model.model
-                if model.model is not None:
-                    embed = True if "embed" in model.model else False
-                else:
-                    embed = False
-                models.append(Model(
-                    nom=nom,
-                    embed=embed
-                ))
-            return models
+            return LlmService.to_models(self.llm_client.list())
         
         except Exception as e:
             raise OllamaError("Erreur Ollama lors de la récupération des modèles", str(e))
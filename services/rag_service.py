@@ -0,0 +1,361 @@
+import asyncio
+import json
+import uuid
+from datetime import datetime
+from typing import Any, AsyncIterator, List, Tuple
+
+from ollama import GenerateResponse
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.exceptions import RAGException
+from core.logging import logger
+from dependencies.sqlite_session import SessionLocalSync
+from repositories import job_repository
+from repositories.query_repository import create_query
+from schemas import CollectionModel
+from .answer_cache_service import AnswerCacheService
+from .async_llm_service import AsyncLlmService
+from .db_vectorielle_service import DbVectorielleService
+from .job_service import JobService
+
+# Evènement du traitement d'une requête : ("stage", étape), ("token", texte généré) ou ("answer", réponse)
+RagEvent = Tuple[str, Any]
+
+# Réponse enregistrée lorsqu'aucun document ne correspond à la requête
+NO_DOCUMENT_ANSWER = "Aucune donnée trouvée permettant de répondre à la question posée"
+NO_DOCUMENT_REASON = "Aucun document trouvé"
+
+# Libellés des étapes dans les logs des jobs
+STAGE_LOGS = {
+    "cache": "Réponse lue dans le cache",
+    "query reformulation": "Reformulation de la requête",
+    "query database": "Interrogation de la base vectorielle",
+    "reranking": "Reranking des documents",
+    "generation answer": "Interrogation du LLM"
+}
+
+class RagService:
+    """Chaîne de traitement d'une requête : reformulation, recherche vectorielle, reranking et génération
+
+    La chaîne est partagée par les jobs de requête (réponse transmise par websocket) et par la
+    route de streaming SSE qui répond dans la requête HTTP, sans passer par la file des jobs.
+    """
+
+    _stream_slots: asyncio.Semaphore | None = None
+
+    @staticmethod
+    def no_document_response(model: str) -> GenerateResponse:
+        """Réponse retournée lorsqu'aucun document ne correspond à la requête
+
+        Args:
+            model (str): modèle demandé
+
+        Returns:
+            GenerateResponse: réponse sans génération
+        """
+        return GenerateResponse(
+            model=model,
+            created_at=datetime.now().isoformat(),
+            done=False,
+            done_reason=NO_DOCUMENT_REASON,
+            total_duration=0,
+            load_duration=0,
+            prompt_eval_count=0,
+            prompt_eval_duration=0,
+            eval_count=0,
+            eval_duration=0,
+            response=json.dumps({"answer": NO_DOCUMENT_ANSWER, "sources": []}, ensure_ascii=False)
+        )
+
+    @staticmethod
+    def answer_text(response: GenerateResponse) -> str:
+        """Réponse à enregistrer dans la table des requêtes
+
+        Args:
+            response (GenerateResponse): réponse de la chaîne de traitement
+
+        Returns:
+            str: texte de la réponse
+        """
+        return NO_DOCUMENT_ANSWER if response.done_reason == NO_DOCUMENT_REASON else (response.response or "")
+
+    @staticmethod
+    async def answer(query: str, model: str, collection: CollectionModel) -> AsyncIterator[RagEvent]:
+        """Traitement d'une requête, les étapes et les tokens générés étant transmis au fil de l'eau
+
+        Une réponse du cache sémantique de la collection est retournée (en un seul token) sans
+        interroger le LLM ; une réponse générée est ajoutée au cache.
+
+        Args:
+            query (str): requête de l'utilisateur
+            model (str): modèle utilisé pour la génération
+            collection (CollectionModel): collection interrogée
+
+        Yields:
+            RagEvent: étape atteinte, token généré puis réponse complète
+        """
+        llm_service = AsyncLlmService.shared()
+        db_vector_service = DbVectorielleService.shared()
+        collection_version = collection.version or 0
+
+        question_embedding: List[float] | None = None
+        if AnswerCacheService.enabled():
+            try:
+                question_embedding = (await asyncio.to_thread(db_vector_service.embed_documents, [query]))[0]
+                cached = await asyncio.to_thread(
+                    AnswerCacheService.lookup,
+                    collection_id=collection.id,
+                    collection_version=collection_version,
+                    model=model,
+                    embedding=question_embedding
+                )
+            except Exception as e:
+                logger.error(f"Lecture du cache des réponses impossible : {e}")
+                cached = None
+            if cached is not None:
+                yield ("stage", "cache")
+                yield ("token", cached.response)
+                yield ("answer", cached)
+                return
+
+        yield ("stage", "query reformulation")
+        vectordb_query = await llm_service.vectordb_query(query=query, model=model)
+
+        yield ("stage", "query database")
+        result = await db_vector_service.query_collection_async(
+            query=vectordb_query,
+            collection_name=collection.vector_name
+        )
+        documents = result.get("documents")
+        metadatas = result.get("metadatas")
+        if (
+            not documents
+            or not documents[0]
+            or not metadatas
+            or not metadatas[0]
+        ):
+            yield ("answer", RagService.no_document_response(model))
+            return
+
+        yield ("stage", "reranking")
+        documents = documents[0]
+        metadatas = metadatas[0]
+        ranking = await llm_service.rerank_chunks_llm(query=query, chunks=documents)
+        reranked_docs = [documents[idx] for idx in ranking if idx < len(documents)]
+        reranked_metas = [metadatas[idx] for idx in ranking if idx < len(documents)]
+
+        yield ("stage", "generation answer")
+        tokens: asyncio.Queue = asyncio.Queue()
+        generation = asyncio.ensure_future(llm_service.create_answer(
+            docs=reranked_docs,
+            metadatas=reranked_metas,
+            query=query,
+            model=model,
+            on_token=tokens.put
+        ))
+        generation.add_done_callback(lambda _: tokens.put_nowait(None))
+        try:
+            while (delta := await tokens.get()) is not None:
+                yield ("token", delta)
+            response = generation.result()
+        finally:
+            generation.cancel()
+
+        if question_embedding is not None:
+            try:
+                await asyncio.to_thread(
+                    AnswerCacheService.store,
+                    collection_id=collection.id,
+                    collection_version=collection_version,
+                    model=model,
+                    question=query,
+                    embedding=question_embedding,
+                    response=response
+                )
+            except Exception as e:
+                logger.error(f"Enregistrement de la réponse dans le cache impossible : {e}")
+        yield ("answer", response)
+
+    @staticmethod
+    def stream_slots() -> asyncio.Semaphore:
+        """Places de traitement des requêtes en streaming du processus
+
+        Returns:
+            asyncio.Semaphore: places disponibles
+        """
+        if RagService._stream_slots is None:
+            RagService._stream_slots = asyncio.Semaphore(max(1, settings.QUERY_STREAM_CONCURRENCY))
+        return RagService._stream_slots
+
+    @staticmethod
+    async def acquire_stream_slot() -> bool:
+        """Réservation d'une place de traitement en streaming, sans attente
+
+        Returns:
+            bool: True si une place a été réservée, False si toutes les places sont occupées
+        """
+        slots = RagService.stream_slots()
+        if slots.locked():
+            return False
+        # Place libre : acquire() retourne sans céder la main à la boucle d'évènements
+        await slots.acquire()
+        return True
+
+    @staticmethod
+    def fail_interrupted_streams(started_before: datetime) -> int:
+        """Passage en échec des requêtes en streaming interrompues par l'arrêt du processus API
+
+        Les jobs "query_stream" ne sont pas repris par le gestionnaire des jobs : ceux restés en
+        cours au démarrage d'un processus ne seront jamais terminés.
+
+        Args:
+            started_before (datetime): date de démarrage du processus
+
+        Returns:
+            int: nombre de jobs passés en échec
+        """
+        with SessionLocalSync() as session:
+            return job_repository.fail_interrupted_jobs(
+                session=session,
+                job_type="query_stream",
+                started_before=started_before,
+                message="Requête interrompue par l'arrêt du serveur"
+            )
+
+    @staticmethod
+    def sse(event: str, data: dict) -> str:
+        """Formatage d'un évènement Server-Sent Events
+
+        Args:
+            event (str): type de l'évènement
+            data (dict): données de l'évènement
+
+        Returns:
+            str: évènement SSE
+        """
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    @staticmethod
+    def create_stream_job(
+        session: Session,
+        user_id: str,
+        query: str,
+        model: str,
+        collection_name: str
+    ) -> str:
+        """Création du job associé à une requête en streaming
+
+        Le job n'est pas soumis au gestionnaire des jobs : il trace la requête et porte
+        l'enregistrement de la table des requêtes.
+
+        Args:
+            session (Session): session d'accès à la base de données
+            user_id (str): identifiant de l'utilisateur
+            query (str): requête de l'utilisateur
+            model (str): modèle utilisé pour la génération
+            collection_name (str): collection interrogée
+
+        Returns:
+            str: identifiant du job
+        """
+        job_id = str(uuid.uuid4())
+        job = job_repository.create_job(
+            session=session,
+            job_id=job_id,
+            user_id=user_id,
+            type="query_stream",
+            payload={
+                "query": query,
+                "model": model,
+                "collection_name": collection_name
+            }
+        )
+        job.status = "processing"
+        job.progress = "initialisation"
+        job.started_at = datetime.now()
+        session.commit()
+        return job_id
+
+    @staticmethod
+    async def stream_query(
+        job_id: str,
+        user_id: str,
+        query: str,
+        model: str,
+        collection: CollectionModel
+    ) -> AsyncIterator[str]:
+        """Traitement d'une requête en streaming SSE
+
+        La place de traitement, réservée par l'appelant (acquire_stream_slot), est libérée à la fin
+        du flux. Evènements émis : job (identifiant du job), stage (étape atteinte), token (texte généré),
+        answer (réponse complète) et error.
+
+        Args:
+            job_id (str): identifiant du job de la requête
+            user_id (str): identifiant de l'utilisateur
+            query (str): requête de l'utilisateur
+            model (str): modèle utilisé pour la génération
+            collection (CollectionModel): collection interrogée
+
+        Yields:
+            str: évènements SSE
+        """
+        try:
+            with SessionLocalSync() as session:
+                job = job_repository.get_job(session=session, job_id=job_id)
+                if job is None:
+                    yield RagService.sse("error", {"detail": "Job introuvable"})
+                    return
+                start_time = datetime.now()
+                try:
+                    yield RagService.sse("job", {"job_id": job_id})
+                    async for event, value in RagService.answer(
+                        query=query,
+                        model=model,
+                        collection=collection
+                    ):
+                        if event == "stage":
+                            job.progress = value
+                            session.commit()
+                            JobService.add_job_log(session, job_id, STAGE_LOGS[value])
+                            yield RagService.sse("stage", {"stage": value})
+                        elif event == "token":
+                            yield RagService.sse("token", {"delta": value})
+                        else:
+                            job.progress = "done"
+                            job.status = "completed"
+                            job.finished_at = datetime.now()
+                            create_query(
+                                session=session,
+                                user_id=user_id,
+                                collection_name=collection.name,
+                                job_id=job_id,
+                                question=query,
+                                answer=RagService.answer_text(value),
+                                model=model
+                            )
+                            session.commit()
+                            JobService.add_job_log(session, job_id, f"Traitement terminé en {datetime.now() - start_time} s")
+                            yield RagService.sse("answer", {"job_id": job_id, **value.model_dump(mode="json")})
+                except Exception as e:
+                    session.rollback()
+                    message = e.message if isinstance(e, RAGException) else str(e)
+                    logger.error(f"Requête en streaming {job_id} échouée : {message}")
+                    job.progress = "done"
+                    job.status = "failed"
+                    job.error_message = str(e)[:255]
+                    job.finished_at = datetime.now()
+                    session.commit()
+                    yield RagService.sse("error", {"detail": "Erreur lors de l'éxécution de la requête"})
+                finally:
+                    # Client déconnecté avant la fin de la génération
+                    if job.status not in ("completed", "failed"):
+                        session.rollback()
+                        job.progress = "done"
+                        job.status = "failed"
+                        job.error_message = "Requête interrompue par le client"
+                        job.finished_at = datetime.now()
+                        session.commit()
+        finally:
+            RagService.stream_slots().release()
@@ -0,0 +1,287 @@
+import asyncio
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.logging import logger
+from db.models import CollectionMetadata, Job
+from dependencies.sqlite_session import SessionLocalSync
+from repositories import job_repository
+from repositories.collections_repository import CollectionRepository
+from schemas import Chunk, CollectionModel, JobOut
+from .chunking_service import ChunkingService
+from .conversion_pool import ConversionPool
+from .db_vectorielle_service import DbVectorielleService
+from .job_runner import JobRunner
+from .job_service import JobService
+from .user_websocket_manager import UserWebSocketManager
+
+class ReindexService:
+    """Service de réindexation d'une collection (nouveau découpage et nouveaux embeddings)
+
+    Les chunks sont recalculés à partir des documents Docling enregistrés lors de la conversion,
+    sans nouvelle conversion, et indexés dans une nouvelle collection Chroma. La collection bascule
+    sur la nouvelle collection Chroma en une seule mise à jour lorsque tous les documents sont
+    indexés ; l'ancienne est ensuite supprimée. Les insertions dans la collection sont refusées
+    pendant la réindexation.
+    """
+
+    @staticmethod
+    def active_collection_jobs(session: Session, collection_id: str, types: list[str]) -> list[Job]:
+        """Jobs non terminés portant sur une collection
+
+        Args:
+            session (Session): session d'accès à la base de données
+            collection_id (str): identifiant de la collection
+            types (list[str]): types de jobs recherchés
+
+        Returns:
+            list[Job]: jobs en attente ou en cours sur la collection
+        """
+        return [
+            job for job in job_repository.list_active_jobs(session=session, types=types)
+            if ((job.payload or {}).get("collection") or {}).get("id") == collection_id
+        ]
+
+    @staticmethod
+    def check_not_reindexing(session: Session, collection_id: str):
+        """Refus d'une insertion pendant la réindexation de la collection
+
+        Args:
+            session (Session): session d'accès à la base de données
+            collection_id (str): identifiant de la collection
+
+        Raises:
+            HTTPException: collection en cours de réindexation
+        """
+        if ReindexService.active_collection_jobs(session=session, collection_id=collection_id, types=["reindex"]):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La collection est en cours de réindexation"
+            )
+
+    @staticmethod
+    async def submit_reindex(
+        session: Session,
+        user_id: str,
+        collection: CollectionModel,
+        user_ws_manager: UserWebSocketManager,
+        job_runner: JobRunner
+    ) -> str:
+        """Création et mise en attente du job de réindexation d'une collection
+
+        Args:
+            session (Session): session d'accès à la base de données
+            user_id (str): identifiant de l'utilisateur créateur du job
+            collection (CollectionModel): collection à réindexer
+            user_ws_manager (UserWebSocketManager): manager des sockets utilisateurs
+            job_runner (JobRunner): service de gestion des tâches
+
+        Raises:
+            HTTPException: réindexation ou insertions en cours sur la collection
+
+        Returns:
+            str: identifiant du job de réindexation
+        """
+        ReindexService.check_not_reindexing(session=session, collection_id=collection.id)
+        if ReindexService.active_collection_jobs(session=session, collection_id=collection.id, types=["insertion"]):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Des insertions sont en cours dans la collection"
+            )
+        job_id = str(uuid.uuid4())
+        new_job = job_repository.create_job(
+            session=session,
+            job_id=job_id,
+            user_id=user_id,
+            type="reindex",
+            payload={"collection": collection.model_dump(mode="json")}
+        )
+        await user_ws_manager.send_to_user(
+            user_id=user_id,
+            data=JobOut.model_validate(new_job)
+        )
+        await job_runner.submit(job_id=job_id, job_type="reindex")
+        return job_id
+
+    @staticmethod
+    async def rechunk_document(
+        conversion_pool: ConversionPool,
+        collection_name: str,
+        doc_id: str,
+        filename: str
+    ) -> list[Chunk]:
+        """Chunks d'un document recalculés depuis son document Docling enregistré
+
+        Un document converti avant l'enregistrement des documents Docling est converti une
+        dernière fois depuis le fichier d'origine (le document Docling est alors enregistré).
+
+        Args:
+            conversion_pool (ConversionPool): pool de conversion
+            collection_name (str): nom de la collection
+            doc_id (str): identifiant du document
+            filename (str): nom du fichier d'origine
+
+        Returns:
+            list[Chunk]: chunks du document
+        """
+        chunks = await conversion_pool.rechunk(collection_name=collection_name, doc_id=doc_id, filename=filename)
+        if chunks is not None:
+            return chunks
+        logger.info(f"Document {doc_id} sans document Docling enregistré : nouvelle conversion")
+        source = Path(settings.STATIC_DIR) / collection_name / f"{doc_id}.{filename.split('.')[-1].lower()}"
+        result = await conversion_pool.convert(
+            file_path=source,
+            collection_name=collection_name,
+            doc_id=doc_id
+        )
+        chunking_result = await asyncio.to_thread(
+            ChunkingService(filename=filename).basic_chunking,
+            document=result.document,
+            document_id=doc_id
+        )
+        return chunking_result.chunks
+
+    @staticmethod
+    async def run_reindex(
+        job_id: str,
+        user_id: str,
+        collection: CollectionModel | dict,
+        user_ws_manager: UserWebSocketManager
+    ):
+        """Job de réindexation d'une collection
+
+        Args:
+            job_id (str): identifiant du job
+            user_id (str): identifiant de l'utilisateur créateur du job
+            collection (CollectionModel | dict): collection à réindexer (dict lorsqu'elle est relue depuis le job)
+            user_ws_manager (UserWebSocketManager): manager des sockets utilisateurs
+        """
+        collection = CollectionModel.model_validate(collection)
+        conversion_pool = ConversionPool.shared()
+        db_vector_service = DbVectorielleService.shared()
+
+        with SessionLocalSync() as session:
+            job = job_repository.get_job(session=session, job_id=job_id)
+            if job is None:
+                logger.error(f"Job {job_id} inconnu")
+                raise Exception("Aucun job avec cet identifiant dans la base")
+
+            start_time = datetime.now()
+            job.status = "processing"
+            job.progress = "initialisation"
+            job.started_at = start_time
+            session.commit()
+            await user_ws_manager.send_to_user(
+                user_id=user_id,
+                data=JobOut.model_validate(job)
+            )
+
+            metadata = session.get(CollectionMetadata, collection.id)
+            if metadata is None:
+                job.status = "failed"
+                job.progress = "done"
+                job.error_message = "La collection n'existe plus"
+                job.finished_at = datetime.now()
+                session.commit()
+                await user_ws_manager.send_to_user(
+                    user_id=user_id,
+                    data=JobOut.model_validate(job)
+                )
+                return
+            old_name: str | None = CollectionModel.model_validate(metadata).vector_name
+            documents = [
+                (document.id, document.filename)
+                for document in CollectionRepository.get_indexed_documents(session=session, collection_id=collection.id)
+            ]
+            new_name = f"{collection.name}-{uuid.uuid4().hex[:8]}"
+            JobService.add_job_log(
+                session,
+                job_id,
+                f"Réindexation de {len(documents)} documents dans la collection Chroma {new_name}"
+            )
+            await asyncio.to_thread(db_vector_service.create_collection, collection_name=new_name)
+
+            # Découpage de plusieurs documents en parallèle (pool de conversion), embeddings d'un document à la fois
+            chunking_slots = asyncio.Semaphore(max(1, conversion_pool.size))
+            embedding_slot = asyncio.Semaphore(1)
+            done = 0
+            nb_chunks = 0
+
+            async def reindex_document(doc_id: str, filename: str):
+                nonlocal done, nb_chunks
+                async with chunking_slots:
+                    chunks = await ReindexService.rechunk_document(
+                        conversion_pool=conversion_pool,
+                        collection_name=collection.name,
+                        doc_id=doc_id,
+                        filename=filename
+                    )
+                async with embedding_slot:
+                    await db_vector_service.insert_chunk(collection_name=new_name, chunks=chunks)
+                done += 1
+                nb_chunks += len(chunks)
+                job.progress = f"reindex {done}/{len(documents)}"
+                session.commit()
+                await user_ws_manager.send_to_user(
+                    user_id=user_id,
+                    data=JobOut.model_validate(job)
+                )
+
+            tasks = [asyncio.ensure_future(reindex_document(doc_id, filename)) for doc_id, filename in documents]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException as e:
+                # La collection reste sur l'ancienne collection Chroma
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                db_vector_service.delete_collection(collection_name=new_name)
+                if not isinstance(e, Exception):
+                    raise
+                session.rollback()
+                logger.error(f"Réindexation de la collection {collection.name} échouée : {e}")
+                job.status = "failed"
+                job.progress = "done"
+                job.error_message = str(e)[:255]
+                job.finished_at = datetime.now()
+                session.commit()
+                JobService.add_job_log(session, job_id, f"Echec de la réindexation : {e}")
+                await user_ws_manager.send_to_user(
+                    user_id=user_id,
+                    data=JobOut.model_validate(job)
+                )
+                return
+
+            # Bascule atomique de la collection sur la nouvelle collection Chroma
+            if CollectionRepository.set_vector_collection(
+                session=session,
+                collection_id=collection.id,
+                vector_collection=new_name
+            ) is None:
+                # Collection supprimée pendant la réindexation
+                await asyncio.to_thread(db_vector_service.delete_collection, collection_name=new_name)
+                old_name = None
+            try:
+                if old_name is not None:
+                    await asyncio.to_thread(db_vector_service.delete_collection, collection_name=old_name)
+            except Exception as e:
+                logger.error(f"Suppression de l'ancienne collection Chroma {old_name} impossible : {e}")
+
+            job.status = "completed"
+            job.progress = "done"
+            job.finished_at = datetime.now()
+            session.commit()
+            JobService.add_job_log(
+                session,
+                job_id,
+                f"Réindexation terminée en {datetime.now() - start_time} : {len(documents)} documents, {nb_chunks} chunks"
+            )
+            await user_ws_manager.send_to_user(
+                user_id=user_id,
+                data=JobOut.model_validate(job)
+            )
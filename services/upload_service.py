@@ -0,0 +1,342 @@
+import asyncio
+import hashlib
+import re
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, List
+
+from fastapi import HTTPException, status
+from sqlalchemy.orm import Session
+
+from core.config import settings
+from core.security import validate_filename
+from core.utility import delete_file
+from db.models import CollectionMetadata, UploadSession
+from repositories import upload_repository
+from schemas import CollectionModel, UploadChunkOut, UploadSessionCreate, UploadSessionOut
+from .conversion_service import ConversionService
+from .insertion_service import InsertionService
+from .job_runner import JobRunner
+from .reindex_service import ReindexService
+from .user_websocket_manager import UserWebSocketManager
+
+_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+class UploadService:
+    """Service de gestion des uploads de fichiers en plusieurs morceaux
+
+    Le fichier est préalloué dans UPLOAD_DIR et chaque morceau est écrit à sa position : les
+    morceaux peuvent être envoyés dans n'importe quel ordre et renvoyés après une coupure.
+    """
+
+    @staticmethod
+    def part_path(upload_id: str) -> Path:
+        """Chemin du fichier partiel d'une session d'upload
+
+        Args:
+            upload_id (str): identifiant de la session d'upload
+
+        Returns:
+            Path: chemin du fichier partiel
+        """
+        return Path(settings.UPLOAD_DIR) / f"{upload_id}.part"
+
+    @staticmethod
+    def to_out(upload: UploadSession) -> UploadSessionOut:
+        """Conversion d'une session d'upload pour réponse API
+
+        Args:
+            upload (UploadSession): session d'upload
+
+        Returns:
+            UploadSessionOut: session d'upload
+        """
+        return UploadSessionOut(
+            id=upload.id,
+            filename=upload.filename,
+            size=upload.size,
+            status=upload.status,
+            ranges=upload.ranges or [],
+            chunks=[UploadChunkOut(**chunk) for chunk in upload.chunks or []],
+            received=sum(end - start + 1 for start, end in upload.ranges or []),
+            job_id=upload.job_id,
+            expires_at=upload.expires_at
+        )
+
+    @staticmethod
+    def create_upload(
+        session: Session,
+        user_id: str,
+        collection: CollectionModel,
+        payload: UploadSessionCreate
+    ) -> UploadSession:
+        """Création d'une session d'upload et préallocation du fichier
+
+        Args:
+            session (Session): session d'accès à la base de données
+            user_id (str): identifiant de l'utilisateur
+            collection (CollectionModel): collection d'insertion du document
+            payload (UploadSessionCreate): description du fichier à uploader
+
+        Raises:
+            HTTPException: fichier refusé (nom ou extension)
+
+        Returns:
+            UploadSession: session d'upload créée
+        """
+        validate_filename(payload.filename)
+        upload_id = str(uuid.uuid4())
+        part_path = UploadService.part_path(upload_id)
+        part_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(part_path, "wb") as f:
+            f.truncate(payload.size)
+
+        now = datetime.now()
+        return upload_repository.create_upload(
+            session=session,
+            upload=UploadSession(
+                id=upload_id,
+                user_id=user_id,
+                collection_id=collection.id,
+                filename=payload.filename,
+                size=payload.size,
+                ranges=[],
+                chunks=[],
+                created_at=now,
+                updated_at=now,
+                expires_at=now + timedelta(hours=settings.UPLOAD_SESSION_HOURS)
+            )
+        )
+
+    @staticmethod
+    def parse_content_range(content_range: str | None, size: int) -> tuple[int, int]:
+        """Lecture de l'en-tête Content-Range d'un morceau ("bytes début-fin/taille")
+
+        Args:
+            content_range (str | None): en-tête Content-Range
+            size (int): taille totale du fichier
+
+        Raises:
+            HTTPException: en-tête absent ou plage invalide
+
+        Returns:
+            tuple[int, int]: premier et dernier octet (inclus) du morceau
+        """
+        match = _CONTENT_RANGE.match(content_range or "")
+        if match is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="En-tête Content-Range absent ou invalide (format attendu : bytes début-fin/taille)"
+            )
+        start, end, total = (int(value) for value in match.groups())
+        if total != size or start > end or end >= size:
+            raise HTTPException(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                detail=f"Plage {start}-{end}/{total} incompatible avec la taille du fichier ({size} octets)"
+            )
+        if end - start + 1 > settings.UPLOAD_MAX_CHUNK_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Morceau trop volumineux (maximum {settings.UPLOAD_MAX_CHUNK_SIZE} octets)"
+            )
+        return start, end
+
+    @staticmethod
+    def merge_ranges(ranges: List[List[int]], start: int, end: int) -> List[List[int]]:
+        """Ajout d'une plage d'octets aux plages reçues (plages contiguës fusionnées)
+
+        Args:
+            ranges (List[List[int]]): plages reçues [début, fin]
+            start (int): premier octet de la nouvelle plage
+            end (int): dernier octet de la nouvelle plage
+
+        Returns:
+            List[List[int]]: plages reçues triées et fusionnées
+        """
+        merged: List[List[int]] = []
+        for range_start, range_end in sorted([*ranges, [start, end]]):
+            if merged and range_start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], range_end)
+            else:
+                merged.append([range_start, range_end])
+        return merged
+
+    @staticmethod
+    async def write_chunk(
+        session: Session,
+        upload: UploadSession,
+        start: int,
+        end: int,
+        stream: AsyncIterator[bytes],
+        checksum: str | None = None
+    ) -> UploadSession:
+        """Ecriture d'un morceau du fichier à sa position
+
+        Args:
+            session (Session): session d'accès à la base de données
+            upload (UploadSession): session d'upload
+            start (int): premier octet du morceau
+            end (int): dernier octet du morceau (inclus)
+            stream (AsyncIterator[bytes]): contenu du morceau
+            checksum (str | None, optional): checksum SHA-256 attendu du morceau. Defaults to None.
+
+        Raises:
+            HTTPException: session finalisée, taille ou checksum du morceau incorrect
+
+        Returns:
+            UploadSession: session d'upload mise à jour
+        """
+        if upload.status != "open":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La session d'upload est déjà finalisée"
+            )
+        expected = end - start + 1
+        sha256 = hashlib.sha256()
+        written = 0
+
+        def write_block(f, block: bytes):
+            sha256.update(block)
+            f.write(block)
+
+        def copy_to_part(spool_path: Path):
+            with open(spool_path, "rb") as source, open(UploadService.part_path(upload.id), "r+b") as f:
+                f.seek(start)
+                shutil.copyfileobj(source, f, settings.UPLOAD_CHUNK_SIZE)
+
+        # Le morceau est vérifié avant d'être copié dans le fichier partiel : un morceau renvoyé
+        # tronqué ou corrompu n'écrase pas une plage déjà reçue
+        spool_path = UploadService.part_path(upload.id).with_name(f"{upload.id}.{uuid.uuid4()}.chunk")
+        try:
+            with open(spool_path, "wb") as f:
+                async for block in stream:
+                    if written + len(block) > expected:
+                        raise HTTPException(
+                            status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Le morceau dépasse la plage annoncée par Content-Range"
+                        )
+                    await asyncio.to_thread(write_block, f, block)
+                    written += len(block)
+            if written != expected:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Morceau incomplet : {written} octets reçus sur {expected}"
+                )
+            digest = sha256.hexdigest()
+            if checksum is not None and checksum.lower() != digest:
+                # La plage n'est pas enregistrée : le morceau devra être renvoyé
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Checksum SHA-256 du morceau incorrect"
+                )
+            await asyncio.to_thread(copy_to_part, spool_path)
+        finally:
+            spool_path.unlink(missing_ok=True)
+
+        # Lecture puis mise à jour conditionnelle, relancée si un autre morceau a été enregistré entre temps
+        while True:
+            session.refresh(upload)
+            if upload.status != "open":
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="La session d'upload est déjà finalisée"
+                )
+            chunks = [chunk for chunk in upload.chunks or [] if chunk["start"] != start]
+            chunks.append({"start": start, "end": end, "sha256": digest})
+            updated_at = datetime.now()
+            if upload_repository.update_received(
+                session=session,
+                upload=upload,
+                ranges=UploadService.merge_ranges(upload.ranges or [], start, end),
+                chunks=sorted(chunks, key=lambda chunk: chunk["start"]),
+                updated_at=updated_at,
+                expires_at=updated_at + timedelta(hours=settings.UPLOAD_SESSION_HOURS)
+            ):
+                break
+        session.refresh(upload)
+        return upload
+
+    @staticmethod
+    async def commit_upload(
+        session: Session,
+        upload: UploadSession,
+        user_ws_manager: UserWebSocketManager,
+        job_runner: JobRunner
+    ) -> str:
+        """Finalisation d'une session d'upload : validation du fichier et création du job d'insertion
+
+        Args:
+            session (Session): session d'accès à la base de données
+            upload (UploadSession): session d'upload
+            user_ws_manager (UserWebSocketManager): manager des sockets utilisateurs
+            job_runner (JobRunner): service de gestion des tâches
+
+        Raises:
+            HTTPException: fichier incomplet, invalide ou déjà présent dans la collection, collection en cours de réindexation
+
+        Returns:
+            str: identifiant du job d'insertion
+        """
+        if upload.status != "open":
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="La session d'upload est déjà finalisée"
+            )
+        if upload.ranges != [[0, upload.size - 1]]:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Le fichier n'est pas complet"
+            )
+        collection = session.get(CollectionMetadata, upload.collection_id)
+        if collection is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La collection de la session d'upload n'existe plus"
+            )
+        collection = CollectionModel.model_validate(collection)
+        ReindexService.check_not_reindexing(session=session, collection_id=collection.id)
+
+        doc_id = str(uuid.uuid4())
+        imported_file = await asyncio.to_thread(
+            ConversionService.import_local_file,
+            source=UploadService.part_path(upload.id),
+            filename=upload.filename,
+            collection_name=collection.name,
+            doc_id=doc_id
+        )
+        if ConversionService.check_md5(md5=imported_file.md5, collection_id=collection.id, session=session):
+            delete_file(file_path=imported_file.path)
+            upload_repository.delete_upload(session=session, upload=upload)
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Le fichier est déjà présent dans la collection"
+            )
+
+        job_id = await InsertionService.submit_insertion(
+            session=session,
+            user_id=upload.user_id,
+            collection=collection,
+            imported_file=imported_file,
+            filename=upload.filename,
+            doc_id=doc_id,
+            user_ws_manager=user_ws_manager,
+            job_runner=job_runner
+        )
+        upload.status = "committed"
+        upload.job_id = job_id
+        upload.updated_at = datetime.now()
+        session.commit()
+        return job_id
+
+    @staticmethod
+    def abort_upload(session: Session, upload: UploadSession):
+        """Abandon d'une session d'upload et suppression du fichier partiel
+
+        Args:
+            session (Session): session d'accès à la base de données
+            upload (UploadSession): session d'upload
+        """
+        UploadService.part_path(upload.id).unlink(missing_ok=True)
+        upload_repository.delete_upload(session=session, upload=upload)
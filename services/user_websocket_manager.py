@@ -34,6 +34,15 @@ class UserWebSocketManager:
     async def send_to_user(self, user_id: str, data: BaseModel):
         """Envoi d'information à l'utilisateur
 
+        Args:
+            user_id (str): identifiant de l'utilisateur
+            data (dict): information à envoyer sous forme de dictionnaire
+        """
+        await self.send_json_to_user(user_id=user_id, data=data.model_dump(mode="json"))
+
+    async def send_json_to_user(self, user_id: str, data: dict):
+        """Envoi d'information déjà sérialisée à l'utilisateur
+
         Args:
             user_id (str): identifiant de l'utilisateur
             data (dict): information à envoyer sous forme de dictionnaire
@@ -41,8 +50,8 @@ class UserWebSocketManager:
         if user_id not in self.active_connections:
             return
 
-        for ws in self.active_connections[user_id]:
-            await ws.send_json(data.model_dump(mode="json"))
+        for ws in list(self.active_connections[user_id]):
+            await ws.send_json(data)
 
     async def receive_text(self):
         """_summary_
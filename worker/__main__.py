@@ -0,0 +1,40 @@
+import asyncio
+import signal
+
+from core.config import settings
+from core.init import init_app
+from core.logging import logger
+from db.database import sync_engine
+from services import ChunkingService, ConversionPool, JobEventPublisher, JobRunner
+from worker.handlers import register_job_handlers
+
+async def run_worker():
+    """Processus worker : traitement des jobs enregistrés dans la base par l'API
+
+    Les jobs sont récupérés en interrogeant la table jobs (bail + heartbeat), les messages
+    destinés aux utilisateurs sont publiés dans la table job_events et relayés par l'API.
+    """
+    init_app()
+    job_runner = JobRunner(
+        user_ws_manager=JobEventPublisher(),
+        poll_interval=settings.JOB_POLL_SECONDS
+    )
+    register_job_handlers(job_runner)
+    ConversionPool.shared().start()
+    ChunkingService.warmup()
+    await job_runner.start()
+
+    # Arrêt propre sur SIGINT / SIGTERM
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+    await stop_event.wait()
+
+    logger.info("Arrêt du worker demandé, attente des jobs en cours...")
+    await job_runner.stop()
+    ConversionPool.shared().shutdown()
+    sync_engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
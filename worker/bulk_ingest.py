@@ -0,0 +1,337 @@
+import argparse
+import asyncio
+import multiprocessing
+import shutil
+import sys
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from fastapi import HTTPException
+
+from core.config import settings
+from core.init import init_app
+from core.logging import logger
+from core.security import hash_file
+from db.database import sync_engine
+from db.models import DocumentMetadata
+from dependencies.sqlite_session import SessionLocalSync
+from repositories import user_repository
+from repositories.collections_repository import CollectionRepository
+from schemas import Chunk, CollectionModel, ImportedFile
+from services import ChunkingService, ConversionService, DbVectorielleService, ReindexService
+
+# Extensions des fichiers importés
+EXTENSIONS = (".pdf", ".docx")
+
+def _init_worker():
+    """Initialisation d'un processus worker : chargement des modèles Docling et du tokenizer"""
+    ConversionService.warmup()
+    ChunkingService.warmup()
+
+def _prepare_in_worker(
+    source: str,
+    filename: str,
+    collection_name: str,
+    doc_id: str
+) -> tuple[ImportedFile, List[Chunk], int]:
+    """Import, conversion et chunking d'un fichier dans un processus worker
+
+    Le fichier source est copié (il n'est pas déplacé) puis validé et enregistré dans la collection
+    comme un fichier uploadé.
+
+    Args:
+        source (str): chemin vers le fichier à importer
+        filename (str): nom du fichier
+        collection_name (str): nom de la collection
+        doc_id (str): identifiant du document
+
+    Raises:
+        ValueError: fichier refusé
+
+    Returns:
+        tuple[ImportedFile, List[Chunk], int]: fichier importé, chunks et nombre de pages du document
+    """
+    part_path = Path(settings.UPLOAD_DIR) / f"{doc_id}.part"
+    part_path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        shutil.copyfile(source, part_path)
+        imported_file = ConversionService.import_local_file(
+            source=part_path,
+            filename=filename,
+            collection_name=collection_name,
+            doc_id=doc_id
+        )
+    except HTTPException as he:
+        # HTTPException n'est pas transmissible entre processus
+        raise ValueError(he.detail)
+    finally:
+        part_path.unlink(missing_ok=True)
+
+    result = ConversionService.convert_to_md(
+        file_path=imported_file.path,
+        collection_name=collection_name,
+        doc_id=doc_id
+    )
+    chunking_result = ChunkingService(filename=filename).basic_chunking(
+        document=result.document,
+        document_id=doc_id
+    )
+    return imported_file, chunking_result.chunks, len(result.document.pages)
+
+class BulkIngestion:
+    """Ingestion hors ligne d'un répertoire de documents dans une collection
+
+    L'import, la conversion et le chunking sont répartis sur un pool de processus, un fichier par
+    processus ; les embeddings sont calculés par lots au fil des documents convertis, puis les
+    métadonnées et les vecteurs sont écrits directement dans SQLite et Chroma, sans passer par
+    l'API ni par la file des jobs.
+    L'ingestion peut être relancée : les fichiers déjà indexés (hash MD5) sont ignorés, ceux dont
+    l'indexation a été interrompue sont repris.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        collection: CollectionModel,
+        user_id: str,
+        workers: int,
+        batch_size: int = settings.EMBEDDING_BATCH_SIZE,
+        concurrency: int = settings.EMBEDDING_CONCURRENCY
+    ):
+        self.directory = directory
+        self.collection = collection
+        self.user_id = user_id
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.db_vector_service = DbVectorielleService.shared()
+        self.start_time = 0.0
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.pages = 0
+        self.chunks = 0
+        self.seen_md5: set[str] = set()
+
+    def list_files(self) -> List[Path]:
+        """Fichiers PDF et DOCX du répertoire et de ses sous-répertoires
+
+        Returns:
+            List[Path]: fichiers à importer, triés par chemin
+        """
+        return sorted(
+            path for path in self.directory.rglob("*")
+            if path.is_file()
+            and path.suffix.lower() in EXTENSIONS
+            and not path.name.startswith(".")
+        )
+
+    def resume_document(self, session, md5: str) -> tuple[str | None, bool]:
+        """Identifiant du document à (ré)insérer pour un fichier
+
+        Args:
+            session (Session): session d'accès à la base de données
+            md5 (str): hash MD5 du fichier
+
+        Returns:
+            tuple[str | None, bool]: identifiant du document interrompu à reprendre (None pour un
+                nouveau document) et présence d'un document déjà indexé
+        """
+        document = CollectionRepository.get_document_collection_by_md5(
+            session=session,
+            collection_id=self.collection.id,
+            md5=md5
+        )
+        if document is None:
+            return None, False
+        if document.is_indexed:
+            return document.id, True
+        # Indexation interrompue : les chunks déjà écrits sont supprimés avant reprise
+        self.db_vector_service.delete_document_chunks(
+            collection_name=self.collection.vector_name,
+            document_id=document.id
+        )
+        return document.id, False
+
+    def report(self, total: int, filename: str, pages: int, nb_chunks: int):
+        """Affichage de l'avancement et du débit de l'ingestion"""
+        elapsed = max(time.monotonic() - self.start_time, 1e-6)
+        print(
+            f"[{self.done + self.skipped + self.failed}/{total}] {filename} : {pages} pages, {nb_chunks} chunks"
+            f" | {self.pages / elapsed:.2f} pages/s, {self.chunks / elapsed:.1f} chunks/s",
+            flush=True
+        )
+
+    async def _prepare(
+        self,
+        executor: ProcessPoolExecutor,
+        path: Path,
+        slots: asyncio.Semaphore,
+        output: asyncio.Queue,
+        total: int
+    ):
+        """Vérification du hash puis conversion et chunking d'un fichier dans le pool de processus"""
+        loop = asyncio.get_running_loop()
+        try:
+            md5 = await asyncio.to_thread(hash_file, file_path=path)
+            with SessionLocalSync() as session:
+                doc_id, indexed = self.resume_document(session=session, md5=md5)
+            # Fichier déjà indexé ou présent plusieurs fois dans le répertoire
+            if indexed or md5 in self.seen_md5:
+                self.skipped += 1
+                self.report(total, path.name, 0, 0)
+                return
+            self.seen_md5.add(md5)
+            doc_id = doc_id or str(uuid.uuid4())
+            imported_file, chunks, pages = await loop.run_in_executor(
+                executor, _prepare_in_worker, str(path), path.name, self.collection.name, doc_id
+            )
+            await output.put((path, doc_id, imported_file, chunks, pages))
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Import du fichier {path} impossible : {e}")
+            self.report(total, path.name, 0, 0)
+        finally:
+            slots.release()
+
+    async def _index(self, source: asyncio.Queue, total: int):
+        """Enregistrement des métadonnées, calcul des embeddings et indexation des documents convertis"""
+        while (item := await source.get()) is not None:
+            path, doc_id, imported_file, chunks, pages = item
+            try:
+                with SessionLocalSync() as session:
+                    document = CollectionRepository.get_document_collection_by_id(
+                        session=session,
+                        document_id=doc_id
+                    )
+                    if document is None:
+                        document = CollectionRepository.add_document(
+                            session=session,
+                            document=DocumentMetadata(
+                                id=doc_id,
+                                filename=path.name,
+                                collection_id=self.collection.id,
+                                inserted_by=self.user_id,
+                                date_insertion=datetime.now(),
+                                md5=imported_file.md5,
+                                sha256=imported_file.sha256,
+                                size=imported_file.size
+                            )
+                        )
+                    if chunks:
+                        await self.db_vector_service.insert_chunk(
+                            collection_name=self.collection.vector_name,
+                            chunks=chunks,
+                            batch_size=self.batch_size,
+                            concurrency=self.concurrency
+                        )
+                    document.is_indexed = True
+                    CollectionRepository.bump_version(session=session, collection_id=self.collection.id)
+                    session.commit()
+                self.done += 1
+                self.pages += pages
+                self.chunks += len(chunks)
+                self.report(total, path.name, pages, len(chunks))
+            except Exception as e:
+                self.failed += 1
+                logger.error(f"Indexation du fichier {path} impossible : {e}")
+                self.report(total, path.name, 0, 0)
+
+    async def run(self) -> bool:
+        """Ingestion des fichiers du répertoire
+
+        Returns:
+            bool: tous les fichiers ont été importés ou étaient déjà présents
+        """
+        files = self.list_files()
+        total = len(files)
+        print(
+            f"{total} fichiers à importer dans la collection {self.collection.name} avec {self.workers} processus",
+            flush=True
+        )
+        self.start_time = time.monotonic()
+
+        executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(settings.CONVERSION_START_METHOD),
+            initializer=_init_worker
+        )
+        # Au plus un document converti en attente d'indexation par processus
+        converted: asyncio.Queue = asyncio.Queue(maxsize=self.workers)
+        slots = asyncio.Semaphore(self.workers)
+        indexer = asyncio.ensure_future(self._index(converted, total))
+        tasks: List[asyncio.Future] = []
+        try:
+            for path in files:
+                await slots.acquire()
+                tasks.append(asyncio.ensure_future(self._prepare(executor, path, slots, converted, total)))
+            await asyncio.gather(*tasks)
+            await converted.put(None)
+            await indexer
+        finally:
+            indexer.cancel()
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        elapsed = time.monotonic() - self.start_time
+        print(
+            f"Terminé en {elapsed:.1f} s : {self.done} importés, {self.skipped} déjà présents, {self.failed} en échec"
+            f" | {self.pages} pages ({self.pages / max(elapsed, 1e-6):.2f} pages/s),"
+            f" {self.chunks} chunks ({self.chunks / max(elapsed, 1e-6):.1f} chunks/s)",
+            flush=True
+        )
+        return self.failed == 0
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m worker.bulk_ingest",
+        description="Ingestion hors ligne des fichiers PDF et DOCX d'un répertoire dans une collection existante"
+    )
+    parser.add_argument("directory", type=Path, help="répertoire des fichiers à importer (parcouru récursivement)")
+    parser.add_argument("collection", help="nom de la collection")
+    parser.add_argument("--user", default=settings.FIRST_USER_USERNAME, help="utilisateur enregistré comme auteur de l'insertion")
+    parser.add_argument("--workers", type=int, default=max(1, (multiprocessing.cpu_count() or 2) - 1), help="processus de conversion et de chunking")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE, help="chunks par requête d'embeddings")
+    parser.add_argument("--concurrency", type=int, default=settings.EMBEDDING_CONCURRENCY, help="requêtes d'embeddings simultanées")
+    args = parser.parse_args()
+
+    if not args.directory.is_dir():
+        print(f"Répertoire introuvable : {args.directory}", file=sys.stderr)
+        return 2
+
+    init_app()
+    with SessionLocalSync() as session:
+        collection = CollectionRepository.get_by_name(session=session, name=args.collection)
+        user = user_repository.get_user_by_name(session=session, username=args.user)
+        if collection is None:
+            print(f"La collection {args.collection} n'existe pas", file=sys.stderr)
+            return 2
+        if user is None:
+            print(f"L'utilisateur {args.user} n'existe pas", file=sys.stderr)
+            return 2
+        collection = CollectionModel.model_validate(collection)
+        user_id = user.id
+        try:
+            ReindexService.check_not_reindexing(session=session, collection_id=collection.id)
+        except HTTPException as he:
+            print(he.detail, file=sys.stderr)
+            return 2
+
+    try:
+        ingestion = BulkIngestion(
+            directory=args.directory,
+            collection=collection,
+            user_id=user_id,
+            workers=args.workers,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency
+        )
+        return 0 if asyncio.run(ingestion.run()) else 1
+    finally:
+        sync_engine.dispose()
+
+if __name__ == "__main__":
+    sys.exit(main())
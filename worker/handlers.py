@@ -0,0 +1,13 @@
+from services import InsertionService, JobRunner, ReindexService
+from services.job_runner import LANE_INSERTION, LANE_QUERY
+from worker.query_collection import query_collection
+
+def register_job_handlers(job_runner: JobRunner):
+    """Enregistrement des traitements associés à chaque type de job
+
+    Args:
+        job_runner (JobRunner): gestionnaire des jobs
+    """
+    job_runner.register("insertion", InsertionService.run_insert_doc, lane=LANE_INSERTION)
+    job_runner.register("query", query_collection, lane=LANE_QUERY)
+    job_runner.register("reindex", ReindexService.run_reindex, lane=LANE_INSERTION)
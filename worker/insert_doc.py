@@ -1,18 +1,26 @@
 import asyncio
 from datetime import datetime
 from pathlib import Path
+from typing import List
+
+from sqlalchemy.orm import Session
 
 from core.exceptions import RAGException
 from core.security import hash_file
 from core.logging import logger
 from core.config import settings
-from db.models import DocumentMetadata
+from db.models import DocumentMetadata, Job
 from dependencies.sqlite_session import SessionLocalSync
 from repositories.collections_repository import CollectionRepository
 from repositories.job_repository import get_job
-from schemas import CollectionModel
+from schemas import Chunk, CollectionModel
 from schemas.job import JobOut
-from services import ChunkingService, ConversionService, DbVectorielleService
+from services.chunking_service import ChunkingService
+from services.conversion_pool import ConversionPool
+from services.conversion_service import ConversionService
+from services.db_vectorielle_service import DbVectorielleService
+from services.ingestion_pipeline import IngestionPipeline
+from services.job_checkpoint import JobCheckpoint
 from services.user_websocket_manager import UserWebSocketManager
 from services.job_service import JobService
 
@@ -23,7 +31,11 @@ async def insert_doc(
     collection: CollectionModel,
     job_id: str,
     user_id: str,
-    user_ws_manager: UserWebSocketManager
+    user_ws_manager: UserWebSocketManager,
+    md5: str | None = None,
+    sha256: str | None = None,
+    size: int | None = None,
+    page_count: int | None = None
 ):
     """Insertion d'un fichier dans la base de connaissance
 
@@ -35,6 +47,13 @@ async def insert_doc(
         job_id (str): identifiant du job d'insertion
         user_id (str): identfiant de l'utilisateur
         user_ws_manager (UserWebSocketManager): magasin de gestion des websockets utilisateurs
+        md5 (str | None, optional): hash MD5 calculé lors de l'upload, recalculé s'il est absent. Defaults to None.
+        sha256 (str | None, optional): hash SHA-256 calculé lors de l'upload. Defaults to None.
+        size (int | None, optional): taille du fichier en octets. Defaults to None.
+        page_count (int | None, optional): nombre de pages calculé à la création du job, recalculé s'il est absent. Defaults to None.
+
+    Les résultats des étages terminés sont conservés dans le point de reprise du job : une nouvelle
+    tentative reprend au premier étage non terminé.
 
     Raises:
         Exception: Erreur levée lors de l'insertion du document
@@ -58,85 +77,47 @@ async def insert_doc(
                 data=JobOut.model_validate(job)
             )   
 
-            db_vector_service = DbVectorielleService(
-                chroma_db=settings.CHROMA_DB,
-                embedding_model=settings.LLM_EMBEDDINGS_MODEL,
-                ollama_url=settings.OLLAMA_URL
-            )
-
-            # Conversion du fichier en markdown
-            job.progress = "file conversion"
-            JobService.add_job_log(session, job_id, "Lancement conversion en markdown")   
-            session.commit()
-            await user_ws_manager.send_to_user(
-                user_id=user_id,
-                data=JobOut.model_validate(job)
-            )   
-
-            conversion_result = await asyncio.to_thread(
-                ConversionService.convert_to_md,
-                file_path=file_path, 
-                collection_name=collection.name,
-                doc_id=doc_id
-            )
-
-            # Enregistrement des informations liées au document inséré
-            job.progress = "add metadata"
-            session.commit()
-            JobService.add_job_log(session, job_id, "Ajout des métadatas dans la base")
-            await user_ws_manager.send_to_user(
-                user_id=user_id,
-                data=JobOut.model_validate(job)
-            ) 
-
-            #id=str(uuid.uuid4())
-            document = DocumentMetadata(
-                id=doc_id,
-                filename=filename,
-                collection_id=collection.id,
-                inserted_by=user_id,
-                date_insertion=datetime.now(),
-                md5=await asyncio.to_thread(hash_file, file_path=file_path)
-            )
-            document = CollectionRepository.add_document(
-                session=session, 
-                document=document
-            )
-
-            # chunking du document
-            job.progress="chunking"
-            session.commit()
-            JobService.add_job_log(session, job_id, "Début du découpage (chunking)")
-            await user_ws_manager.send_to_user(
-                user_id=user_id,
-                data=JobOut.model_validate(job)
-            )  
-
-            chunking_service = ChunkingService(filename=filename)
-            chunking_result = await asyncio.to_thread(
-                chunking_service.basic_chunking,
-                document=conversion_result.document, 
-                document_id=doc_id
-            )
-            JobService.add_job_log(session, job_id, f"Document découpé en {len(chunking_result.chunks)} morceaux")
+            db_vector_service = DbVectorielleService.shared()
+            checkpoint = JobCheckpoint(job_id)
 
-            # Enregistrement des chunks dans la base de données vectorielles
-            job.progress="embeddings"
-            session.commit()
-            JobService.add_job_log(session, job_id, f"Lancement des embeddings sur {settings.LLM_EMBEDDINGS_MODEL}...")
-            await user_ws_manager.send_to_user(
-                user_id=user_id,
-                data=JobOut.model_validate(job)
-            ) 
-
-            await asyncio.to_thread(
-                db_vector_service.insert_chunk,
-                collection_name=collection.name,
-                chunks=chunking_result.chunks
-            )
-            document.is_indexed = True
-            session.commit()
-            JobService.add_job_log(session, job_id, "Indexation vectorielle terminée avec succès")
+            # PDF dépassant le budget mémoire : pipeline d'ingestion par segments de pages. Les autres
+            # documents sont convertis puis découpés en entier (titres et tableaux non coupés par un segment)
+            if page_count is None:
+                page_count = await asyncio.to_thread(ConversionService.page_count, file_path)
+            if page_count is not None and ConversionService.streaming_window(page_count) is not None:
+                await insert_doc_by_segments(
+                    session=session,
+                    job=job,
+                    file_path=file_path,
+                    filename=filename,
+                    doc_id=doc_id,
+                    collection=collection,
+                    page_count=page_count,
+                    db_vector_service=db_vector_service,
+                    checkpoint=checkpoint,
+                    user_id=user_id,
+                    user_ws_manager=user_ws_manager,
+                    md5=md5,
+                    sha256=sha256,
+                    size=size
+                )
+            else:
+                await insert_doc_in_memory(
+                    session=session,
+                    job=job,
+                    file_path=file_path,
+                    filename=filename,
+                    doc_id=doc_id,
+                    collection=collection,
+                    db_vector_service=db_vector_service,
+                    checkpoint=checkpoint,
+                    user_id=user_id,
+                    user_ws_manager=user_ws_manager,
+                    md5=md5,
+                    sha256=sha256,
+                    size=size,
+                    page_count=page_count
+                )
 
             # Fin du traitement
             ellapsed_time = datetime.now() - start_time
@@ -150,26 +131,310 @@ async def insert_doc(
                 data=JobOut.model_validate(job)
             ) 
 
+        # L'erreur est transmise à InsertionService.run_insert_doc qui décide d'une nouvelle tentative
         except RAGException as re:
             session.rollback()
-            job.progress="done"
-            job.status="failed"
-            job.error_message=str(re)
-            session.commit()
-            await user_ws_manager.send_to_user(
-                user_id=user_id,
-                data=JobOut.model_validate(job)
-            ) 
+            JobService.add_job_log(session, job_id, f"Echec du traitement : {re}")
             logger.error(f"Job {job_id} échoué : {re.message}")
+            raise
             
         except Exception as e:
             session.rollback()
-            job.progress="done"
-            job.status="failed"
-            job.error_message=str(e)
+            JobService.add_job_log(session, job_id, f"Echec du traitement : {e}")
+            logger.critical(f"Erreur système majeure sur job {job_id}", exc_info=True)
+            raise
+
+async def register_document(
+    session: Session,
+    file_path: Path,
+    filename: str,
+    doc_id: str,
+    collection: CollectionModel,
+    user_id: str,
+    md5: str | None = None,
+    sha256: str | None = None,
+    size: int | None = None
+) -> DocumentMetadata:
+    """Enregistrement des métadonnées du document inséré
+
+    Le document peut avoir été enregistré à la création du job (insertion par lot) : la ligne
+    existante est alors réutilisée.
+
+    Args:
+        session (Session): session d'accès à la base de données
+        file_path (Path): chemin vers le fichier inséré
+        filename (str): nom du fichier inséré
+        doc_id (str): identifiant du document
+        collection (CollectionModel): collection du document
+        user_id (str): identfiant de l'utilisateur
+        md5 (str | None, optional): hash MD5 calculé lors de l'upload. Defaults to None.
+        sha256 (str | None, optional): hash SHA-256 calculé lors de l'upload. Defaults to None.
+        size (int | None, optional): taille du fichier en octets. Defaults to None.
+
+    Returns:
+        DocumentMetadata: métadonnées du document
+    """
+    document = CollectionRepository.get_document_collection_by_id(
+        session=session,
+        document_id=doc_id
+    )
+    if document is not None:
+        return document
+    return CollectionRepository.add_document(
+        session=session,
+        document=DocumentMetadata(
+            id=doc_id,
+            filename=filename,
+            collection_id=collection.id,
+            inserted_by=user_id,
+            date_insertion=datetime.now(),
+            md5=md5 or await asyncio.to_thread(hash_file, file_path=file_path),
+            sha256=sha256,
+            size=size
+        )
+    )
+
+async def insert_doc_in_memory(
+    session: Session,
+    job: Job,
+    file_path: Path,
+    filename: str,
+    doc_id: str,
+    collection: CollectionModel,
+    db_vector_service: DbVectorielleService,
+    checkpoint: JobCheckpoint,
+    user_id: str,
+    user_ws_manager: UserWebSocketManager,
+    md5: str | None = None,
+    sha256: str | None = None,
+    size: int | None = None,
+    page_count: int | None = None
+):
+    """Insertion d'un document converti en une seule fois
+
+    Args:
+        session (Session): session d'accès à la base de données
+        job (Job): job d'insertion
+        file_path (Path): chemin vers le fichier à insérer
+        filename (str): nom du fichier à insérer
+        doc_id (str): identifiant du fichier à insérer
+        collection (CollectionModel): collection dans laquelle insérer le document
+        db_vector_service (DbVectorielleService): service d'accès à la base vectorielle
+        checkpoint (JobCheckpoint): point de reprise du job
+        user_id (str): identfiant de l'utilisateur
+        user_ws_manager (UserWebSocketManager): magasin de gestion des websockets utilisateurs
+        md5 (str | None, optional): hash MD5 calculé lors de l'upload. Defaults to None.
+        sha256 (str | None, optional): hash SHA-256 calculé lors de l'upload. Defaults to None.
+        size (int | None, optional): taille du fichier en octets. Defaults to None.
+        page_count (int | None, optional): nombre de pages du document (PDF). Defaults to None.
+    """
+    # Reprise d'une tentative précédente : chunks ou document converti déjà enregistrés
+    chunks = await asyncio.to_thread(checkpoint.load_chunks)
+    converted_doc = await asyncio.to_thread(checkpoint.load_document) if chunks is None else None
+    if chunks is not None or converted_doc is not None:
+        JobService.add_job_log(session, job.id, "Reprise du traitement : conversion déjà effectuée")
+    else:
+        # Conversion du fichier en markdown
+        job.progress = "file conversion"
+        JobService.add_job_log(session, job.id, "Lancement conversion en markdown")   
+        session.commit()
+        await user_ws_manager.send_to_user(
+            user_id=user_id,
+            data=JobOut.model_validate(job)
+        )   
+
+        async def conversion_progress(pages_done: int, total_pages: int):
+            job.progress = f"conversion {pages_done}/{total_pages}"
             session.commit()
+            JobService.add_job_log(session, job.id, f"{pages_done} pages converties sur {total_pages}")
             await user_ws_manager.send_to_user(
                 user_id=user_id,
                 data=JobOut.model_validate(job)
-            ) 
-            logger.critical(f"Erreur système majeure sur job {job_id}", exc_info=True)
+            )
+
+        conversion_result = await ConversionPool.shared().convert(
+            file_path=file_path, 
+            collection_name=collection.name,
+            doc_id=doc_id,
+            page_count=page_count,
+            on_progress=conversion_progress
+        )
+        converted_doc = conversion_result.document
+        await asyncio.to_thread(checkpoint.save_document, converted_doc)
+
+    # Enregistrement des informations liées au document inséré
+    job.progress = "add metadata"
+    session.commit()
+    JobService.add_job_log(session, job.id, "Ajout des métadatas dans la base")
+    await user_ws_manager.send_to_user(
+        user_id=user_id,
+        data=JobOut.model_validate(job)
+    ) 
+
+    document = await register_document(
+        session=session,
+        file_path=file_path,
+        filename=filename,
+        doc_id=doc_id,
+        collection=collection,
+        user_id=user_id,
+        md5=md5,
+        sha256=sha256,
+        size=size
+    )
+
+    # chunking du document
+    if chunks is None:
+        job.progress="chunking"
+        session.commit()
+        JobService.add_job_log(session, job.id, "Début du découpage (chunking)")
+        await user_ws_manager.send_to_user(
+            user_id=user_id,
+            data=JobOut.model_validate(job)
+        )  
+
+        chunking_service = ChunkingService(filename=filename)
+        chunking_result = await asyncio.to_thread(
+            chunking_service.basic_chunking,
+            document=converted_doc, 
+            document_id=doc_id
+        )
+        chunks = chunking_result.chunks
+        del converted_doc
+        await asyncio.to_thread(checkpoint.save_chunks, chunks)
+        JobService.add_job_log(session, job.id, f"Document découpé en {len(chunks)} morceaux")
+
+    # Enregistrement des chunks dans la base de données vectorielles
+    job.progress="embeddings"
+    session.commit()
+    JobService.add_job_log(session, job.id, f"Lancement des embeddings sur {settings.LLM_EMBEDDINGS_MODEL}...")
+    await user_ws_manager.send_to_user(
+        user_id=user_id,
+        data=JobOut.model_validate(job)
+    ) 
+
+    # Les lots déjà indexés lors d'une tentative précédente ne sont pas réencodés
+    indexed_ids = await asyncio.to_thread(checkpoint.indexed_ids)
+    remaining = [chunk for chunk in chunks if chunk.id not in indexed_ids]
+    already_indexed = len(chunks) - len(remaining)
+
+    async def indexing_progress(chunks_done: int, total_chunks: int):
+        job.progress = f"embeddings {already_indexed + chunks_done}/{len(chunks)}"
+        session.commit()
+        JobService.add_job_log(session, job.id, f"{already_indexed + chunks_done} morceaux indexés sur {len(chunks)}")
+        await user_ws_manager.send_to_user(
+            user_id=user_id,
+            data=JobOut.model_validate(job)
+        )
+
+    async def batch_indexed(batch: List[Chunk]):
+        await asyncio.to_thread(checkpoint.add_indexed, [chunk.id for chunk in batch])
+
+    await db_vector_service.insert_chunk(
+        collection_name=collection.vector_name,
+        chunks=remaining,
+        on_progress=indexing_progress,
+        on_batch=batch_indexed
+    )
+    document.is_indexed = True
+    CollectionRepository.bump_version(session=session, collection_id=collection.id)
+    session.commit()
+    JobService.add_job_log(session, job.id, "Indexation vectorielle terminée avec succès")
+
+
+async def insert_doc_by_segments(
+    session: Session,
+    job: Job,
+    file_path: Path,
+    filename: str,
+    doc_id: str,
+    collection: CollectionModel,
+    page_count: int,
+    db_vector_service: DbVectorielleService,
+    checkpoint: JobCheckpoint,
+    user_id: str,
+    user_ws_manager: UserWebSocketManager,
+    md5: str | None = None,
+    sha256: str | None = None,
+    size: int | None = None
+):
+    """Insertion d'un PDF par segments de pages dans le pipeline d'ingestion
+
+    La conversion, le découpage et l'indexation des segments se recouvrent : les chunks des
+    premières pages sont indexés pendant la conversion des suivantes. Comme pour la conversion en
+    une fois, le document n'est enregistré qu'une fois le premier segment converti : un fichier
+    que Docling ne sait pas lire ne reste pas enregistré (et signalé comme doublon).
+
+    Args:
+        session (Session): session d'accès à la base de données
+        job (Job): job d'insertion
+        file_path (Path): chemin vers le fichier PDF à insérer
+        filename (str): nom du fichier à insérer
+        doc_id (str): identifiant du fichier à insérer
+        collection (CollectionModel): collection dans laquelle insérer le document
+        page_count (int): nombre de pages du document
+        db_vector_service (DbVectorielleService): service d'accès à la base vectorielle
+        checkpoint (JobCheckpoint): point de reprise du job
+        user_id (str): identfiant de l'utilisateur
+        user_ws_manager (UserWebSocketManager): magasin de gestion des websockets utilisateurs
+        md5 (str | None, optional): hash MD5 calculé lors de l'upload. Defaults to None.
+        sha256 (str | None, optional): hash SHA-256 calculé lors de l'upload. Defaults to None.
+        size (int | None, optional): taille du fichier en octets. Defaults to None.
+    """
+    document: DocumentMetadata | None = None
+
+    async def add_metadata() -> DocumentMetadata:
+        # Enregistrement des informations liées au document inséré
+        JobService.add_job_log(session, job.id, "Ajout des métadatas dans la base")
+        return await register_document(
+            session=session,
+            file_path=file_path,
+            filename=filename,
+            doc_id=doc_id,
+            collection=collection,
+            user_id=user_id,
+            md5=md5,
+            sha256=sha256,
+            size=size
+        )
+
+    async def pipeline_progress(converted_pages: int, indexed_pages: int, total_pages: int):
+        nonlocal document
+        if document is None and converted_pages > 0:
+            document = await add_metadata()
+        job.progress = f"pages {indexed_pages}/{total_pages}"
+        session.commit()
+        JobService.add_job_log(
+            session,
+            job.id,
+            f"{converted_pages} pages converties, {indexed_pages} pages indexées sur {total_pages}"
+        )
+        await user_ws_manager.send_to_user(
+            user_id=user_id,
+            data=JobOut.model_validate(job)
+        )
+
+    pipeline = IngestionPipeline(
+        file_path=file_path,
+        filename=filename,
+        doc_id=doc_id,
+        collection_name=collection.name,
+        page_count=page_count,
+        db_vector_service=db_vector_service,
+        on_progress=pipeline_progress,
+        checkpoint=checkpoint,
+        vector_collection=collection.vector_name
+    )
+    JobService.add_job_log(
+        session,
+        job.id,
+        f"Document de {page_count} pages traité en {len(pipeline.page_ranges)} segments de {pipeline.segment_pages} pages"
+    )
+    nb_chunks = await pipeline.run()
+
+    if document is None:
+        document = await add_metadata()
+    document.is_indexed = True
+    CollectionRepository.bump_version(session=session, collection_id=collection.id)
+    session.commit()
+    JobService.add_job_log(session, job.id, f"Indexation vectorielle terminée avec succès ({nb_chunks} morceaux)")
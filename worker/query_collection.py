@@ -1,17 +1,16 @@
 from datetime import datetime
 
-from chromadb import Metadata
 from ollama import GenerateResponse
 
-
-from core.config import settings
 from core.logging import logger
 from core.exceptions import RAGException
 from dependencies.sqlite_session import SessionLocalSync
+from repositories.collections_repository import CollectionRepository
 from repositories.query_repository import create_query
 from repositories.job_repository import get_job
-from schemas import JobOut
-from services import DbVectorielleService, LlmService, JobService, UserWebSocketManager
+from schemas import CollectionModel, JobOut
+from services import JobService, JobTokenStream, RagService, UserWebSocketManager
+from services.rag_service import NO_DOCUMENT_REASON, STAGE_LOGS
 
 async def query_collection(
     job_id: str,
@@ -52,143 +51,53 @@ async def query_collection(
                 data=JobOut.model_validate(job)
             ) 
 
-            db_vector_service = DbVectorielleService(
-                chroma_db=settings.CHROMA_DB,
-                embedding_model=settings.LLM_EMBEDDINGS_MODEL,
-                ollama_url=settings.OLLAMA_URL
-            )
-
-            # Reformulation de la requête pour interrogation base vectorielle
-            job.progress = "query reformulation"
-            session.commit()
-            JobService.add_job_log(session, job_id, "Reformulation de la requête")
-            await user_ws_manager.send_to_user(
-                user_id=user_id,
-                data=JobOut.model_validate(job)
-            )    
-
-            llm_service =  LlmService()
-            vectordb_query = llm_service.vectordb_query(query=query, model=model)
-
-            # Requête pour interrogation base vectorielle
-            job.progress = "query database"
-            session.commit()
-            JobService.add_job_log(session, job_id, "Interrogation de la base vectorielle")
-            await user_ws_manager.send_to_user(
-                user_id=user_id,
-                data=JobOut.model_validate(job)
-            )    
-
-            result = db_vector_service.query_collection(
-                query=vectordb_query, 
-                collection_name=collection_name
-            )
-
-            documents = result.get("documents")
-            metadatas = result.get("metadatas")
-            JobService.add_job_log(session, job_id, "Vérification des documents retournés")
-            await user_ws_manager.send_to_user(
-                user_id=user_id,
-                data=JobOut.model_validate(job)
-            )    
-
-            # Vérification que la requête à retourner des éléments
-            if (
-                not documents
-                or not documents[0]
-                or not metadatas
-                or not metadatas[0]
+            # Collection courante (collection Chroma renommée par une réindexation, version du contenu)
+            collection = CollectionRepository.get_by_name(session=session, name=collection_name)
+            if collection is None:
+                raise Exception(f"La collection {collection_name} n'existe pas")
+            collection = CollectionModel.model_validate(collection)
+
+            # Tokens transmis à l'utilisateur au fil de la génération
+            token_stream = JobTokenStream(job_id=job_id, user_id=user_id, user_ws_manager=user_ws_manager)
+            response: GenerateResponse | None = None
+            async for event, value in RagService.answer(
+                query=query,
+                model=model,
+                collection=collection
             ):
-                result = GenerateResponse(
-                    model=model,
-                    created_at=datetime.now().isoformat(),
-                    done=False,
-                    done_reason="Aucun document trouvé",
-                    total_duration=0,
-                    load_duration=0,
-                    prompt_eval_count=0,
-                    prompt_eval_duration=0,
-                    eval_count=0,
-                    eval_duration=0,
-                    response="""
-                        '''json
-                            {
-                                "answer": "Aucune donnée trouvée permettant de répondre à la question posée",
-                                "sources": []
-                            }
-                        '''
-                    """
-                ).model_dump(mode="json")
-                job.progress = "done"
-                job.status = "completed"
-                job.finished_at = datetime.now()
-                create_query(
-                    session=session,
-                    user_id=user_id,
-                    collection_name=collection_name,
-                    job_id=job_id,
-                    question=query,
-                    answer="Aucune donnée trouvée permettant de répondre à la question posée",
-                    model=model
-                )
-                session.commit()
-                JobService.add_job_log(session, job_id, "Fin du traitement: aucun document trouvé")
-                await user_ws_manager.send_to_user(
-                    user_id=user_id,
-                    data=JobOut.model_validate(job)
-                )
-                return
-            
-            # Reranking des documents
-            job.progress = "reranking"
-            session.commit()
-            JobService.add_job_log(session, job_id, "Reranking des documents")
-            await user_ws_manager.send_to_user(
-                user_id=user_id,
-                data=JobOut.model_validate(job)
-            )  
-
-            documents = documents[0]
-            metadatas = metadatas[0]
-            ranking = llm_service.rerank_chunks_llm(query=query,chunks=documents)
-
-            reranked_docs: list[str] = []
-            reranked_metas: list[Metadata] = []
-            for idx in ranking:
-                if idx < len(documents):
-                    reranked_docs.append(documents[idx])
-                    reranked_metas.append(metadatas[idx])
-
-            # Génération de la réponse
-            job.progress = "generation answer"
-            session.commit()
-            JobService.add_job_log(session, job_id, "Interrogation du LLM")
-            await user_ws_manager.send_to_user(
-                user_id=user_id,
-                data=JobOut.model_validate(job)
-            )   
-
-            response = llm_service.create_answer(
-                docs=reranked_docs, 
-                metadatas=reranked_metas, 
-                query=query, 
-                model=model
-            )
+                if event == "stage":
+                    job.progress = value
+                    session.commit()
+                    JobService.add_job_log(session, job_id, STAGE_LOGS[value])
+                    await user_ws_manager.send_to_user(
+                        user_id=user_id,
+                        data=JobOut.model_validate(job)
+                    )
+                elif event == "token":
+                    await token_stream.push(value)
+                else:
+                    response = value
+            if response is None:
+                raise Exception("Aucune réponse générée")
+            if response.done_reason != NO_DOCUMENT_REASON:
+                await token_stream.flush(done=True)
 
             # Fin de traitement
             ellapsed_time = datetime.now() - start_time
             job.progress = "done"
             job.status = "completed"
             job.finished_at = datetime.now()
-            result = response.model_dump(mode="json")
-            JobService.add_job_log(session, job_id, f"Traitement terminé en {ellapsed_time} s")
+            if response.done_reason == NO_DOCUMENT_REASON:
+                JobService.add_job_log(session, job_id, "Fin du traitement: aucun document trouvé")
+            else:
+                JobService.add_job_log(session, job_id, f"Traitement terminé en {ellapsed_time} s")
             create_query(
                 session=session,
                 user_id=user_id,
                 collection_name=collection_name,
                 job_id=job_id,
                 question=query,
-                answer=response.response,
+                answer=RagService.answer_text(response),
                 model=model
             )
             session.commit()